@@ -0,0 +1,112 @@
+import random, string, sys, tempfile, time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+import limpeza
+
+# Compara o caminho do notebook (normalizar_video_link com .apply, merge pelo link normalizado e
+# unificação + junção rodando duas vezes) com limpeza.limpar() em CSVs sintéticos grandes.
+# uso: python bench_limpeza.py [numero_de_runs]
+NUM_RUNS = 200_000
+FRACAO_TWITCH = 0.2
+
+
+def _id_youtube():
+    return "".join(random.choices(string.ascii_letters + string.digits + "-_", k=11))
+
+
+def gerar_csvs(pasta, n, seed=7):
+    """speedrun/youtube/twitch/bilibili_stats.csv sintéticos com os formatos de link que aparecem na coleta."""
+    random.seed(seed)
+    runs, youtube, twitch = [], [], []
+    for i in range(n):
+        data = f"2022-{1 + i % 12:02d}-{1 + i % 28:02d}"
+        if random.random() < FRACAO_TWITCH:
+            vod = str(1_500_000_000 + i)
+            link = random.choice(["https://www.twitch.tv/videos/", "https://m.twitch.tv/videos/"]) + vod
+            twitch.append({"vod_id": vod, "contexto_video": "recorde", "streamer_login": f"s{i % 500}", "title": "run",
+                           "data_criacao": f"{data}T12:00:00Z", "views": random.randint(0, 5000), "duration": "1h", "url": link})
+        else:
+            vid = _id_youtube()
+            link = random.choice([f"https://www.youtube.com/watch?v={vid}", f"https://youtu.be/{vid}", f" https://YouTube.com/watch?v={vid} "])
+            youtube.append({"date": data, "player": f"p{i % 3000}", "time_seconds": 3000.0 + i % 900, "time_formatted": "x",
+                            "run_link": f"https://www.speedrun.com/run/r{i}", "video_link": link,
+                            "Views": random.randint(0, 10**5), "Likes": random.randint(0, 5000), "Comments": random.randint(0, 300),
+                            "PublishedAt": f"{data}T00:00:00Z", "ChannelID": f"UC{i % 3000}", "CurrentSubscribers": 1000,
+                            "Views_Antes": 10, "Likes_Antes": 1, "NumVideos_Antes": 2, "Views_Depois": 20, "Likes_Depois": 2,
+                            "NumVideos_Depois": 2, "VideoAgeDays": 100, "ViewsPerDay": 1.5, "EngagementRate": 2.0})
+        runs.append({"date": data, "player": f"p{i % 3000}", "time_seconds": 3000.0 + i % 900, "time_formatted": "x",
+                     "run_link": f"https://www.speedrun.com/run/r{i}", "video_link": link})
+    bilibili = [{"bvid": f"BV1{i:09d}", "context_video": ["recorde", "antes_recorde", "depois_recorde"][i % 3], "title": "t",
+                 "name_streamer": f"u{i % 4}", "link_channel": "x", "data_publicacao": f"2023-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                 "views": i * 10, "likes": i, "danmaku": 1, "coins": 1, "shares": 1, "favorites": 1, "comments": 1} for i in range(150)]
+
+    pasta = Path(pasta)
+    pd.DataFrame(runs).to_csv(pasta / limpeza.ARQUIVO_SPEEDRUN, index=False)
+    pd.DataFrame(youtube).to_csv(pasta / limpeza.ARQUIVO_YOUTUBE, index=False)
+    pd.DataFrame(twitch).to_csv(pasta / limpeza.ARQUIVO_TWITCH, index=False)
+    pd.DataFrame(bilibili).to_csv(pasta / limpeza.ARQUIVO_BILIBILI, index=False)
+
+
+def limpar_como_notebook(pasta):
+    """O fluxo do notebook: .apply linha a linha, merge pelo link e as duas etapas executadas duas vezes."""
+    pasta = Path(pasta)
+    for _ in range(2):
+        processed = []
+        twitch = limpeza.carregar_dados(pasta / limpeza.ARQUIVO_TWITCH).rename(columns={'url': 'video_link', 'views': 'video_views', 'title': 'video_titulo'})
+        twitch['plataforma'] = 'Twitch'
+        twitch['video_link'] = twitch['video_link'].apply(limpeza.normalizar_video_link)
+        processed.append(twitch)
+        youtube = limpeza.carregar_dados(pasta / limpeza.ARQUIVO_YOUTUBE).rename(columns={
+            'Views': 'video_views', 'Likes': 'video_likes', 'Comments': 'video_comentarios', 'PublishedAt': 'video_data_publicacao'})
+        youtube['plataforma'] = 'YouTube'
+        youtube['video_link'] = youtube['video_link'].apply(limpeza.normalizar_video_link)
+        processed.append(youtube.drop(columns=['date', 'player', 'time_seconds', 'time_formatted', 'run_link']))
+        bilibili = limpeza.processar_recordes_bilibili(pasta / limpeza.ARQUIVO_BILIBILI).rename(columns={
+            'views': 'video_views', 'likes': 'video_likes', 'comments': 'video_comentarios', 'data_publicacao': 'video_data_publicacao'})
+        bilibili['video_link'] = ('https://www.bilibili.com/video/' + bilibili['bvid'].astype(str)).apply(limpeza.normalizar_video_link)
+        bilibili['plataforma'] = 'Bilibili'
+        processed.append(bilibili)
+        stats = pd.concat(processed, ignore_index=True).fillna(-1)
+
+        runs = limpeza.carregar_dados(pasta / limpeza.ARQUIVO_SPEEDRUN)
+        runs['video_link'] = runs['video_link'].apply(limpeza.normalizar_video_link)
+        runs = runs.drop_duplicates(subset=['video_link'], keep='first').rename(columns={
+            'date': 'run_date', 'player': 'run_player', 'time_seconds': 'run_time_seconds'})
+        final = pd.merge(runs, stats, on='video_link', how='left')
+        final['run_date'] = pd.to_datetime(final['run_date'], errors='coerce')
+        # o notebook usa pd.to_datetime direto, que no pandas 3 falha com fusos misturados
+        final['video_data_publicacao'] = limpeza._para_datetime(final['video_data_publicacao'])
+    return limpeza.selecionar_colunas_analise(final.fillna(-1))
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    with redirect_stdout(StringIO()):
+        resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main(n=NUM_RUNS):
+    with tempfile.TemporaryDirectory() as pasta:
+        gerar_csvs(pasta, n)
+        print(f"{n} runs sintéticas em {pasta}")
+
+        links = pd.read_csv(Path(pasta) / limpeza.ARQUIVO_SPEEDRUN)["video_link"]
+        t_apply, por_apply = cronometrar(links.apply, limpeza.normalizar_video_link)
+        t_str, por_str = cronometrar(limpeza.normalizar_video_links, links)
+        print(f"Normalização .apply:     {t_apply * 1000:8.1f} ms")
+        print(f"Normalização .str:       {t_str * 1000:8.1f} ms  {t_apply / t_str:.1f}x  "
+              f"({'mesmo resultado' if por_apply.astype(object).equals(por_str.astype(object)) else 'RESULTADOS DIFERENTES'})")
+
+        t_antigo, antigo = cronometrar(limpar_como_notebook, pasta)
+        t_novo, novo = cronometrar(limpeza.limpar, pasta)
+        print(f"Fluxo do notebook:       {t_antigo * 1000:8.1f} ms ({len(antigo)} linhas com vídeo)")
+        print(f"limpeza.limpar():        {t_novo * 1000:8.1f} ms ({len(novo)} linhas com vídeo)  {t_antigo / t_novo:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RUNS)
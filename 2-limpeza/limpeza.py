@@ -0,0 +1,320 @@
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Versão importável (e executável pela linha de comando) da limpeza de Limpeza_final.ipynb.
+# uso: python limpeza.py [pasta_da_coleta] [arquivo_de_saida]
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PASTA_COLETA = SCRIPT_DIR.parent / "1-coleta"
+ARQUIVO_SAIDA = SCRIPT_DIR / "dados_analise_final.csv"
+
+# janelas.py (recorte/agregação das janelas antes/depois) é compartilhado com os coletores
+sys.path.insert(0, str(SCRIPT_DIR.parent / "coletores"))
+import colunar
+import janelas
+
+ARQUIVO_SPEEDRUN = "speedrun_stats.csv"
+ARQUIVO_TWITCH = "twitch_stats.csv"
+ARQUIVO_YOUTUBE = "youtube_stats.csv"
+ARQUIVO_BILIBILI = "bilibili_stats.csv"
+
+COLUNAS_RELEVANTES = [
+    'run_date', 'run_player', 'run_time_seconds', 'video_link', 'plataforma',
+    'video_data_publicacao', 'VideoAgeDays', 'video_views',
+    'video_likes', 'video_comentarios', 'ViewsPerDay', 'EngagementRate',
+    'ChannelID', 'CurrentSubscribers',
+    'Views_Antes', 'Likes_Antes', 'NumVideos_Antes',
+    'Views_Depois', 'Likes_Depois', 'NumVideos_Depois',
+    'danmaku', 'coins', 'shares', 'favorites'
+]
+
+# padrões compilados uma vez e usados pelos métodos .str (sem re.search linha a linha em Python)
+YOUTU_BE_RE = re.compile(r'youtu\.be/([a-zA-Z0-9_-]+)')
+# id do vídeo em cada plataforma (os ids diferenciam maiúsculas; os domínios não), com um trecho
+# fixo do domínio para só passar pela expressão as linhas candidatas
+ID_POR_PLATAFORMA = {
+    "youtube": ("youtu", re.compile(r'(?i:youtube\.com/(?:watch\?(?:[^#]*&)?v=|shorts/|live/|embed/)|youtu\.be/)([A-Za-z0-9_-]{11})')),
+    "twitch": ("twitch", re.compile(r'(?i:twitch\.tv/videos/)(\d+)')),
+    "bilibili": ("bilibili", re.compile(r'(?i:bilibili\.com/video/)(BV[0-9A-Za-z]{10})')),
+}
+
+
+def ler_tabela(caminho_csv) -> pd.DataFrame:
+    """A versão colunar tipada do arquivo (colunar.py) quando existe e não é mais velha que o CSV; senão o CSV."""
+    if colunar.atualizado(caminho_csv):
+        return colunar.ler(colunar.caminho_colunar(caminho_csv), mmap=False, categorias=False)
+    return pd.read_csv(caminho_csv)
+
+
+def carregar_dados(caminho_arquivo: str) -> pd.DataFrame:
+    try:
+        df = ler_tabela(caminho_arquivo)
+        duplicadas = df.duplicated()
+        if duplicadas.any():
+            print(f"aviso: encontradas e removidas {duplicadas.sum()} linhas duplicadas em '{caminho_arquivo}'.")
+            df = df[~duplicadas].reset_index(drop=True)
+        return df
+    except FileNotFoundError:
+        print(f"erro: o arquivo '{caminho_arquivo}' não foi encontrado.")
+        return pd.DataFrame()
+
+
+def normalizar_video_link(url: str) -> str:
+    """Versão de um link só, igual à do notebook (usada como referência no benchmark)."""
+    if pd.isna(url) or url == -1: # tratar valores NaN ou -1
+        return url
+
+    url_str = str(url).strip().lower() # limpa espaços e padroniza para minúsculas
+
+    if 'twitch.tv/videos/' in url_str:
+        return url_str.replace('www.', '').replace('m.', '')
+    if 'youtube.com/watch?v=' in url_str:
+        return url_str.replace('www.', '')
+    if 'youtu.be/' in url_str: # converte youtu.be para o formato watch?v=
+        match = YOUTU_BE_RE.search(url_str)
+        if match:
+            return f'https://youtube.com/watch?v={match.group(1)}'
+        return url_str
+    return url_str
+
+
+def normalizar_video_links(links: pd.Series) -> pd.Series:
+    """
+    Mesmo resultado de links.apply(normalizar_video_link), com operações .str sobre a coluna
+    inteira: 'www.youtube.com' vira 'youtube.com', 'youtu.be/<id>' vira 'youtube.com/watch?v=<id>'.
+    NaN e -1 passam sem alteração. Cada teste só olha as linhas que os anteriores não resolveram.
+    """
+    vazios = _vazios(links)
+    texto = links[~vazios].astype(str).str.strip().str.lower()
+    resultado = texto.copy()
+
+    twitch = texto.str.contains('twitch.tv/videos/', regex=False)
+    resultado[twitch] = texto[twitch].str.replace('www.', '', regex=False).str.replace('m.', '', regex=False)
+
+    resto = texto[~twitch]
+    youtube = resto.str.contains('youtube.com/watch?v=', regex=False)
+    resultado[youtube[youtube].index] = resto[youtube].str.replace('www.', '', regex=False)
+
+    resto = resto[~youtube]
+    youtu_be = resto[resto.str.contains('youtu.be/', regex=False)]
+    ids = youtu_be.str.extract(YOUTU_BE_RE, expand=False)
+    resultado[youtu_be.index] = ('https://youtube.com/watch?v=' + ids).fillna(youtu_be) # sem id, fica como está
+
+    return links.astype(object).where(vazios, resultado.astype(object))
+
+
+def _vazios(links: pd.Series) -> pd.Series:
+    """NaN ou -1 (o valor usado para 'sem dado' depois do fillna)."""
+    vazios = links.isna()
+    if links.dtype == object: # colunas de texto puro não têm o -1 numérico
+        vazios |= links == -1
+    return vazios
+
+
+def extrair_chave_video(links: pd.Series) -> pd.Series:
+    """
+    Chave de junção 'plataforma:id' (ex.: 'youtube:7vYcuM--L3g', 'twitch:1505769878') extraída
+    do link, para que youtu.be/<id>, youtube.com/watch?v=<id>&t=10 etc. caiam no mesmo vídeo.
+    Links sem id reconhecido ficam com o próprio link normalizado como chave.
+    """
+    texto = links.where(~_vazios(links), "").astype(str)
+    minusculo = texto.str.lower()
+    chave = pd.Series(np.nan, index=links.index, dtype=object)
+    for plataforma, (trecho, padrao) in ID_POR_PLATAFORMA.items():
+        candidatos = chave.isna() & minusculo.str.contains(trecho, regex=False)
+        ids = texto[candidatos].str.extract(padrao, expand=False).dropna()
+        chave[ids.index] = plataforma + ":" + ids
+    sem_id = chave.isna()
+    chave[sem_id] = normalizar_video_links(links[sem_id])
+    return chave
+
+
+def processar_recordes_bilibili(caminho_csv: str) -> pd.DataFrame:
+    """
+    Para cada vídeo de recorde do bilibili, média de views e likes dos vídeos 'antes' (depois do
+    recorde anterior do mesmo streamer) e 'depois' (antes do próximo recorde). -1 quando não há vídeos.
+    """
+    print(f"\n--- Processando Bilibili a partir de: {caminho_csv} ---")
+    try:
+        df = ler_tabela(caminho_csv)
+        print(f"Bilibili: CSV carregado. {len(df)} linhas iniciais.")
+    except FileNotFoundError:
+        print(f"Bilibili ERRO: O arquivo '{caminho_csv}' não foi encontrado.")
+        return pd.DataFrame()
+    except Exception as e:
+        print(f"Bilibili ERRO ao carregar CSV: {e}")
+        return pd.DataFrame()
+
+    df["data_publicacao"] = pd.to_datetime(df["data_publicacao"], errors="coerce")
+    df["context_video"] = df["context_video"].astype(str).str.strip().str.lower()
+    if df["data_publicacao"].isnull().any():
+        print("Bilibili AVISO: Algumas 'data_publicacao' são inválidas e foram convertidas para NaT.")
+
+    df_recordes = df[df["context_video"] == "recorde"].copy()
+    print(f"Bilibili: {len(df_recordes)} vídeos com 'context_video' == 'recorde'.")
+    if df_recordes.empty:
+        print("Bilibili AVISO: Nenhum vídeo de 'recorde' encontrado após a filtragem. Retornando DataFrame vazio.")
+        return pd.DataFrame()
+
+    # limites de tempo de cada recorde: recorde anterior e próximo do mesmo streamer (NaT = sem limite)
+    df_recordes = df_recordes.sort_values(by=["name_streamer", "data_publicacao"]).reset_index(drop=True)
+    por_streamer = df_recordes.groupby("name_streamer")["data_publicacao"]
+    datas = df_recordes["data_publicacao"]
+    streamers = df_recordes["name_streamer"].where(datas.notna()) # recorde sem data: janelas vazias
+
+    # as janelas (abertas) de todos os recordes de uma vez, sobre os vídeos de cada contexto
+    medias = []
+    for contexto, sufixo, de, ate in (("antes_recorde", "Antes", por_streamer.shift(1), datas),
+                                      ("depois_recorde", "Depois", datas, por_streamer.shift(-1))):
+        indice = janelas.IndiceJanelas(df[df["context_video"] == contexto], canal="name_streamer", data="data_publicacao")
+        janela = indice.limites(streamers, de, ate, incluir_inicio=False, incluir_fim=False)
+        medias.append(janelas.resumo_janelas(indice, janela, {"views": "Views", "likes": "Likes"}, sufixo, media=True, vazio=-1))
+    medias = pd.concat(medias, axis=1)
+
+    colunas = ["Views_Antes", "Likes_Antes", "Views_Depois", "Likes_Depois", "NumVideos_Antes", "NumVideos_Depois"]
+    df_final = pd.concat([df_recordes, medias[colunas]], axis=1)
+    print(f"Bilibili: {len(df_final)} recordes processados e adicionados ao DataFrame.")
+    return df_final
+
+
+def unificar_estatisticas_videos(path_twitch: str, path_youtube: str, path_bilibili: str) -> pd.DataFrame:
+    """Estatísticas das três plataformas em um DataFrame só, com 'video_link' normalizado e 'video_chave'."""
+    processed_dfs = []
+
+    df_twitch_raw = carregar_dados(path_twitch)
+    if not df_twitch_raw.empty:
+        df_twitch = df_twitch_raw.rename(columns={'url': 'video_link', 'views': 'video_views', 'title': 'video_titulo'})
+        df_twitch['plataforma'] = 'Twitch'
+        processed_dfs.append(df_twitch)
+
+    df_youtube_raw = carregar_dados(path_youtube)
+    if not df_youtube_raw.empty:
+        df_youtube = df_youtube_raw.rename(columns={
+            'Views': 'video_views', 'Likes': 'video_likes', 'Comments': 'video_comentarios',
+            'PublishedAt': 'video_data_publicacao', 'title': 'video_titulo'
+        })
+        df_youtube['plataforma'] = 'YouTube'
+        colunas_redundantes = ['date', 'player', 'time_seconds', 'time_formatted', 'run_link']
+        df_youtube = df_youtube.drop(columns=colunas_redundantes, errors='ignore')
+        processed_dfs.append(df_youtube)
+
+    df_bilibili_processed = processar_recordes_bilibili(path_bilibili)
+    if not df_bilibili_processed.empty:
+        df_bilibili = df_bilibili_processed.rename(columns={
+            'views': 'video_views', 'likes': 'video_likes', 'comments': 'video_comentarios',
+            'data_publicacao': 'video_data_publicacao', 'title': 'video_titulo'
+        })
+        df_bilibili['video_link'] = 'https://www.bilibili.com/video/' + df_bilibili['bvid'].astype(str)
+        df_bilibili['plataforma'] = 'Bilibili'
+        processed_dfs.append(df_bilibili)
+
+    if not processed_dfs:
+        print("Aviso: Nenhum DataFrame de plataforma foi carregado corretamente.")
+        return pd.DataFrame()
+
+    # normalização e chave calculadas uma vez, na coluna concatenada
+    df_stats_unificado = pd.concat(processed_dfs, ignore_index=True)
+    df_stats_unificado['video_chave'] = extrair_chave_video(df_stats_unificado['video_link'])
+    df_stats_unificado['video_link'] = normalizar_video_links(df_stats_unificado['video_link'])
+    return df_stats_unificado.fillna(-1)
+
+
+def _para_datetime(coluna: pd.Series) -> pd.Series:
+    """
+    pd.to_datetime(errors='coerce') que aceita a mistura de datas com fuso (YouTube, '...Z') e sem
+    fuso (bilibili) na mesma coluna: cada grupo é convertido separado e o resultado fica como objeto.
+    """
+    texto = coluna.astype(str)
+    com_fuso = texto.str.contains(r'(?:Z|[+-]\d{2}:?\d{2})$', regex=True)
+    if not com_fuso.any() or com_fuso.all():
+        return pd.to_datetime(coluna.where(coluna != -1), errors='coerce', utc=bool(com_fuso.any()))
+    resultado = pd.Series(pd.NaT, index=coluna.index, dtype=object)
+    resultado[com_fuso] = pd.to_datetime(coluna[com_fuso], errors='coerce', utc=True).astype(object)
+    resultado[~com_fuso] = pd.to_datetime(coluna[~com_fuso].where(coluna[~com_fuso] != -1), errors='coerce').astype(object)
+    return resultado
+
+
+def ordenar_recordes_primeiro(df_stats: pd.DataFrame) -> pd.DataFrame:
+    """Linhas com contexto 'recorde' (Twitch) na frente, mantendo a ordem original dentro de cada parte."""
+    if 'contexto_video' not in df_stats:
+        return df_stats
+    eh_recorde = df_stats['contexto_video'].eq('recorde').to_numpy()
+    return df_stats.iloc[np.argsort(~eh_recorde, kind='stable')]
+
+
+def juntar_e_limpar_dados(path_runs: str, df_stats: pd.DataFrame) -> pd.DataFrame:
+    """Junta runs e estatísticas pelo id do vídeo na plataforma ('video_chave') e preenche o que faltar com -1."""
+    df_runs = carregar_dados(path_runs)
+    df_runs['video_chave'] = extrair_chave_video(df_runs['video_link'])
+    df_runs['video_link'] = normalizar_video_links(df_runs['video_link'])
+    df_runs = df_runs.drop_duplicates(subset=['video_chave'], keep='first')
+
+    df_runs = df_runs.rename(columns={
+        'date': 'run_date', 'player': 'run_player', 'time_seconds': 'run_time_seconds',
+        'time_formatted': 'run_time_formatted', 'run_link': 'run_url'
+    })
+
+    # um VOD da Twitch pode ser recorde e também vizinho (antes/depois) de outro recorde; com uma
+    # linha por chave o merge não duplica runs, e a linha que fica é a do recorde
+    df_stats = ordenar_recordes_primeiro(df_stats).drop_duplicates(subset=['video_chave'], keep='first')
+
+    # left merge para manter todas as runs; o link que fica é o da run
+    df_final = pd.merge(df_runs, df_stats.drop(columns=['video_link']), on='video_chave', how='left')
+
+    df_final['run_date'] = pd.to_datetime(df_final['run_date'], errors='coerce')
+    df_final['video_data_publicacao'] = _para_datetime(df_final['video_data_publicacao'])
+
+    with pd.option_context('future.no_silent_downcasting', True):
+        df_final = df_final.fillna(-1).infer_objects()
+    return df_final
+
+
+def selecionar_colunas_analise(dados_completos: pd.DataFrame) -> pd.DataFrame:
+    """Remove as runs sem vídeo associado (plataforma -1) e mantém só COLUNAS_RELEVANTES."""
+    df_analise_filtrado = dados_completos[dados_completos['plataforma'] != -1]
+    return df_analise_filtrado.reindex(columns=COLUNAS_RELEVANTES, fill_value=-1)
+
+
+def salvar_csv(dataframe: pd.DataFrame, nome_arquivo: str):
+    try:
+        # encoding='utf-8-sig' garante compatibilidade com excel para caracteres especiais
+        dataframe.to_csv(nome_arquivo, index=False, encoding='utf-8-sig')
+        print(f"dataframe salvo com sucesso em '{nome_arquivo}'")
+    except Exception as e:
+        print(f"erro ao salvar o arquivo: {e}")
+
+
+def limpar(pasta_coleta=PASTA_COLETA) -> pd.DataFrame:
+    """Pipeline completo, cada etapa uma vez: unifica as estatísticas, junta com as runs e seleciona as colunas."""
+    pasta_coleta = Path(pasta_coleta)
+    stats_unificados = unificar_estatisticas_videos(
+        pasta_coleta / ARQUIVO_TWITCH, pasta_coleta / ARQUIVO_YOUTUBE, pasta_coleta / ARQUIVO_BILIBILI
+    )
+    dados_completos = juntar_e_limpar_dados(pasta_coleta / ARQUIVO_SPEEDRUN, stats_unificados)
+    return selecionar_colunas_analise(dados_completos)
+
+
+def main(pasta_coleta=PASTA_COLETA, arquivo_saida=ARQUIVO_SAIDA):
+    df_analise = limpar(pasta_coleta)
+
+    print("\n Dataframe de análise (apenas colunas relevantes, runs sem vídeo removidas):")
+    print(df_analise.head(10))
+    for plataforma in ['YouTube', 'Twitch', 'Bilibili']:
+        print(f"\n {plataforma}: {(df_analise['plataforma'] == plataforma).sum()} runs no dataframe limpo.")
+
+    print("\n Resumo estatístico para identificar outliers:")
+    colunas_numericas = df_analise.select_dtypes(include=np.number).columns
+    print(df_analise[colunas_numericas].describe().apply(lambda s: s.apply('{0:.2f}'.format)))
+
+    print("\n--- Salvando resultado ---")
+    salvar_csv(df_analise, arquivo_saida)
+    # versão colunar tipada para o EDA/IA (colunar.ler), ao lado do CSV
+    colunar.salvar(df_analise, colunar.caminho_colunar(arquivo_saida), colunar.ESQUEMAS["dados_analise_final"])
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -0,0 +1,64 @@
+import sys, time
+
+import numpy as np
+import pandas as pd
+
+import testes_impacto
+
+# Compara o bootstrap e a permutação de testes_impacto.py (todos os grupos no mesmo lote) com o
+# laço por grupo e por reamostra, em recordes sintéticos de várias plataformas e jogos.
+# uso: python bench_testes_impacto.py [recordes] [jogos] [reamostras]
+NUM_RECORDES = 3_000
+NUM_JOGOS = 40
+REAMOSTRAS = 2_000
+
+
+def recordes_sinteticos(n, jogos, seed=11):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'plataforma': rng.choice(['YouTube', 'Twitch', 'Bilibili'], n),
+                       'jogo': rng.choice([f'jogo_{i}' for i in range(jogos)], n),
+                       'NumVideos_Antes': 1, 'NumVideos_Depois': 1,
+                       'Views_Antes': rng.lognormal(8, 1.5, n).round(), 'Likes_Antes': rng.lognormal(4, 1.5, n).round()})
+    df['Views_Depois'] = (df['Views_Antes'] * rng.lognormal(0.05, 0.5, n)).round()
+    df['Likes_Depois'] = (df['Likes_Antes'] * rng.lognormal(0, 0.5, n)).round()
+    return df
+
+
+def em_laco(df, reamostras, semente=testes_impacto.SEMENTE):
+    """Um grupo e uma reamostra por vez: mediana do bootstrap e média com sinais trocados."""
+    rng = np.random.default_rng(semente)
+    linhas = []
+    for metrica in testes_impacto.METRICAS:
+        grupos = [('todos', 'Todos', df)] + [(c, v, g) for c in testes_impacto.GRUPOS for v, g in df.groupby(c)]
+        for agrupamento, grupo, dados in grupos:
+            d = (dados[f'{metrica}_Depois'] - dados[f'{metrica}_Antes']).to_numpy()
+            medianas = [np.median(rng.choice(d, len(d))) for _ in range(reamostras)]
+            observado = abs(d.mean())
+            extremos = sum(abs((d * rng.choice([-1, 1], len(d))).mean()) >= observado for _ in range(reamostras))
+            linhas.append((metrica, agrupamento, grupo, *np.quantile(medianas, [0.025, 0.975]), (1 + extremos) / (1 + reamostras)))
+    return linhas
+
+
+def main(n=NUM_RECORDES, jogos=NUM_JOGOS, reamostras=REAMOSTRAS):
+    df = recordes_sinteticos(n, jogos)
+    inicio = time.perf_counter()
+    laco = em_laco(df, reamostras)
+    t_laco = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    vetorizado = testes_impacto.testar(df, reamostras=reamostras, estatistica_ic='mediana', estatistica_permutacao='media')
+    t_vet = time.perf_counter() - inicio
+
+    print(f"{n} recordes, {len(laco) // 2} grupos por métrica, {reamostras} reamostras (bootstrap + permutação).")
+    print(f"Laço por grupo e reamostra:   {t_laco:8.2f} s")
+    print(f"testes_impacto (em lote):     {t_vet:8.2f} s  {t_laco / t_vet:.0f}x")
+    laco = pd.DataFrame(laco, columns=['metrica', 'agrupamento', 'grupo', 'ic_inferior', 'ic_superior', 'p_permutacao'])
+    juntos = laco.merge(vetorizado, on=['metrica', 'agrupamento', 'grupo'], suffixes=('_laco', ''))
+    largura = (juntos['ic_superior'] - juntos['ic_inferior']).abs()
+    diferenca_ic = ((juntos['ic_inferior_laco'] - juntos['ic_inferior']).abs() / largura).median()
+    diferenca_p = (juntos['p_permutacao_laco'] - juntos['p_permutacao']).abs().max()
+    print(f"Diferença típica nos limites do IC: {diferenca_ic:.1%} da largura; maior diferença de p: {diferenca_p:.3f} (só ruído de Monte Carlo).")
+
+
+if __name__ == '__main__':
+    main(*(int(a) for a in sys.argv[1:4]))
@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Engenharia de features do EDA.ipynb (Seção 2) como módulo importável, para rodar fora do Colab
+# e pelo pipeline.py. uso: python features_eda.py [entrada] [saida]
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ENTRADA = SCRIPT_DIR.parent / "2-limpeza" / "dados_analise_final.csv"
+SAIDA = SCRIPT_DIR / "dados_features_eda.csv"
+FAIXAS_VIEWS = ['Baixa View', 'Média View', 'Alta View'] # terços de video_views (pd.qcut)
+
+# colunas da janela com os nomes antigos (ainda usados nas cópias de dados_analise_final.csv)
+NOMES_5D = {f"{m}_5d_{p}": f"{m}_{p}" for m in ("Views", "Likes", "NumVideos") for p in ("Antes", "Depois")}
+
+# colunar.py (formato colunar tipado) fica com os coletores
+sys.path.insert(0, str(SCRIPT_DIR.parent / "coletores"))
+import colunar
+
+
+def carregar(caminho=ENTRADA) -> pd.DataFrame:
+    """dados_analise_final: a versão colunar quando está em dia com o CSV, senão o CSV."""
+    if colunar.atualizado(caminho):
+        df = colunar.ler(colunar.caminho_colunar(caminho), mmap=False, categorias=False)
+    else:
+        df = pd.read_csv(caminho, encoding='utf-8-sig')
+    return df.rename(columns=NOMES_5D)
+
+
+def aumento_percentual(antes, depois, num_antes, num_depois) -> np.ndarray:
+    """
+    calcular_aumento_perc do notebook para a coluna inteira: variação % quando há vídeos antes,
+    NaN quando só há vídeos depois (crescimento infinito, fica fora dos gráficos) e 0 sem vídeos.
+    """
+    antes, depois = np.asarray(antes, dtype=float), np.asarray(depois, dtype=float)
+    num_antes, num_depois = np.asarray(num_antes, dtype=float), np.asarray(num_depois, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variacao = (depois - antes) / antes * 100.0
+    return np.select([num_antes > 0, (num_depois > 0) & (num_antes == 0)], [variacao, np.nan], 0.0)
+
+
+def engenharia_de_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Tipos e colunas derivadas da Seção 2 do EDA (aumentos absolutos, percentuais e faixa de views)."""
+    df = df.copy()
+
+    # 1. Limpeza de Tipos (utc=True: YouTube vem com fuso e Bilibili sem, na mesma coluna)
+    df['run_date'] = pd.to_datetime(df['run_date'], errors='coerce')
+    df['video_data_publicacao'] = pd.to_datetime(df['video_data_publicacao'], errors='coerce', utc=True)
+    df['plataforma'] = df['plataforma'].astype('category')
+
+    # 2. Aumento absoluto
+    df['aumento_abs_views'] = df['Views_Depois'] - df['Views_Antes']
+    df['aumento_abs_likes'] = df['Likes_Depois'] - df['Likes_Antes']
+
+    # 3. Houve aumento?
+    df['houve_aumento_views'] = df['aumento_abs_views'] > 0
+    df['houve_aumento_likes'] = df['aumento_abs_likes'] > 0
+
+    # 4. Aumento percentual (sem NumVideos_*, o notebook considera 1 vídeo em cada janela)
+    num_antes = df['NumVideos_Antes'] if 'NumVideos_Antes' in df else 1
+    num_depois = df['NumVideos_Depois'] if 'NumVideos_Depois' in df else 1
+    for metrica, coluna in (('views', 'Views'), ('likes', 'Likes')):
+        df[f'aumento_percentual_{metrica}'] = aumento_percentual(
+            df[f'{coluna}_Antes'], df[f'{coluna}_Depois'], num_antes, num_depois)
+
+    # 5. Faixa de views do vídeo do recorde
+    df['faixa_views_recorde'] = pd.qcut(df['video_views'], q=3, labels=FAIXAS_VIEWS, duplicates='drop')
+    return df
+
+
+def main(entrada=ENTRADA, saida=SAIDA):
+    df = engenharia_de_features(carregar(entrada))
+    df.to_csv(saida, index=False, encoding='utf-8-sig')
+    print(f"{len(df)} recordes com as features do EDA salvos em '{saida}'.")
+    return df
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -0,0 +1,299 @@
+import math, sys, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import features_eda
+
+# Seção 5 do EDA.ipynb (teste de Wilcoxon de Views/Likes antes x depois do recorde) para cada
+# plataforma e cada jogo, com intervalo de confiança por bootstrap pareado e p-valor por
+# permutação (troca de sinal das diferenças). Todos os grupos são reamostrados juntos: as
+# diferenças ficam num único array, grupo após grupo, e cada lote de reamostras é uma matriz
+# (reamostras x linhas) com o tamanho limitado por MEMORIA_LOTE.
+# uso: python testes_impacto.py [entrada] [saida]
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ENTRADA = features_eda.ENTRADA
+SAIDA = SCRIPT_DIR / "testes_impacto.csv"
+METRICAS = ['Views', 'Likes'] # testadas como <metrica>_Depois - <metrica>_Antes
+GRUPOS = ['plataforma', 'jogo'] # cada coluna que existir na tabela vira um agrupamento; 'todos' sempre entra
+REAMOSTRAS = 20_000
+CONFIANCA = 0.95
+SEMENTE = 42
+ESTATISTICA_IC = 'mediana' # da diferença depois - antes: 'media' ou 'mediana'
+ESTATISTICA_PERMUTACAO = 'postos' # 'postos' (soma dos postos positivos, a do Wilcoxon), 'media' ou 'mediana'
+MEMORIA_LOTE = 64 * 2**20 # bytes por lote de reamostras
+ALPHA = 0.05
+
+# como o scipy.stats.wilcoxon: distribuição exata até 50 pares sem empates nem zeros; com
+# empates/zeros, troca de sinal exata até 13 pares; acima disso, aproximação normal
+MAX_PARES_EXATO = 50
+MAX_PARES_PERMUTACAO_EXATA = 13
+
+
+def pares_validos(df: pd.DataFrame) -> pd.DataFrame:
+    """df_comparacao do notebook: recordes com vídeos nas duas janelas (antes E depois)."""
+    return df[(df['NumVideos_Antes'] > 0) & (df['NumVideos_Depois'] > 0)]
+
+
+# --- Wilcoxon (sem scipy) ---
+def _contagens_somas_de_postos(n):
+    """Quantos dos 2^n sinais dão cada soma de postos positivos 0..n(n+1)/2 (postos 1..n, sem empates)."""
+    contagens = np.zeros(n * (n + 1) // 2 + 1, dtype=np.float64)
+    contagens[0] = 1
+    for posto in range(1, n + 1):
+        contagens[posto:] = contagens[posto:] + contagens[:-posto]
+    return contagens
+
+
+def postos_medios(valores) -> np.ndarray:
+    """Postos 1..n com empates recebendo a média dos postos (como scipy.stats.rankdata)."""
+    valores = np.asarray(valores, dtype=float)
+    ordem = np.argsort(valores, kind='mergesort')
+    ordenados = valores[ordem]
+    novo = np.r_[True, ordenados[1:] != ordenados[:-1]]
+    bloco = np.cumsum(novo) - 1
+    medios = np.bincount(bloco, np.arange(1, len(valores) + 1)) / np.bincount(bloco)
+    postos = np.empty(len(valores))
+    postos[ordem] = medios[bloco]
+    return postos
+
+
+def wilcoxon(depois, antes):
+    """
+    stats.wilcoxon(depois, antes, alternative='two-sided') com os padrões do scipy (zeros
+    descartados, sem correção de continuidade). Devolve (W, p-valor), W = min(soma dos postos
+    positivos, soma dos negativos).
+    """
+    d = np.asarray(depois, dtype=float) - np.asarray(antes, dtype=float)
+    tem_zeros = bool((d == 0).any())
+    d = d[d != 0]
+    n = len(d)
+    if n == 0:
+        raise ValueError("todas as diferenças são zero")
+    postos = postos_medios(np.abs(d))
+    r_mais = postos[d > 0].sum()
+    w = min(r_mais, n * (n + 1) / 2 - r_mais)
+    empates = len(np.unique(np.abs(d))) < n
+
+    if n <= MAX_PARES_EXATO and not empates and not tem_zeros:
+        contagens = _contagens_somas_de_postos(n)
+        p = 2 * contagens[:int(w) + 1].sum() / 2.0 ** n
+    elif n <= MAX_PARES_PERMUTACAO_EXATA:
+        p = _permutacao_exata(postos * (d > 0), postos, 'postos')
+    else:
+        _, repeticoes = np.unique(postos, return_counts=True)
+        variancia = n * (n + 1) * (2 * n + 1) / 24 - (repeticoes ** 3 - repeticoes).sum() / 48
+        z = (r_mais - n * (n + 1) / 4) / math.sqrt(variancia)
+        p = math.erfc(abs(z) / math.sqrt(2))
+    return float(w), float(min(p, 1.0))
+
+
+# --- dados agrupados ---
+def montar_grupos(df: pd.DataFrame, metrica: str, grupos=GRUPOS):
+    """
+    Diferenças depois - antes de 'metrica' por grupo, num array só: primeiro 'todos' e depois
+    cada valor de cada coluna de 'grupos' presente em df. Dentro de cada grupo as diferenças
+    ficam em ordem crescente. Devolve (rótulos, antes, depois, diferenças, inicio), com o grupo
+    g ocupando as posições inicio[g]:inicio[g + 1].
+    """
+    rotulos, posicoes = [('todos', 'Todos')], [np.arange(len(df))]
+    for coluna in (c for c in grupos if c in df):
+        for valor, linhas in df.groupby(coluna, observed=True, sort=True).indices.items():
+            rotulos.append((coluna, valor))
+            posicoes.append(linhas)
+    antes = df[f'{metrica}_Antes'].to_numpy(dtype=float)
+    depois = df[f'{metrica}_Depois'].to_numpy(dtype=float)
+    diferenca = depois - antes
+    posicoes = [p[np.argsort(diferenca[p], kind='mergesort')] for p in posicoes]
+    tudo = np.concatenate(posicoes) if posicoes else np.empty(0, dtype=np.int64)
+    inicio = np.r_[0, np.cumsum([len(p) for p in posicoes])]
+    return rotulos, antes[tudo], depois[tudo], diferenca[tudo], inicio
+
+
+def _postos_por_grupo(diferenca, inicio):
+    """Postos de |diferença| dentro de cada grupo (empates com o posto médio), zeros com posto 0."""
+    grupo = np.repeat(np.arange(len(inicio) - 1), np.diff(inicio))
+    absoluto = np.abs(diferenca)
+    ordem = np.lexsort((absoluto, grupo))
+    a, g = absoluto[ordem], grupo[ordem]
+    zeros = np.bincount(grupo, absoluto == 0, minlength=len(inicio) - 1)
+    novo = np.r_[True, (a[1:] != a[:-1]) | (g[1:] != g[:-1])] if len(a) else np.empty(0, dtype=bool)
+    bloco = np.cumsum(novo) - 1
+    posicao = np.arange(len(a)) - inicio[g] - zeros[g] + 1
+    medios = np.bincount(bloco, posicao) / np.bincount(bloco) if len(a) else np.empty(0)
+    postos = np.empty(len(a))
+    postos[ordem] = np.where(a == 0, 0.0, medios[bloco])
+    return postos
+
+
+def _estatistica(valores, inicio, estatistica, ordenados=False):
+    """
+    Estatística de cada grupo para cada linha de 'valores' (reamostras x posições): média,
+    mediana ou soma (para 'postos', 'valores' já são os postos com sinal positivo).
+    Com ordenados=True os valores já estão em ordem crescente dentro de cada grupo.
+    """
+    contagens = np.diff(inicio)
+    if estatistica in ('media', 'postos'):
+        somas = np.add.reduceat(valores, inicio[:-1], axis=1)
+        return somas / contagens if estatistica == 'media' else somas
+    if not ordenados:
+        grupo = np.broadcast_to(np.repeat(np.arange(len(contagens)), contagens), valores.shape)
+        valores = np.take_along_axis(valores, np.lexsort((valores, grupo), axis=1), axis=1)
+    return (valores[:, inicio[:-1] + (contagens - 1) // 2] + valores[:, inicio[:-1] + contagens // 2]) / 2
+
+
+def _tamanho_lote(num_posicoes, memoria):
+    return max(1, int(memoria // (24 * max(num_posicoes, 1))))
+
+
+def bootstrap_pareado(diferenca, inicio, estatistica=ESTATISTICA_IC, reamostras=REAMOSTRAS, confianca=CONFIANCA,
+                      semente=SEMENTE, memoria=MEMORIA_LOTE):
+    """
+    Intervalo de confiança (percentil) da média ou mediana das diferenças de cada grupo,
+    reamostrando os pares com reposição dentro do grupo. Devolve (observado, inferior, superior).
+    As diferenças chegam ordenadas dentro de cada grupo (montar_grupos), então ordenar os
+    índices sorteados já ordena os valores: a mediana sai de um sort de inteiros.
+    """
+    contagens = np.diff(inicio)
+    observado = _estatistica(diferenca[None, :], inicio, estatistica, ordenados=True)[0]
+    base, tamanho = np.repeat(inicio[:-1], contagens), np.repeat(contagens, contagens)
+    rng = np.random.default_rng(semente)
+    lote = _tamanho_lote(len(diferenca), memoria)
+    resultados = []
+    for feitos in range(0, reamostras, lote):
+        # random() sai na mesma sequência com qualquer tamanho de lote: o resultado não depende de MEMORIA_LOTE
+        sorteio = rng.random((min(lote, reamostras - feitos), len(diferenca)))
+        indices = base + (sorteio * tamanho).astype(np.int64)
+        if estatistica == 'mediana':
+            indices.sort(axis=1) # cada grupo ocupa as mesmas posições em todas as linhas
+        resultados.append(_estatistica(diferenca[indices], inicio, estatistica, ordenados=True))
+    resultados = np.concatenate(resultados)
+    alpha = 1 - confianca
+    inferior, superior = np.quantile(resultados, [alpha / 2, 1 - alpha / 2], axis=0)
+    return observado, inferior, superior
+
+
+def _centro(postos, estatistica):
+    """Valor esperado da estatística sob H0 (sinais ao acaso): 0 para média/mediana, metade da soma dos postos."""
+    return postos.sum() / 2 if estatistica == 'postos' else 0.0
+
+
+def _permutacao_exata(valores, postos, estatistica):
+    """p-valor bilateral com todas as 2^n trocas de sinal de um grupo pequeno."""
+    absolutos = postos if estatistica == 'postos' else np.abs(valores)
+    if estatistica == 'postos':
+        absolutos = absolutos[absolutos > 0] # zeros descartados, como no Wilcoxon
+    n = len(absolutos)
+    if n == 0: # todas as diferenças zero: sem o que testar
+        return np.nan
+    sinais = ((np.arange(2 ** n)[:, None] >> np.arange(n)) & 1).astype(bool)
+    inicio = np.array([0, n])
+    if estatistica == 'postos':
+        distribuicao = _estatistica(np.where(sinais, absolutos, 0.0), inicio, 'postos')[:, 0]
+        observado = valores.sum()
+    else:
+        distribuicao = _estatistica(np.where(sinais, absolutos, -absolutos), inicio, estatistica)[:, 0]
+        observado = _estatistica(valores[None, :], inicio, estatistica)[0, 0]
+    centro = _centro(absolutos, estatistica)
+    extremos = np.abs(distribuicao - centro) >= abs(observado - centro) * (1 - 1e-12)
+    return extremos.sum() / len(distribuicao)
+
+
+def permutacao_pareada(diferenca, inicio, estatistica=ESTATISTICA_PERMUTACAO, reamostras=REAMOSTRAS,
+                       semente=SEMENTE, memoria=MEMORIA_LOTE):
+    """
+    p-valor bilateral de H0 "antes e depois têm a mesma distribuição" em cada grupo, trocando o
+    sinal de cada diferença ao acaso. Grupos com 2^n <= reamostras são enumerados por inteiro
+    (p exato, o mesmo do scipy para o Wilcoxon); os demais saem de 'reamostras' sorteios, todos
+    os grupos no mesmo lote, com p = (1 + extremos) / (1 + reamostras). Devolve (p, exato).
+    """
+    contagens = np.diff(inicio)
+    postos = _postos_por_grupo(diferenca, inicio)
+    valores = np.where(diferenca > 0, postos, 0.0) if estatistica == 'postos' else diferenca
+    n_efetivo = np.add.reduceat(postos > 0, inicio[:-1]) if estatistica == 'postos' else contagens
+    exato = n_efetivo <= int(math.log2(reamostras)) # 2^n <= reamostras
+    p = np.full(len(contagens), np.nan)
+    for g in np.flatnonzero(exato):
+        trecho = slice(inicio[g], inicio[g + 1])
+        p[g] = _permutacao_exata(valores[trecho], postos[trecho], estatistica)
+
+    sorteados = np.flatnonzero(~exato)
+    if len(sorteados):
+        partes = [np.arange(inicio[g], inicio[g + 1]) for g in sorteados]
+        posicoes = np.concatenate(partes)
+        sub_inicio = np.r_[0, np.cumsum([len(x) for x in partes])]
+        magnitude = postos[posicoes] if estatistica == 'postos' else np.abs(diferenca[posicoes])
+        centro = np.array([_centro(postos[x], estatistica) for x in partes])
+        observado = _estatistica(valores[posicoes][None, :], sub_inicio, estatistica)[0]
+        limite = np.abs(observado - centro) * (1 - 1e-12)
+        rng = np.random.default_rng(semente)
+        lote = _tamanho_lote(len(posicoes), memoria)
+        extremos = np.zeros(len(sorteados), dtype=np.int64)
+        for feitos in range(0, reamostras, lote):
+            positivo = rng.random((min(lote, reamostras - feitos), len(posicoes))) < 0.5
+            trocados = np.where(positivo, magnitude, 0.0 if estatistica == 'postos' else -magnitude)
+            distribuicao = _estatistica(trocados, sub_inicio, estatistica)
+            extremos += (np.abs(distribuicao - centro) >= limite).sum(axis=0)
+        p[sorteados] = (1 + extremos) / (1 + reamostras)
+    return p, exato
+
+
+def testar(df: pd.DataFrame, metricas=METRICAS, grupos=GRUPOS, reamostras=REAMOSTRAS, confianca=CONFIANCA,
+           semente=SEMENTE, memoria=MEMORIA_LOTE, estatistica_ic=ESTATISTICA_IC,
+           estatistica_permutacao=ESTATISTICA_PERMUTACAO) -> pd.DataFrame:
+    """Uma linha por métrica e grupo: tamanho, medianas, IC por bootstrap, p por permutação e o Wilcoxon."""
+    pares = pares_validos(df)
+    linhas = []
+    if pares.empty:
+        return pd.DataFrame(linhas)
+    for metrica in metricas:
+        rotulos, antes, depois, diferenca, inicio = montar_grupos(pares, metrica, grupos)
+        observado, inferior, superior = bootstrap_pareado(diferenca, inicio, estatistica_ic, reamostras, confianca, semente, memoria)
+        p_perm, exato = permutacao_pareada(diferenca, inicio, estatistica_permutacao, reamostras, semente, memoria)
+        for g, (agrupamento, grupo) in enumerate(rotulos):
+            trecho = slice(inicio[g], inicio[g + 1])
+            try:
+                w, p_wilcoxon = wilcoxon(depois[trecho], antes[trecho])
+            except ValueError: # todas as diferenças zero
+                w, p_wilcoxon = np.nan, np.nan
+            linhas.append({
+                'metrica': metrica, 'agrupamento': agrupamento, 'grupo': grupo, 'pares': inicio[g + 1] - inicio[g],
+                'mediana_antes': np.median(antes[trecho]), 'mediana_depois': np.median(depois[trecho]),
+                f'{estatistica_ic}_diferenca': observado[g], 'ic_inferior': inferior[g], 'ic_superior': superior[g],
+                'p_permutacao': p_perm[g], 'permutacao_exata': bool(exato[g]), 'W': w, 'p_wilcoxon': p_wilcoxon,
+            })
+    return pd.DataFrame(linhas)
+
+
+def imprimir_conclusao(resultado: pd.DataFrame):
+    """O resumo da Seção 5 do notebook para o grupo 'todos' de cada métrica."""
+    if resultado.empty:
+        print("Teste não executado: Nenhum dado pareado válido foi encontrado.")
+        return
+    for linha in resultado[resultado['agrupamento'] == 'todos'].itertuples():
+        print(f"--- Teste de Hipótese de Wilcoxon (Bilateral) para {linha.metrica} ---")
+        print(f"Total de recordes pareados analisados: {linha.pares}")
+        print(f"Estatística do Teste (W): {linha.W:.4f}")
+        print(f"P-Valor (bilateral): {linha.p_wilcoxon:.6f}")
+        if linha.p_wilcoxon < ALPHA:
+            print(f"(P-Valor = {linha.p_wilcoxon:.6f} < {ALPHA}) Resultado: Rejeitamos a Hipótese Nula (H0).")
+        else:
+            print(f"(P-Valor = {linha.p_wilcoxon:.6f} >= {ALPHA}) Resultado: Falhamos em Rejeitar a Hipótese Nula (H0).")
+        print()
+
+
+def main(entrada=ENTRADA, saida=SAIDA):
+    inicio = time.perf_counter()
+    resultado = testar(features_eda.carregar(entrada))
+    imprimir_conclusao(resultado)
+    resultado.to_csv(saida, index=False, encoding='utf-8-sig')
+    grupos = resultado.groupby('metrica').size().iloc[0] if len(resultado) else 0
+    print(f"{grupos} grupos x {len(METRICAS)} métricas, {REAMOSTRAS} reamostras cada, em "
+          f"{time.perf_counter() - inicio:.2f}s. Resultado salvo em '{saida}'.")
+    return resultado
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:3])
@@ -0,0 +1,97 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Preparação dos dados para os modelos (seções 2 a 5 do Limpeza_IA.ipynb) como módulo importável,
+# para rodar fora do Colab e pelo pipeline.py. uso: python preparacao_ia.py [entrada] [saida]
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ENTRADA = SCRIPT_DIR / "dados_etapa_anterior.csv"
+SAIDA = SCRIPT_DIR / "dados_para_modelagem.csv"
+QUANTIL_HYPE = 0.67 # 'hype' = vídeos a partir deste quantil de views (percentil 67 = top 33%)
+
+# Lista de colunas para remover (identificadores únicos ou textos não processados)
+COLUNAS_IRRELEVANTES = [
+    'video_link',
+    'run_player',      # Alta cardinalidade, nome do jogador
+    'plataforma',      # Se quiser manter, precisará fazer One-Hot Encoding depois
+    'ChannelID',
+    'video_data_publicacao' # Já criamos a versão clean/numérica se necessário
+]
+
+# o notebook de treino usa os nomes antigos das colunas da janela (Views_5d_Antes...); a limpeza atual grava Views_Antes
+NOMES_5D = {f"{m}_{p}": f"{m}_5d_{p}" for m in ("Views", "Likes", "NumVideos") for p in ("Antes", "Depois")}
+
+
+def carregar_e_padronizar_dados(caminho_arquivo):
+    """
+    Carrega o CSV, converte colunas de data e ajusta tipos numéricos
+    """
+    df = pd.read_csv(caminho_arquivo).rename(columns=NOMES_5D)
+
+    # Conversão de datas (lidando com formatos mistos e timezones)
+    cols_data = ['run_date', 'video_data_publicacao']
+    for col in cols_data:
+        # utc=True ajuda a unificar datas com e sem fuso horário (YouTube vs Bilibili)
+        df[col] = pd.to_datetime(df[col], errors='coerce', utc=True)
+
+    # Extrair apenas a data (sem hora) para facilitar análises temporais
+    df['data_publicacao_clean'] = df['video_data_publicacao'].dt.date
+
+    return df
+
+
+def criar_categoria_hype(df, quantil=QUANTIL_HYPE):
+    """
+    Cria a variável alvo 'hype' para a etapa de Classificação
+    Regra: 1 (Hype) se estiver entre os vídeos mais vistos (a partir do 'quantil' de views), 0 (Normal) caso contrário
+    """
+    corte_hype = df['video_views'].quantile(quantil)
+
+    # Criando a coluna binária (Target)
+    df['hype'] = np.where(df['video_views'] >= corte_hype, 1, 0)
+
+    print(f"Corte de visualizações para ser 'Hype': {corte_hype:,.0f}")
+    print(f"Distribuição das classes:\n{df['hype'].value_counts(normalize=True)}")
+
+    return df
+
+
+def limpar_colunas_irrelevantes(df, preencher=True):
+    """
+    Remove colunas que não servem como features para os modelos
+    (IDs, Links ou colunas com muitos dados faltantes/sentinelas).
+    Com preencher=False os nulos ficam como NaN (para o imputador do modelo treinado preencher).
+    """
+    df_clean = df.drop(columns=COLUNAS_IRRELEVANTES, errors='ignore')
+
+    # Tratamento específico para os dados do Bilibili que vieram como -1 (sentinela de erro/nulo)
+    # Substituindo -1 por NaN nas colunas numéricas para não enviesar a média/regressão
+    cols_numericas = [col for col in df_clean.select_dtypes(include=[np.number]).columns if col != 'hype']
+    df_clean[cols_numericas] = df_clean[cols_numericas].replace(-1.0, np.nan)
+
+    # Preenchimento de nulos com a mediana (estratégia comum para não perder linhas)
+    if preencher:
+        df_clean = df_clean.fillna(df_clean.median(numeric_only=True))
+
+    return df_clean
+
+
+def preparar(caminho_arquivo=ENTRADA, quantil=QUANTIL_HYPE):
+    """Carregamento, alvo 'hype' e limpeza final, na ordem do notebook."""
+    df_raw = carregar_e_padronizar_dados(caminho_arquivo)
+    df_hype = criar_categoria_hype(df_raw, quantil)
+    return limpar_colunas_irrelevantes(df_hype)
+
+
+def main(entrada=ENTRADA, saida=SAIDA, quantil=QUANTIL_HYPE):
+    df_final = preparar(entrada, float(quantil))
+    df_final.to_csv(saida, index=False)
+    print(f"Arquivo '{saida}' salvo com sucesso!")
+    return df_final
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:4])
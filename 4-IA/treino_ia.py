@@ -0,0 +1,341 @@
+import hashlib, math, sys, time
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin, is_classifier
+from sklearn.compose import ColumnTransformer, make_column_selector
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.experimental import enable_halving_search_cv # noqa: F401 (habilita o HalvingGridSearchCV)
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.metrics import (accuracy_score, f1_score, mean_absolute_error, mean_squared_error, precision_score,
+                             r2_score, recall_score, roc_auc_score)
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+import preparacao_ia
+
+# Treino dos modelos do Limpeza_IA.ipynb (classificação do 'hype' e regressão de video_views)
+# como módulo, para rodar fora do Colab e pelo pipeline.py. As features temporais e a
+# padronização são passos do Pipeline com memória em disco (joblib.Memory): o pré-processamento
+# ajustado em cada fold fica guardado pelo hash dos dados e dos parâmetros, e os candidatos que
+# caem no mesmo fold o reaproveitam. A busca é uma só por tarefa (HalvingGridSearchCV com todas
+# as famílias de modelos juntas), e o melhor modelo vai para um .joblib usado por pontuar().
+# uso: python treino_ia.py [entrada]  |  python treino_ia.py --comparar [entrada]
+#      python treino_ia.py pontuar dados_analise_final.csv [saida]
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ENTRADA = SCRIPT_DIR / "dados_para_modelagem.csv"
+PASTA_CACHE = SCRIPT_DIR / ".cache" / "preprocessamento" # pré-processamento ajustado por fold (joblib.Memory)
+TEST_SIZE = 0.3 # 30% vai para validação, 70% de treino
+RANDOM_STATE = 42
+CV = 5
+N_JOBS = -1
+VERBOSE = 1
+FATOR_HALVING = 3 # a cada rodada fica 1/3 dos candidatos, com 3x mais amostras
+MIN_RECURSOS = 'smallest' # amostras da primeira rodada: o mínimo para o cv (2 * CV * classes)
+IDENTIFICADORES = ['run_date', 'run_player', 'plataforma', 'video_link'] # copiados para a saída de pontuar()
+
+# uma entrada por tarefa: alvo, colunas que não entram em X, métrica da busca e as famílias de
+# modelos com as grades de hiperparâmetros do notebook (o notebook não buscava nada nos regressores)
+TAREFAS = {
+    'classificacao': {
+        'alvo': 'hype',
+        'fora_de_x': ['hype', 'video_views'],
+        'temporais': True, # engenharia_features_temporais entra só na classificação, como no notebook
+        'scoring': 'f1',
+        'estratificar': True,
+        'modelo': SCRIPT_DIR / "modelo_hype.joblib",
+        'familias': {
+            'Regressão Logística': (LogisticRegression(random_state=RANDOM_STATE, solver='liblinear'), {
+                'class_weight': ['balanced'], # penaliza erros na classe minoritária (Hype)
+                'C': [0.1, 1.0, 10],
+            }),
+            'Random Forest': (RandomForestClassifier(random_state=RANDOM_STATE), {
+                'n_estimators': [100, 200],
+                'max_depth': [5, 10, None],
+                'class_weight': ['balanced'],
+            }),
+        },
+    },
+    'regressao': {
+        'alvo': 'video_views',
+        'fora_de_x': ['video_views', 'hype', 'ViewsPerDay'], # ViewsPerDay é o próprio alvo dividido pela idade
+        'temporais': False,
+        'scoring': 'neg_root_mean_squared_error',
+        'estratificar': False,
+        'modelo': SCRIPT_DIR / "modelo_views.joblib",
+        'familias': {
+            'Regressão Linear': (LinearRegression(), {
+                'fit_intercept': [True, False],
+            }),
+            'Random Forest Regressor': (RandomForestRegressor(random_state=RANDOM_STATE), {
+                'n_estimators': [100, 200],
+                'max_depth': [5, 10, None],
+            }),
+        },
+    },
+}
+
+
+def engenharia_features_temporais(df, data_minima=None):
+    """
+    Cria features numéricas a partir das colunas de data para uso no modelo.
+    Foca no 'run_date' (data da medição) e 'data_publicacao_clean'. 'data_minima' é a data de
+    referência de dias_desde_inicio (por padrão a menor run_date do próprio df, como no notebook).
+    """
+    df = df.copy()
+
+    # Garantir que a coluna 'run_date' e 'data_publicacao_clean' sejam datetime
+    df['run_date'] = pd.to_datetime(df['run_date'], errors='coerce', utc=True)
+    df['data_publicacao_clean'] = pd.to_datetime(df['data_publicacao_clean'], errors='coerce', utc=True)
+
+    # Feature: Dias desde a primeira medição (para capturar tendência geral)
+    min_date = df['run_date'].min() if data_minima is None else data_minima
+    df['dias_desde_inicio'] = (df['run_date'] - min_date).dt.days
+
+    # Feature: Dia da semana da medição (para sazonalidade semanal)
+    df['run_weekday'] = df['run_date'].dt.dayofweek
+
+    # Feature: Mês da medição (para sazonalidade anual)
+    df['run_month'] = df['run_date'].dt.month
+    return df
+
+
+class FeaturesTemporais(TransformerMixin, BaseEstimator):
+    """
+    Primeiro passo do Pipeline: aplica engenharia_features_temporais (se 'temporais') e devolve as
+    colunas numéricas de X sem 'fora_de_x'. A data mínima e a lista de colunas são aprendidas no
+    fit, então runs novas são pontuadas com a mesma referência do treino.
+    """
+
+    def __init__(self, temporais=True, fora_de_x=()):
+        self.temporais = temporais
+        self.fora_de_x = fora_de_x
+
+    def _features(self, X, data_minima=None):
+        return engenharia_features_temporais(X, data_minima) if self.temporais else X
+
+    def fit(self, X, y=None):
+        self.data_minima_ = pd.to_datetime(X['run_date'], errors='coerce', utc=True).min() if self.temporais else None
+        numericas = self._features(X, self.data_minima_).select_dtypes(include=np.number).columns
+        self.colunas_ = [c for c in numericas if c not in self.fora_de_x]
+        return self
+
+    def transform(self, X):
+        return self._features(X, self.data_minima_).reindex(columns=self.colunas_)
+
+
+def criar_pipeline(tarefa, memoria=None):
+    """
+    Pré-processamento -> modelo. O passo 'modelo' é trocado pela busca (uma família por grade).
+    Os nulos são preenchidos com as medianas do treino, guardadas no modelo: runs novas não
+    dependem das medianas do lote pontuado.
+    """
+    config = TAREFAS[tarefa]
+    primeiro_modelo = next(iter(config['familias'].values()))[0]
+    numericas = Pipeline(steps=[('imputador', SimpleImputer(strategy='median')), ('escala', StandardScaler())])
+    preprocessor = ColumnTransformer(
+        transformers=[('num', numericas, make_column_selector(dtype_include=np.number))],
+        remainder='drop'
+    )
+    return Pipeline(steps=[('features', FeaturesTemporais(config['temporais'], tuple(config['fora_de_x']))),
+                           ('preprocessor', preprocessor),
+                           ('modelo', primeiro_modelo)], memory=memoria)
+
+
+def grades(tarefa, familias=None):
+    """Uma grade por família, com o próprio estimador como parâmetro do passo 'modelo'."""
+    return [{'modelo': [estimador], **{f'modelo__{k}': v for k, v in grade.items()}}
+            for nome, (estimador, grade) in TAREFAS[tarefa]['familias'].items() if familias is None or nome in familias]
+
+
+def dividir(df, tarefa):
+    """Treino e teste como no notebook (test_size 0.3, random_state 42, estratificado na classificação)."""
+    config = TAREFAS[tarefa]
+    X, y = df.drop(columns=[config['alvo']]), df[config['alvo']]
+    return train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE,
+                            stratify=y if config['estratificar'] else None)
+
+
+def _ajustes_em_cache(pasta):
+    """Pré-processamentos guardados pela memória do Pipeline (um output.pkl por ajuste distinto; o nome da função muda entre versões do scikit-learn)."""
+    return sum(1 for _ in Path(pasta).rglob('_fit_transform_one*/**/output.pkl')) if Path(pasta).exists() else 0
+
+
+def rodadas_halving(y_train, tarefa):
+    """
+    Rodadas que o HalvingGridSearchCV consegue fazer com 'y_train' (a conta do scikit-learn para
+    min_resources='smallest': 2 * CV amostras, vezes o número de classes na classificação).
+    Com menos de 2 não há eliminação: todos os candidatos são avaliados numa subamostra.
+    """
+    minimo = MIN_RECURSOS
+    if minimo in ('smallest', 'exhaust'): # 'exhaust' parte do mesmo mínimo e só pode aumentar
+        minimo = 2 * CV * (y_train.nunique() if is_classifier(criar_pipeline(tarefa)) else 1)
+    if len(y_train) < minimo:
+        return 0
+    return 1 + math.floor(math.log(len(y_train) // minimo, FATOR_HALVING))
+
+
+def buscar(X_train, y_train, tarefa, memoria=PASTA_CACHE):
+    """
+    HalvingGridSearchCV com todas as famílias da tarefa na mesma busca e o pré-processamento em
+    cache. Quando os dados não dão para 2 rodadas (ver rodadas_halving), vira um GridSearchCV com
+    as mesmas grades e o mesmo cache, que avalia os candidatos no treino inteiro.
+    """
+    pipeline = criar_pipeline(tarefa, joblib.Memory(str(memoria), verbose=0))
+    if rodadas_halving(y_train, tarefa) < 2:
+        print(f"[{tarefa}] {len(y_train)} amostras não dão para {FATOR_HALVING}x a primeira rodada do halving; "
+              "usando GridSearchCV com todas as famílias.")
+        busca = GridSearchCV(pipeline, grades(tarefa), cv=CV, scoring=TAREFAS[tarefa]['scoring'], n_jobs=N_JOBS, verbose=VERBOSE)
+    else:
+        busca = HalvingGridSearchCV(pipeline, grades(tarefa), factor=FATOR_HALVING, min_resources=MIN_RECURSOS, cv=CV,
+                                    scoring=TAREFAS[tarefa]['scoring'], random_state=RANDOM_STATE, n_jobs=N_JOBS, verbose=VERBOSE)
+    return busca.fit(X_train, y_train)
+
+
+def ajustes(busca):
+    """Quantos fits de candidato a busca fez (sem contar o refit final)."""
+    if isinstance(busca, HalvingGridSearchCV):
+        return int(sum(busca.n_candidates_)) * busca.n_splits_
+    return len(busca.cv_results_['params']) * busca.n_splits_
+
+
+def avaliar(modelo, X_test, y_test, tarefa):
+    """Métricas no conjunto de teste: as da classificação ou as de avaliar_regressao do notebook."""
+    y_pred = modelo.predict(X_test)
+    if tarefa == 'classificacao':
+        metricas = {'f1': f1_score(y_test, y_pred), 'accuracy': accuracy_score(y_test, y_pred),
+                    'precision': precision_score(y_test, y_pred, zero_division=0), 'recall': recall_score(y_test, y_pred)}
+        if y_test.nunique() > 1:
+            metricas['roc_auc'] = roc_auc_score(y_test, modelo.predict_proba(X_test)[:, 1])
+        return metricas
+    return {'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))), 'mae': mean_absolute_error(y_test, y_pred),
+            'r2': r2_score(y_test, y_pred)}
+
+
+def nome_da_familia(tarefa, modelo):
+    final = modelo.named_steps['modelo'] if isinstance(modelo, Pipeline) else modelo
+    return next(nome for nome, (estimador, _) in TAREFAS[tarefa]['familias'].items() if type(estimador) is type(final))
+
+
+def hash_arquivo(caminho):
+    with open(caminho, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def treinar(entrada=ENTRADA, tarefas=tuple(TAREFAS), memoria=PASTA_CACHE):
+    """Busca, avalia no teste e salva o melhor modelo de cada tarefa. Devolve {tarefa: pacote salvo}."""
+    df = pd.read_csv(entrada)
+    resultado = {}
+    for tarefa in tarefas:
+        X_train, X_test, y_train, y_test = dividir(df, tarefa)
+        inicio = time.perf_counter()
+        busca = buscar(X_train, y_train, tarefa, memoria)
+        segundos = time.perf_counter() - inicio
+        familia = nome_da_familia(tarefa, busca.best_estimator_)
+        metricas = avaliar(busca.best_estimator_, X_test, y_test, tarefa)
+        print(f"\n[{tarefa}] Melhor modelo: {familia} ({TAREFAS[tarefa]['scoring']} na validação cruzada: {busca.best_score_:.4f})")
+        print(f"Melhores parâmetros: { {k: v for k, v in busca.best_params_.items() if k != 'modelo'} }")
+        print(f"{ajustes(busca)} fits em {segundos:.2f}s; no teste: " + ", ".join(f"{k}={v:,.4f}" for k, v in metricas.items()))
+        pacote = {'modelo': busca.best_estimator_, 'tarefa': tarefa, 'familia': familia, 'alvo': TAREFAS[tarefa]['alvo'],
+                  'parametros': {k: v for k, v in busca.best_params_.items() if k != 'modelo'},
+                  'score_cv': busca.best_score_, 'metricas_teste': metricas, 'dados_sha256': hash_arquivo(entrada),
+                  'treinado_em': pd.Timestamp.now(tz='UTC').isoformat()}
+        joblib.dump(pacote, TAREFAS[tarefa]['modelo'])
+        print(f"Modelo salvo em '{TAREFAS[tarefa]['modelo']}'.")
+        resultado[tarefa] = pacote
+    return resultado
+
+
+def comparar(entrada=ENTRADA, tarefas=tuple(TAREFAS)):
+    """
+    Tempo e fits do GridSearchCV do notebook (uma busca exaustiva por família, sem cache) contra
+    a busca por halving com o pré-processamento em cache (pasta nova, para medir do zero e depois
+    de novo com o cache cheio, como numa segunda execução). Quando o halving não tem dados para
+    2 rodadas, buscar() usa um GridSearchCV único e a linha aparece como 'grid único'.
+    """
+    import tempfile
+    df = pd.read_csv(entrada)
+    linhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for tarefa in tarefas:
+            X_train, _, y_train, _ = dividir(df, tarefa)
+            config = TAREFAS[tarefa]
+            inicio, fits, melhor = time.perf_counter(), 0, -np.inf
+            for familia in config['familias']:
+                grid = GridSearchCV(criar_pipeline(tarefa), grades(tarefa, [familia]), cv=CV, scoring=config['scoring'],
+                                    n_jobs=N_JOBS, verbose=0).fit(X_train, y_train)
+                fits += ajustes(grid)
+                melhor = max(melhor, grid.best_score_)
+            linhas.append((tarefa, 'GridSearchCV por família', time.perf_counter() - inicio, fits, fits, melhor))
+            rodadas = rodadas_halving(y_train, tarefa)
+            tipo = f'halving ({rodadas} rodadas)' if rodadas >= 2 else 'grid único'
+            for cache in ('cache vazio', 'cache cheio'):
+                antes = _ajustes_em_cache(pasta)
+                inicio = time.perf_counter()
+                busca = buscar(X_train, y_train, tarefa, pasta)
+                linhas.append((tarefa, f'{tipo}, {cache}', time.perf_counter() - inicio, ajustes(busca),
+                               _ajustes_em_cache(pasta) - antes, busca.best_score_))
+            if rodadas < 2:
+                print(f"[{tarefa}] halving degenerado: {len(y_train)} amostras de treino dão {rodadas} rodada(s) com fator "
+                      f"{FATOR_HALVING}; todos os candidatos seriam avaliados numa subamostra, sem eliminação.")
+    print(f"\n{'tarefa':<14} {'busca':<30} {'tempo (s)':>10} {'fits':>6} {'pré-proc. ajustados':>20} {'melhor score cv':>16}")
+    for tarefa, busca, segundos, fits, preproc, score in linhas:
+        print(f"{tarefa:<14} {busca:<30} {segundos:>10.2f} {fits:>6} {preproc:>20} {score:>16.4f}")
+    return linhas
+
+
+_modelos = {}
+
+def carregar_modelo(caminho):
+    """Pacote salvo por treinar(), lido uma vez por processo."""
+    caminho = str(caminho)
+    if caminho not in _modelos:
+        _modelos[caminho] = joblib.load(caminho)
+    return _modelos[caminho]
+
+
+def pontuar(entrada, saida=None, tarefas=tuple(TAREFAS)):
+    """
+    Aplica os modelos salvos às runs de um dados_analise_final.csv recém-coletado (mesma
+    preparação de preparacao_ia.py, sem o alvo) de uma vez só, e devolve os identificadores de
+    cada run com as previsões: hype_previsto/prob_hype e views_previstas. Os -1 viram NaN e são
+    preenchidos pelo imputador do modelo, com as medianas do treino.
+    """
+    df = preparacao_ia.carregar_e_padronizar_dados(entrada)
+    X = preparacao_ia.limpar_colunas_irrelevantes(df, preencher=False)
+    resultado = df[[c for c in IDENTIFICADORES if c in df]].copy()
+    for tarefa in tarefas:
+        pacote = carregar_modelo(TAREFAS[tarefa]['modelo'])
+        modelo = pacote['modelo']
+        if is_classifier(modelo):
+            resultado['hype_previsto'] = modelo.predict(X)
+            resultado['prob_hype'] = modelo.predict_proba(X)[:, 1]
+        else:
+            resultado['views_previstas'] = modelo.predict(X)
+    if saida:
+        resultado.to_csv(saida, index=False, encoding='utf-8-sig')
+        print(f"{len(resultado)} runs pontuadas e salvas em '{saida}'.")
+    return resultado
+
+
+def main(argumentos=()):
+    argumentos = list(argumentos)
+    if argumentos[:1] == ['pontuar']:
+        return pontuar(*argumentos[1:3])
+    if '--comparar' in argumentos:
+        argumentos.remove('--comparar')
+        return comparar(*argumentos[:1])
+    return treinar(*argumentos[:1])
+
+
+if __name__ == '__main__':
+    # roda pelo módulo importado (e não por __main__) para que FeaturesTemporais fique salva no
+    # .joblib como treino_ia.FeaturesTemporais e o modelo possa ser carregado de outros scripts
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import treino_ia
+    treino_ia.main(sys.argv[1:])
@@ -0,0 +1,120 @@
+import json, os, shutil, subprocess, sys, tempfile, time
+from pathlib import Path
+
+import snapshots
+from servidor_mock import ServidorMock, Cenario, NUM_RUNS
+
+# Roda speedrun.main, os coletores da Twitch, do YouTube e do Bilibili e a limpeza contra o
+# servidor local de servidor_mock.py, cada etapa em um processo separado dentro de uma cópia
+# temporária do projeto (os CSVs e caches reais não são tocados), e mede tempo, requisições,
+# bytes recebidos e pico de memória de cada uma. Os dados sintéticos são determinísticos.
+# uso: python bench_coleta.py [--runs N] [--latencia MS] [--429-a-cada N] [--max-pagina N] [--com-limites]
+#                             [--gravados .cache/http.sqlite] [--verbose]
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+RAIZ = SCRIPT_DIR.parent
+ARQUIVOS_COLETORES = ["*.py", "bilibili_headers.json"]
+AUTH_FALSO = {"client_id": "mock", "client_secret": "mock", "YOUTUBE_API_KEY": "mock"}
+
+# (nome, pasta do script, módulo), na ordem do README
+ETAPAS = [
+    ("speedrun", "coletores", "speedrun"),
+    ("twitch", "coletores", "twitch_coleta_dados"),
+    ("youtube", "coletores", "youtube_coleta_dados"),
+    ("bilibili", "coletores", "bilibili_coleta_dados"),
+    ("limpeza", "2-limpeza", "limpeza"),
+]
+
+# executado em cada processo filho: importa o módulo, roda main() e devolve tempo e memória em JSON
+EXECUTOR = """
+import json, resource, sys, time
+sys.path[:0] = ['.', '../coletores']
+sem_limites = sys.argv[2] == '1'
+if sem_limites:
+    import transporte
+    # o limitador por host continua no caminho, só não segura o ritmo (o bench mede o código, não a cota)
+    transporte.LIMITES_POR_HOST = {h: (1e6, 1e6) for h in transporte.LIMITES_POR_HOST}
+    transporte.LIMITE_PADRAO = (1e6, 1e6)
+inicio = time.perf_counter()
+modulo = __import__(sys.argv[1])
+importado = time.perf_counter()
+modulo.main()
+fim = time.perf_counter()
+print("\\n@@bench " + json.dumps({"import": importado - inicio, "main": fim - importado,
+      "pico_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+"""
+
+
+def preparar_copia(destino):
+    """Cópia mínima do projeto: coletores, a limpeza, um auth.json falso e 1-coleta vazio."""
+    coletores = destino / "coletores"
+    coletores.mkdir(parents=True)
+    for padrao in ARQUIVOS_COLETORES:
+        for arquivo in SCRIPT_DIR.glob(padrao):
+            shutil.copy2(arquivo, coletores / arquivo.name)
+    (coletores / "auth.json").write_text(json.dumps(AUTH_FALSO), encoding="utf-8")
+    (destino / "2-limpeza").mkdir()
+    shutil.copy2(RAIZ / "2-limpeza" / "limpeza.py", destino / "2-limpeza" / "limpeza.py")
+    (destino / "1-coleta").mkdir()
+
+
+def rodar_etapa(destino, pasta, modulo, servidor, sem_limites, verbose):
+    env = dict(os.environ, COLETORES_BASES_URL=json.dumps(servidor.bases()), COLETORES_ETAPA=modulo, PYTHONDONTWRITEBYTECODE="1")
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, "-c", EXECUTOR, modulo, "1" if sem_limites else "0"],
+                              cwd=destino / pasta, env=env, capture_output=True, text=True)
+    total = time.perf_counter() - inicio
+    if verbose or processo.returncode != 0:
+        print(processo.stdout[-4000:], processo.stderr[-4000:], sep="\n")
+    medidas = next((json.loads(l[len("@@bench "):]) for l in processo.stdout.splitlines() if l.startswith("@@bench ")), None)
+    return processo.returncode, total, medidas
+
+
+def main(num_runs=NUM_RUNS, latencia_ms=0.0, erro_429_a_cada=0, max_pagina=None, com_limites=False, gravados=None, verbose=False):
+    cenario = Cenario(num_runs=num_runs)
+    servidor = ServidorMock(cenario, latencia=latencia_ms / 1000, erro_429_a_cada=erro_429_a_cada,
+                            max_pagina=max_pagina, gravados=gravados).iniciar()
+    linhas = []
+    try:
+        with tempfile.TemporaryDirectory() as pasta:
+            destino = Path(pasta)
+            preparar_copia(destino)
+            for nome, subpasta, modulo in ETAPAS:
+                servidor.zerar_contadores()
+                codigo, total, medidas = rodar_etapa(destino, subpasta, modulo, servidor, not com_limites, verbose)
+                contadores = servidor.contadores.values()
+                requisicoes = sum(c["requisicoes"] for c in contadores)
+                recebidos = sum(c["bytes"] for c in contadores)
+                erros_429 = sum(c["erros_429"] for c in contadores)
+                linhas.append((nome, codigo, total, medidas, requisicoes, recebidos, erros_429))
+            saidas = {p.name: sum(1 for _ in open(p, encoding="utf-8-sig")) - 1 for p in sorted((destino / "1-coleta").glob("*.csv"))}
+            final = destino / "2-limpeza" / "dados_analise_final.csv"
+            if final.exists():
+                saidas[final.name] = sum(1 for _ in open(final, encoding="utf-8-sig")) - 1
+            pasta_snapshots = destino / "1-coleta" / "snapshots"
+            historico = {nome: len(snapshots.tabela(nome, pasta=pasta_snapshots)) for nome in snapshots.plataformas(pasta_snapshots)}
+    finally:
+        servidor.parar()
+
+    print(f"\n{num_runs} runs sintéticas, latência {latencia_ms:g} ms, 429 a cada {erro_429_a_cada or '-'} requisições, "
+          f"limitador {'com' if com_limites else 'sem'} as taxas reais.")
+    print(f"{'etapa':<10} {'total (s)':>10} {'import (s)':>11} {'main (s)':>9} {'requisições':>12} {'KiB':>10} {'429':>5} {'pico (MiB)':>11}")
+    for nome, codigo, total, medidas, requisicoes, recebidos, erros_429 in linhas:
+        if medidas is None:
+            print(f"{nome:<10} {total:>10.2f}   ERRO (código {codigo})")
+            continue
+        print(f"{nome:<10} {total:>10.2f} {medidas['import']:>11.2f} {medidas['main']:>9.2f} {requisicoes:>12} "
+              f"{recebidos / 1024:>10.1f} {erros_429:>5} {medidas['pico_kib'] / 1024:>11.1f}")
+    print("Linhas geradas: " + ", ".join(f"{nome}={n}" for nome, n in saidas.items()))
+    print("Leituras no histórico de snapshots: " + (", ".join(f"{nome}={n}" for nome, n in historico.items()) or "nenhuma"))
+    return linhas
+
+
+def _opcao(nome, padrao, tipo):
+    return tipo(sys.argv[sys.argv.index(nome) + 1]) if nome in sys.argv else padrao
+
+
+if __name__ == "__main__":
+    main(num_runs=_opcao("--runs", NUM_RUNS, int), latencia_ms=_opcao("--latencia", 0.0, float),
+         erro_429_a_cada=_opcao("--429-a-cada", 0, int), max_pagina=_opcao("--max-pagina", None, int), com_limites="--com-limites" in sys.argv,
+         gravados=_opcao("--gravados", None, str), verbose="--verbose" in sys.argv)
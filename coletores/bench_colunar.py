@@ -0,0 +1,96 @@
+import os, sys, tempfile, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import colunar
+
+# Compara gravar/ler a tabela final da limpeza como CSV (com o pd.to_datetime que cada etapa
+# refaz na leitura) e no formato colunar de colunar.py, inteira, só duas colunas e uma coluna
+# mapeada direto do disco. uso: python bench_colunar.py [numero_de_linhas]
+NUM_LINHAS = 500_000
+REPETICOES = 3
+ESQUEMA = colunar.ESQUEMAS["dados_analise_final"]
+
+
+def tabela_sintetica(n, seed=5):
+    rng = np.random.default_rng(seed)
+    publicacao = pd.Timestamp("2022-03-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 3 * 365 * 86400, n), unit="s")
+    df = pd.DataFrame({"run_date": publicacao.tz_localize(None).normalize(),
+                       "run_player": [f"p{i}" for i in rng.integers(0, 3000, n)],
+                       "run_time_seconds": rng.uniform(3000, 9000, n).round(0),
+                       "video_link": [f"https://youtube.com/watch?v={i:011d}" for i in range(n)],
+                       "plataforma": rng.choice(["YouTube", "Twitch", "Bilibili"], n),
+                       "video_data_publicacao": publicacao})
+    for coluna, tipo in ESQUEMA.items():
+        if coluna in df:
+            continue
+        if tipo == "inteiro":
+            df[coluna] = rng.integers(-1, 100_000, n)
+        elif tipo == "real":
+            df[coluna] = rng.uniform(0, 100, n)
+        else:
+            df[coluna] = [f"UC{i}" for i in rng.integers(0, 3000, n)]
+    return df[list(ESQUEMA)]
+
+
+def ler_csv(caminho, colunas=None):
+    """Como as etapas leem hoje: read_csv e as datas convertidas de novo."""
+    df = pd.read_csv(caminho, usecols=colunas, encoding="utf-8-sig")
+    for coluna in ("run_date", "video_data_publicacao"):
+        if coluna in df:
+            df[coluna] = pd.to_datetime(df[coluna], errors="coerce", utc=coluna == "video_data_publicacao")
+    return df
+
+
+def cronometrar(funcao, *args, **kwargs):
+    melhor, resultado = float("inf"), None
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        resultado = funcao(*args, **kwargs)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def tamanho(caminho):
+    caminho = Path(caminho)
+    if caminho.is_dir():
+        return sum(f.stat().st_size for f in caminho.iterdir())
+    return caminho.stat().st_size
+
+
+def main(n=NUM_LINHAS):
+    df = tabela_sintetica(n)
+    projecao = ["video_views", "video_data_publicacao"]
+    with tempfile.TemporaryDirectory() as pasta:
+        csv = os.path.join(pasta, "dados_analise_final.csv")
+        colunas = colunar.caminho_colunar(csv)
+        t_csv_w, _ = cronometrar(df.to_csv, csv, index=False, encoding="utf-8-sig")
+        t_col_w, _ = cronometrar(colunar.salvar, df, colunas, ESQUEMA)
+        print(f"{n} linhas, {len(df.columns)} colunas. CSV: {tamanho(csv) / 2**20:.1f} MiB, "
+              f"colunar: {tamanho(colunas) / 2**20:.1f} MiB")
+        print(f"Gravar CSV:                       {t_csv_w * 1000:9.1f} ms")
+        print(f"Gravar colunar:                   {t_col_w * 1000:9.1f} ms")
+
+        t_csv, por_csv = cronometrar(ler_csv, csv)
+        t_col, por_col = cronometrar(colunar.ler, colunas)
+        print(f"Ler tudo, CSV + to_datetime:      {t_csv * 1000:9.1f} ms (video_views: {por_csv['video_views'].dtype})")
+        print(f"Ler tudo, colunar:                {t_col * 1000:9.1f} ms  {t_csv / t_col:.1f}x (video_views: {por_col['video_views'].dtype})")
+
+        t_csv_p, _ = cronometrar(ler_csv, csv, projecao)
+        t_col_p, _ = cronometrar(colunar.ler, colunas, projecao)
+        print(f"Ler 2 colunas, CSV (usecols):     {t_csv_p * 1000:9.1f} ms")
+        print(f"Ler 2 colunas, colunar:           {t_col_p * 1000:9.1f} ms  {t_csv_p / t_col_p:.1f}x")
+
+        t_soma, soma = cronometrar(lambda: int(colunar.ler_coluna(colunas, "video_views").sum()))
+        print(f"Somar video_views (memory-map):   {t_soma * 1000:9.1f} ms")
+
+        iguais = (soma == int(df["video_views"].sum())
+                  and por_col.drop(columns="video_data_publicacao").astype(object).equals(df.drop(columns="video_data_publicacao").astype(object))
+                  and (por_col["video_data_publicacao"] == df["video_data_publicacao"]).all())
+        print("Leitura colunar igual à tabela gravada." if iguais else "ATENÇÃO: a leitura colunar difere da tabela gravada!")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_LINHAS)
@@ -0,0 +1,91 @@
+import bisect, sys, time
+
+import numpy as np
+import pandas as pd
+
+import janelas
+
+# Compara o recorte das janelas antes/depois recorde a recorde (bisect nas listas de cada canal,
+# como os coletores faziam, e máscaras booleanas no DataFrame, como a limpeza do Bilibili fazia)
+# com janelas.py, que resolve todos os recordes de uma vez.
+# uso: python bench_janelas.py [numero_de_videos] [numero_de_recordes]
+NUM_VIDEOS = 2_000_000
+NUM_RECORDES = 5_000
+NUM_CANAIS = 2_000
+AMOSTRA_MASCARAS = 50 # o loop com máscaras é lento demais para todos os recordes; o tempo é extrapolado
+JANELA = 5 * 86400
+
+
+def dados_sinteticos(num_videos, num_recordes, seed=11):
+    rng = np.random.default_rng(seed)
+    inicio = pd.Timestamp("2020-01-01").value // 10**9
+    videos = pd.DataFrame({
+        "canal": rng.integers(0, NUM_CANAIS, num_videos),
+        "data": inicio + rng.integers(0, 4 * 365 * 86400, num_videos),
+        "views": rng.integers(0, 100_000, num_videos),
+        "likes": rng.integers(0, 5_000, num_videos),
+    }).sort_values(["canal", "data"], kind="stable", ignore_index=True)
+    videos["id"] = np.arange(num_videos)
+    # o vídeo do recorde é um dos vídeos do canal
+    recordes = videos.sample(num_recordes, random_state=seed)[["canal", "data", "id"]].reset_index(drop=True)
+    return videos, recordes
+
+
+def janelas_com_bisect(videos, recordes):
+    """Loop por recorde: os 2 últimos antes e os 2 primeiros depois, sem o próprio vídeo."""
+    por_canal = {canal: (g["data"].tolist(), g["id"].tolist(), g["views"].tolist()) for canal, g in videos.groupby("canal")}
+    resultado = []
+    for canal, data, video_id in recordes.itertuples(index=False):
+        datas, ids, views = por_canal[canal]
+        antes = [i for i in range(bisect.bisect_left(datas, data - JANELA), bisect.bisect_right(datas, data)) if ids[i] != video_id][-2:]
+        depois = [i for i in range(bisect.bisect_left(datas, data), bisect.bisect_right(datas, data + JANELA)) if ids[i] != video_id][:2]
+        resultado.append((sum(views[i] for i in antes), len(antes), sum(views[i] for i in depois), len(depois)))
+    return resultado
+
+
+def janelas_com_mascaras(videos, recordes):
+    """Loop por recorde com filtros booleanos no DataFrame inteiro (sem o corte nos 2 mais próximos)."""
+    resultado = []
+    for canal, data, video_id in recordes.itertuples(index=False):
+        do_canal = (videos["canal"] == canal) & (videos["id"] != video_id)
+        antes = videos[do_canal & (videos["data"] >= data - JANELA) & (videos["data"] <= data)]
+        depois = videos[do_canal & (videos["data"] >= data) & (videos["data"] <= data + JANELA)]
+        resultado.append((antes["views"].sum(), len(antes), depois["views"].sum(), len(depois)))
+    return resultado
+
+
+def janelas_vetorizadas(videos, recordes):
+    indice = janelas.IndiceJanelas(videos, canal="canal", data="data")
+    canais, momentos = recordes["canal"].to_numpy(), recordes["data"].to_numpy(dtype=np.float64)
+    proprio = indice.posicoes(recordes["id"], "id")
+    antes = indice.mais_proximos(*indice.limites(canais, momentos - JANELA, momentos), 2, "fim", proprio)
+    depois = indice.mais_proximos(*indice.limites(canais, momentos, momentos + JANELA), 2, "inicio", proprio)
+    resumo = janelas.resumo_antes_depois(indice, antes + (proprio,), depois + (proprio,), {"views": "Views"})
+    return list(resumo[["Views_Antes", "NumVideos_Antes", "Views_Depois", "NumVideos_Depois"]].itertuples(index=False, name=None))
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main(num_videos=NUM_VIDEOS, num_recordes=NUM_RECORDES):
+    videos, recordes = dados_sinteticos(num_videos, num_recordes)
+    print(f"{num_videos} vídeos em {NUM_CANAIS} canais, {num_recordes} recordes.")
+
+    t_bisect, por_bisect = cronometrar(janelas_com_bisect, videos, recordes)
+    t_vetor, por_vetor = cronometrar(janelas_vetorizadas, videos, recordes)
+    amostra = recordes.head(AMOSTRA_MASCARAS)
+    t_mascaras, _ = cronometrar(janelas_com_mascaras, videos, amostra)
+    t_mascaras *= num_recordes / len(amostra)
+
+    print(f"Máscaras por recorde (estimado): {t_mascaras * 1000:10.1f} ms")
+    print(f"bisect por recorde:              {t_bisect * 1000:10.1f} ms")
+    print(f"janelas.py (todos de uma vez):   {t_vetor * 1000:10.1f} ms  {t_bisect / t_vetor:.1f}x sobre o bisect")
+    print("Resultados idênticos." if [tuple(map(int, r)) for r in por_vetor] == por_bisect else "ATENÇÃO: os resultados diferem!")
+
+
+if __name__ == "__main__":
+    argumentos = [int(a) for a in sys.argv[1:3]]
+    main(*argumentos)
@@ -0,0 +1,75 @@
+import contextlib, io, random, sys, time
+from datetime import date, timedelta
+
+import speedrun
+import progressao
+
+# Compara o loop de analisar_progressao_recorde (um valor por vez) com o cálculo agrupado de
+# progressao.py em runs sintéticas. Uso: python bench_progressao.py [numero_de_runs]
+# Com os 7 valores daqui, o agrupado completo fica no mesmo tempo do loop: montar a tabela (ler
+# tempo e valores de cada RunCompacta) domina. O ganho está no cálculo com a tabela montada, e o
+# loop cresce com o número de valores (uma passada pelas runs por valor) enquanto a montagem não.
+NUM_RUNS = 100_000
+REPETICOES = 3
+VARIAVEIS = {
+    "subcat": ("Any% - Subcategories", {"gl": "Glitchless", "gd": "Glitched", "nz": "No Zip", "rb": "Restricted"}),
+    "plat": ("Platform Group", {"pc": "PC", "con": "Console", "emu": "Emulator"}),
+}
+
+
+def runs_sinteticas(n, seed=42):
+    random.seed(seed)
+    inicio = date(2022, 2, 25)
+    runs = []
+    for i in range(n):
+        valores = {var_id: random.choice(list(vals)) for var_id, (_, vals) in VARIAVEIS.items()}
+        if i % 17 == 0:
+            valores.pop("plat") # runs antigas sem a variável de plataforma
+        # tempos que caem devagar com ruído, para existirem recordes ao longo de todo o período
+        tempo = 9000 * (1 - 0.5 * i / n) * random.uniform(0.9, 1.4)
+        runs.append(speedrun.RunCompacta(
+            f"r{i}", (inicio + timedelta(days=i * 1000 // n)).isoformat(), round(tempo, 3),
+            f"p{i % 2000}", f"Runner{i % 2000}", f"https://www.speedrun.com/run/r{i}", f"https://youtu.be/v{i}", valores
+        ))
+    return runs
+
+
+def progressoes_com_loop(runs):
+    """O caminho antigo: filtra as runs de cada valor e percorre cada lista com o loop Python."""
+    linhas = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for var_id, (nome, valores) in VARIAVEIS.items():
+            for valor_id, label in valores.items():
+                filtradas = [run for run in runs if run.values.get(var_id) == valor_id]
+                for registro in speedrun.analisar_progressao_recorde(filtradas, label):
+                    linhas.append({"variavel": nome, "valor": label, **registro})
+    return linhas
+
+
+def cronometrar(funcao, *args):
+    melhor, resultado = float("inf"), None
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def main(n=NUM_RUNS):
+    runs = runs_sinteticas(n)
+    print(f"{n} runs sintéticas, {sum(len(v) for _, v in VARIAVEIS.values())} valores em {len(VARIAVEIS)} variáveis.")
+
+    t_loop, linhas_loop = cronometrar(progressoes_com_loop, runs)
+    t_df, df_vet = cronometrar(progressao.progressoes_subcategorias, runs, VARIAVEIS)
+    t_so_calculo, _ = cronometrar(progressao.indices_recordes, progressao.tabela_de_runs(runs, list(VARIAVEIS)), VARIAVEIS)
+
+    chave = lambda linha: tuple(linha[campo] for campo in progressao.PROGRESSAO_FIELDS)
+    iguais = sorted(map(chave, linhas_loop)) == sorted(map(chave, df_vet.to_dict("records")))
+    print(f"Loop por valor:                {t_loop * 1000:8.1f} ms ({len(linhas_loop)} recordes)")
+    print(f"Agrupado (com montagem):       {t_df * 1000:8.1f} ms ({len(df_vet)} recordes)  {t_loop / t_df:.1f}x")
+    print(f"Agrupado (tabela já montada):  {t_so_calculo * 1000:8.1f} ms  {t_loop / t_so_calculo:.1f}x")
+    print("Resultados idênticos." if iguais else "ATENÇÃO: os resultados diferem!")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RUNS)
@@ -0,0 +1,106 @@
+import sys, tempfile, time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import snapshots
+
+# Simula uma coleta diária de views/likes de milhares de vídeos e compara guardar cada leitura
+# como um CSV por dia (o que se teria copiando o youtube_stats.csv a cada execução, só com as
+# colunas de contadores) com o histórico de snapshots.py: espaço em disco, ler um intervalo de
+# datas, a curva de um vídeo e as views por dia de todos os vídeos.
+# uso: python bench_snapshots.py [videos] [dias]
+NUM_VIDEOS = 5_000
+NUM_DIAS = 90
+REPETICOES = 3
+
+
+def leituras_sinteticas(num_videos, num_dias, seed=3):
+    """Um DataFrame por dia: video_id, momento, views, likes, com vídeos entrando ao longo do período."""
+    rng = np.random.default_rng(seed)
+    ids = np.array([f"{i:011d}" for i in range(num_videos)], dtype=object)
+    estreia = rng.integers(0, num_dias, num_videos)
+    ritmo = rng.lognormal(5, 1.5, num_videos) # views por dia de cada vídeo
+    views = rng.integers(0, 10_000, num_videos).astype(np.int64)
+    inicio = pd.Timestamp("2025-01-01", tz="UTC").timestamp()
+    for dia in range(num_dias):
+        views += rng.poisson(ritmo)
+        ativos = estreia <= dia
+        momento = int(inicio + dia * 86400 + rng.integers(0, 1800)) # a coleta não começa sempre no mesmo segundo
+        yield pd.DataFrame({"video_id": ids[ativos], "momento": momento, "views": views[ativos], "likes": views[ativos] // 30})
+
+
+def cronometrar(funcao, *args, **kwargs):
+    melhor, resultado = float("inf"), None
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        resultado = funcao(*args, **kwargs)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def ler_csvs(pasta):
+    return pd.concat([pd.read_csv(p, dtype={"video_id": str}) for p in sorted(Path(pasta).glob("*.csv"))], ignore_index=True)
+
+
+def taxas_csv(pasta, desde, ate):
+    df = ler_csvs(pasta)
+    df = df[(df["momento"] >= desde) & (df["momento"] <= ate)].sort_values(["video_id", "momento"])
+    g = df.groupby("video_id")
+    primeira, ultima = g.first(), g.last()
+    dias = (ultima["momento"] - primeira["momento"]) / 86400
+    return ((ultima["views"] - primeira["views"]) / dias.where(dias > 0)).rename("views_por_dia")
+
+
+def main(num_videos=NUM_VIDEOS, num_dias=NUM_DIAS):
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta_csv, pasta_snapshots = Path(pasta) / "csv", Path(pasta) / "snapshots"
+        pasta_csv.mkdir()
+        t_csv_w = t_snap_w = 0.0
+        registros = 0
+        for dia, leitura in enumerate(leituras_sinteticas(num_videos, num_dias)):
+            inicio = time.perf_counter()
+            leitura.to_csv(pasta_csv / f"dia_{dia:04d}.csv", index=False)
+            t_csv_w += time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            snapshots.registrar("youtube", leitura["video_id"], leitura["views"], leitura["likes"],
+                                momento=int(leitura["momento"].iloc[0]), pasta=pasta_snapshots)
+            t_snap_w += time.perf_counter() - inicio
+            registros += len(leitura)
+        t_compactar, _ = cronometrar(snapshots.compactar, "youtube", pasta=pasta_snapshots)
+
+        tamanho_csv = sum(p.stat().st_size for p in pasta_csv.iterdir())
+        tamanho_snap = snapshots.tamanho_em_disco("youtube", pasta=pasta_snapshots)
+        print(f"{num_videos} vídeos, {num_dias} coletas diárias, {registros} leituras.")
+        print(f"Disco, um CSV por dia:            {tamanho_csv / 2**20:9.2f} MiB ({tamanho_csv / registros:.1f} bytes/leitura)")
+        print(f"Disco, snapshots compactados:     {tamanho_snap / 2**20:9.2f} MiB ({tamanho_snap / registros:.1f} bytes/leitura)  "
+              f"{tamanho_csv / tamanho_snap:.1f}x menor")
+        print(f"Gravar, CSVs (todas as coletas):  {t_csv_w * 1000:9.1f} ms")
+        print(f"Gravar, registrar() por coleta:   {t_snap_w * 1000:9.1f} ms (+ {t_compactar * 1000:.1f} ms para compactar)")
+
+        meio = pd.Timestamp("2025-01-01", tz="UTC").timestamp() + num_dias // 2 * 86400
+        desde, ate = int(meio - 7 * 86400), int(meio)
+        t_csv, por_csv = cronometrar(lambda: (lambda df: df[(df["momento"] >= desde) & (df["momento"] <= ate)])(ler_csvs(pasta_csv)))
+        t_snap, por_snap = cronometrar(snapshots.tabela, "youtube", desde, ate, pasta=pasta_snapshots)
+        print(f"Intervalo de 7 dias, CSVs:        {t_csv * 1000:9.1f} ms ({len(por_csv)} leituras)")
+        print(f"Intervalo de 7 dias, snapshots:   {t_snap * 1000:9.1f} ms ({len(por_snap)} leituras)  {t_csv / t_snap:.1f}x")
+
+        video = f"{num_videos // 2:011d}"
+        t_csv, _ = cronometrar(lambda: (lambda df: df[df["video_id"] == video])(ler_csvs(pasta_csv)))
+        t_snap, curva = cronometrar(snapshots.serie, "youtube", video, pasta=pasta_snapshots)
+        print(f"Curva de um vídeo, CSVs:          {t_csv * 1000:9.1f} ms")
+        print(f"Curva de um vídeo, snapshots:     {t_snap * 1000:9.1f} ms ({len(curva)} leituras)  {t_csv / t_snap:.1f}x")
+
+        t_csv, taxa_csv = cronometrar(taxas_csv, pasta_csv, desde, ate)
+        t_snap, taxa_snap = cronometrar(snapshots.taxas, "youtube", desde, ate, pasta=pasta_snapshots)
+        print(f"Views/dia de todos, CSVs:         {t_csv * 1000:9.1f} ms")
+        print(f"Views/dia de todos, snapshots:    {t_snap * 1000:9.1f} ms  {t_csv / t_snap:.1f}x")
+
+        comparacao = taxa_snap.set_index("video_id")["views_por_dia"].sort_index()
+        iguais = len(por_csv) == len(por_snap) and np.allclose(comparacao, taxa_csv.sort_index().loc[comparacao.index], equal_nan=True)
+        print("Snapshots iguais aos CSVs." if iguais else "ATENÇÃO: os snapshots diferem dos CSVs!")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
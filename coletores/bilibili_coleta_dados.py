@@ -1,107 +1,264 @@
-import requests, json, time, os
+import requests, json, time, os, re, bisect, hashlib
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+import transporte
+import cache_http
+import colunar
+import snapshots
 
 output_dir = "../1-coleta"
-os.makedirs(output_dir, exist_ok=True)
 output_file = os.path.join(output_dir, "bilibili_stats.csv")
+speedrun_file = os.path.join(output_dir, "speedrun_stats.csv")
+espacos_cache_dir = os.path.join(".cache", "bilibili_space") # listagem de vídeos por uploader (mid)
+USAR_CACHE_HTTP = True # reaproveita respostas guardadas em disco (ver cache_http.py)
+GRAVAR_SNAPSHOTS = True # acrescenta views/likes lidos ao histórico de snapshots.py
+MAX_WORKERS = 4 # requisições simultâneas; o ritmo por host continua sendo o do transporte
+VIZINHOS = 2 # vídeos antes e depois de cada recorde
+# o uploader dos recordes dificilmente posta 2 vídeos em 5 dias, então a janela aqui é maior que nas outras plataformas
+JANELA_DIAS = 30
+BVID_RE = re.compile(r'BV[0-9A-Za-z]{10}')
 
 # carrega os headers para evitar o erro http 412 (so montar o user agent)
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
 }
 
-    
-def get_bilibili_stats(bvid_video, contexto):
+# bvid é tipo o id do video no bilibili
+bvid_videos_record = ["BV1ooXWYiEr2", "BV1ZNBBYBEEn"]
+
+
+def ler_view(bvid_video): # (JSON do endpoint 'view' ou None em erro de conexão, momento em que foi lido na API)
     api_url = f"https://api.bilibili.com/x/web-interface/view?bvid={bvid_video}"
+    try:
+        response = transporte.get(api_url, headers=headers, cache=USAR_CACHE_HTTP)
+        response.raise_for_status()
+        return response.json(), cache_http.momento_da_resposta(response)
+    except requests.exceptions.RequestException as e:
+        print(f"Erro de conexão: {e}")
+        return None, None
+
+
+def buscar_view(bvid_video): # devolve o JSON do endpoint 'view' ou None em erro de conexão
+    return ler_view(bvid_video)[0]
+
+
+def formatar_stats(bvid_video, contexto, dados):
+    if dados is None:
+        return None
+
+    if dados.get("code") == 62002:
+        print(f"Vídeo {bvid_video} invisível/privado (62002)")
+        return {
+            "bvid": bvid_video,
+            "context_video": contexto,
+            "erro": "invisivel_62002"
+        }
+
+    if dados.get("code") == 0 and "stat" in dados["data"]:
+        dados = dados.get("data")
+        criador = dados["owner"].get("mid")
+        link = f"https://space.bilibili.com/{criador}"
+        return {
+            "bvid": dados.get("bvid"),
+            "context_video": contexto,
+            "title": dados.get("title"),
+            "name_streamer": dados["owner"].get("name"),
+            "link_channel": link,
+            "data_publicacao": time.strftime('%Y-%m-%d', time.localtime(dados.get("pubdate"))),
+            "views": dados["stat"].get("view"),
+            "likes": dados["stat"].get("like"),
+            "danmaku": dados["stat"].get("danmaku"),
+            "coins": dados["stat"].get("coin"),
+            "shares": dados["stat"].get("share"),
+            "favorites": dados["stat"].get("favorite"),
+            "comments": dados["stat"].get("reply")
+        }
+
+    elif dados.get("code") != 0:
+        print(f"Erro na API Bilibili (código {dados.get('code')}): {dados.get('message')}")
+        return None
+
+    else:
+        print("Estrutura não é JSON compatível")
+        return None
+
+
+def get_bilibili_stats(bvid_video, contexto):
+    return formatar_stats(bvid_video, contexto, buscar_view(bvid_video))
 
+
+# --- ASSINATURA WBI ---
+# a listagem do espaço do uploader só responde com os parâmetros assinados (w_rid/wts)
+MIXIN_KEY_ENC_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52
+]
+_chave_wbi = {}
+
+def obter_chave_wbi(): # as chaves mudam no máximo uma vez por dia, então uma busca por execução basta
+    if "mixin" not in _chave_wbi:
+        response = transporte.get("https://api.bilibili.com/x/web-interface/nav", headers=headers)
+        response.raise_for_status()
+        wbi_img = response.json()["data"]["wbi_img"]
+        original = "".join(url.rsplit("/", 1)[1].split(".")[0] for url in (wbi_img["img_url"], wbi_img["sub_url"]))
+        _chave_wbi["mixin"] = "".join(original[i] for i in MIXIN_KEY_ENC_TAB)[:32]
+    return _chave_wbi["mixin"]
+
+def assinar_wbi(params):
+    params = dict(params, wts=int(time.time()))
+    params = {k: "".join(c for c in str(v) if c not in "!'()*") for k, v in sorted(params.items())}
+    query = urlencode(params)
+    params["w_rid"] = hashlib.md5((query + obter_chave_wbi()).encode()).hexdigest()
+    return params
+
+
+# --- ÍNDICE DE VÍDEOS POR UPLOADER ---
+# A listagem vem do mais novo para o mais antigo. Guardamos [data, bvid] em ordem crescente junto
+# com o intervalo [completo_desde, atualizado_em] em que o índice está completo, igual ao índice de
+# VODs da twitch, e só paginamos o que falta para cobrir as janelas pedidas.
+indices_espacos = {}
+
+def _caminho_indice(mid):
+    return os.path.join(espacos_cache_dir, f"{mid}.json")
+
+def _carregar_indice(mid):
+    if mid in indices_espacos:
+        return indices_espacos[mid]
     try:
-        response = requests.get(api_url, headers=headers)
+        with open(_caminho_indice(mid), "r", encoding="utf-8") as f:
+            indice = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        indice = {"mid": mid, "datas": [], "bvids": [], "atualizado_em": 0, "completo_desde": None}
+    indices_espacos[mid] = indice
+    return indice
+
+def _salvar_indice(indice):
+    os.makedirs(espacos_cache_dir, exist_ok=True)
+    temporario = _caminho_indice(indice["mid"]) + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(indice, f)
+    os.replace(temporario, _caminho_indice(indice["mid"]))
+
+def obter_indice_espaco(mid, desde, ate):
+    """Garante que o índice do uploader cubra [desde, ate] (timestamps unix) e o devolve."""
+    indice = _carregar_indice(mid)
+    cobre_antigo = indice["completo_desde"] is not None and indice["completo_desde"] <= desde
+    if cobre_antigo and indice["atualizado_em"] >= ate:
+        return indice
+
+    agora = int(time.time())
+    conhecidos = set(indice["bvids"])
+    novos, pagina_num, mais_antigo, chegou_no_fim, reencontrou = [], 1, None, False, False
+    while True:
+        params = assinar_wbi({"mid": mid, "pn": pagina_num, "ps": 50, "order": "pubdate"})
+        response = transporte.get("https://api.bilibili.com/x/space/wbi/arc/search", headers=headers, params=params)
         response.raise_for_status()
         dados = response.json()
+        if dados.get("code") != 0:
+            print(f"Erro ao listar vídeos do uploader {mid} (código {dados.get('code')}): {dados.get('message')}")
+            return indice
+        videos = dados["data"]["list"]["vlist"]
+        for video in videos:
+            if video["bvid"] in conhecidos:
+                reencontrou = True
+            else:
+                novos.append((video["created"], video["bvid"]))
+        if videos:
+            mais_antigo = min(mais_antigo or videos[-1]["created"], videos[-1]["created"])
+        pagina = dados["data"]["page"]
+        if not videos or pagina["pn"] * pagina["ps"] >= pagina["count"]:
+            chegou_no_fim = True
+            break
+        if (reencontrou and cobre_antigo) or mais_antigo < desde:
+            break # o resto já está indexado ou é mais antigo que as janelas
+        pagina_num += 1
 
-        if dados.get("code") == 62002:
-            print(f"Vídeo {bvid_video} invisível/privado (62002)")
-            return {
-                "bvid": bvid_video,
-                "context_video": contexto,
-                "erro": "invisivel_62002"
-            }
-
-        if dados.get("code") == 0 and "stat" in dados["data"]:
-            dados = dados.get("data")
-            criador = dados["owner"].get("mid")
-            link = f"https://space.bilibili.com/{criador}"
-            return {
-                "bvid": dados.get("bvid"),
-                "context_video": contexto,
-                "title": dados.get("title"),
-                "name_streamer": dados["owner"].get("name"),
-                "link_channel": link,
-                "data_publicacao": time.strftime('%Y-%m-%d', time.localtime(dados.get("pubdate"))),
-                "views": dados["stat"].get("view"),
-                "likes": dados["stat"].get("like"),
-                "danmaku": dados["stat"].get("danmaku"),
-                "coins": dados["stat"].get("coin"),
-                "shares": dados["stat"].get("share"),
-                "favorites": dados["stat"].get("favorite"),
-                "comments": dados["stat"].get("reply")
-            }
-
-        elif dados.get("code") != 0:
-            print(f"Erro na API Bilibili (código {dados.get('code')}): {dados.get('message')}")
-            return None
-
-        else:
-            print("Estrutura não é JSON compatível")
-            return None
+    if chegou_no_fim:
+        indice["completo_desde"] = 0
+    elif not (reencontrou and cobre_antigo):
+        indice["completo_desde"] = mais_antigo
+    todos = sorted(set(zip(indice["datas"], indice["bvids"])) | set(novos))
+    indice.update(datas=[d for d, _ in todos], bvids=[b for _, b in todos], atualizado_em=agora)
+    _salvar_indice(indice)
+    return indice
 
-    except requests.exceptions.RequestException as e:
-        print(f"Erro de conexão: {e}")
-        return None
+def vizinhos_do_recorde(indice, pubdate, bvid_recorde, janela_dias=JANELA_DIAS, quantidade=VIZINHOS):
+    """Os 'quantidade' vídeos mais próximos antes e depois do recorde, dentro de ±janela_dias."""
+    janela = janela_dias * 24 * 3600
+    inicio = bisect.bisect_left(indice["datas"], pubdate - janela)
+    meio_esq = bisect.bisect_left(indice["datas"], pubdate)
+    meio_dir = bisect.bisect_right(indice["datas"], pubdate)
+    fim = bisect.bisect_right(indice["datas"], pubdate + janela)
+    antes = [b for b in indice["bvids"][inicio:meio_esq] if b != bvid_recorde][-quantidade:]
+    depois = [b for b in indice["bvids"][meio_dir:fim] if b != bvid_recorde][:quantidade]
+    return antes, depois
+
+def recordes_do_speedrun(caminho=speedrun_file): # bvids de recordes citados em speedrun_stats.csv
+    if not os.path.exists(caminho):
+        return []
+    links = pd.read_csv(caminho)["video_link"].dropna().astype(str)
+    return [m.group(0) for m in links.map(BVID_RE.search) if m and "bilibili" in m.string]
 
 
-def main():
+def main(entrada=speedrun_file, saida=output_file, recordes_extras=None):
     """
-    Define os BVIDs, mapeia o contexto (recorde/antes/depois), coleta os dados
-    e salva o resultado em um arquivo CSV.
+    Parte dos BVIDs de recorde, descobre os vídeos antes/depois de cada um pela listagem do
+    uploader, coleta os dados de todos em paralelo e salva o resultado em um arquivo CSV.
+    'recordes_extras' são BVIDs que não aparecem no CSV de entrada (por padrão, bvid_videos_record).
     """
-    # bvid é tipo o id do video no bilibili
-    bvid_videos_record = ["BV1ooXWYiEr2", "BV1ZNBBYBEEn"]
-    # videos base antes-depois de BV1ZNBBYBEEn
-    bvid_videos_antes_BEEn = ["BV1V9DxY8EEM","BV1Sr1tYmE6i"]
-    bvid_videos_depois_BEEn = ["BV1NTi1YYE8D","BV1cLqkYWEdH"]
-    # videos base antes-depois de BV1ooXWYiEr2
-    bvid_videos_antes_iEr2 = ["BV1bw9wYZEkG", "BV1YAP4ehEie"]
-    bvid_videos_depois_iEr2 = ["BV17ufPY8ERN", "BV18z5bzJEsH"]
-
-    bvid_contexto = {}
-
-    # define o contexto de acordo com o bvid
-    for bvid in bvid_videos_record:
-        bvid_contexto[bvid] = "recorde"
-
-    for bvid in bvid_videos_antes_BEEn + bvid_videos_antes_iEr2:
-        bvid_contexto[bvid] = "antes_recorde"
-
-    for bvid in bvid_videos_depois_BEEn + bvid_videos_depois_iEr2:
-        bvid_contexto[bvid] = "depois_recorde"
-
-    todos_bvid = list(bvid_contexto)
-    dados_json = []
-
-    # faz as coletas dos dados
-    for bvid in todos_bvid:
-        contexto = bvid_contexto[bvid]
-        dados = get_bilibili_stats(bvid, contexto)
-        if dados:
-            dados_json.append(dados)
-        time.sleep(1)
+    extras = bvid_videos_record if recordes_extras is None else list(recordes_extras)
+    recordes = list(dict.fromkeys(extras + recordes_do_speedrun(entrada)))
+    if not recordes:
+        print(f"Nenhum recorde do bilibili em {entrada}.")
+        return
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        # etapa 1: dados dos recordes (de onde saem o uploader e a data de publicação)
+        leituras = dict(zip(recordes, pool.map(ler_view, recordes)))
+        views_recordes = {bvid: dados for bvid, (dados, _) in leituras.items()}
+        por_uploader = {}
+        for bvid, dados in views_recordes.items():
+            if dados and dados.get("code") == 0:
+                por_uploader.setdefault(dados["data"]["owner"]["mid"], []).append((bvid, dados["data"]["pubdate"]))
+
+        # etapa 2: uma listagem (em cache) por uploader cobrindo as janelas de todos os recordes dele
+        janela = JANELA_DIAS * 24 * 3600
+        def vizinhos_do_uploader(item):
+            mid, recs = item
+            indice = obter_indice_espaco(mid, min(p for _, p in recs) - janela, max(p for _, p in recs) + janela)
+            return [(bvid, vizinhos_do_recorde(indice, pubdate, bvid)) for bvid, pubdate in recs]
+
+        bvid_contexto = {}
+        for vizinhos in pool.map(vizinhos_do_uploader, por_uploader.items()):
+            for bvid, (antes, depois) in vizinhos:
+                bvid_contexto.update({b: "antes_recorde" for b in antes})
+                bvid_contexto.update({b: "depois_recorde" for b in depois})
+        bvid_contexto.update({bvid: "recorde" for bvid in recordes}) # recorde tem prioridade sobre vizinho
+
+        # etapa 3: dados dos vizinhos em paralelo
+        faltantes = [b for b in bvid_contexto if b not in views_recordes]
+        leituras.update(zip(faltantes, pool.map(ler_view, faltantes)))
+        views = {bvid: dados for bvid, (dados, _) in leituras.items()}
+
+    ordem = {"recorde": 0, "antes_recorde": 1, "depois_recorde": 2}
+    todos_bvid = sorted(bvid_contexto, key=lambda b: ordem[bvid_contexto[b]])
+    linhas = [(b, d) for b, d in ((b, formatar_stats(b, bvid_contexto[b], views[b])) for b in todos_bvid) if d]
+    dados_json = [d for _, d in linhas]
+    print(f"{len(recordes)} recordes e {len(todos_bvid) - len(recordes)} vídeos vizinhos coletados.")
+    com_stats = [(b, d) for b, d in linhas if "erro" not in d] # vídeos invisíveis (62002) vêm sem views e ficam de fora
+    if GRAVAR_SNAPSHOTS and com_stats:
+        # leituras vindas do cache HTTP entram com o momento em que foram feitas
+        snapshots.registrar("bilibili", [d["bvid"] for _, d in com_stats], [d["views"] for _, d in com_stats], [d["likes"] for _, d in com_stats],
+                            momento=[leituras[b][1] for b, _ in com_stats])
 
     # salva no csv e termina
     if dados_json:
         df = pd.DataFrame(dados_json)
-        df.to_csv(output_file, index=False, encoding='utf-8')
+        colunar.salvar_com_csv(df, saida, encoding='utf-8')
 
 # se chamar direto pelo script.py executa como main
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,167 @@
+import json, re, sqlite3, threading, time
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# --- Configuração ---
+CACHE_FILE = Path(__file__).resolve().parent / ".cache" / "http.sqlite"
+LIMITE_BYTES = 256 * 1024 * 1024 # acima disso as respostas menos usadas recentemente são descartadas
+VERIFICAR_LIMITE_A_CADA = 50 # gravações entre duas verificações de tamanho
+PARAMETROS_IGNORADOS = {"key"} # não entram na chave (ex.: a chave da API do YouTube)
+
+# validade (segundos) por endpoint; a primeira expressão que casar com a URL vale.
+# URLs que não casam com nenhuma não são guardadas.
+TTL_POR_ENDPOINT = [
+    (r"speedrun\.com/api/v1/(games|categories)", 7 * 24 * 3600), # jogo, categorias e variáveis quase nunca mudam
+    (r"speedrun\.com/api/v1/runs", 3600),
+    (r"api\.twitch\.tv/helix/videos\?.*user_id=", 600), # listagem de VODs do streamer
+    (r"api\.twitch\.tv/helix/(videos|users)", 3600),
+    (r"api\.bilibili\.com/x/web-interface/view", 12 * 3600), # estatísticas: uma coleta por dia continua pegando números novos
+    (r"youtube/v3/videos", 12 * 3600),
+    (r"youtube/v3/channels", 24 * 3600),
+    (r"youtube/v3/playlistItems", 3600),
+]
+
+
+def _codigo_zero(corpo):
+    try:
+        return json.loads(corpo).get("code") == 0
+    except (ValueError, AttributeError):
+        return False
+
+
+# respostas 200 que só são guardadas se o corpo passar na verificação; a primeira expressão que
+# casar com a URL vale. O Bilibili responde bloqueio e controle de risco (-412, -352) com HTTP 200
+# e 'code' diferente de 0, e isso não pode ficar no cache durante a validade do endpoint.
+VALIDAR_POR_ENDPOINT = [
+    (r"api\.bilibili\.com/", _codigo_zero),
+]
+
+_local = threading.local()
+_gravacoes = 0
+_gravacoes_lock = threading.Lock()
+
+
+def _conexao():
+    if not hasattr(_local, "conexao"):
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        conexao = sqlite3.connect(CACHE_FILE, timeout=30)
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("""CREATE TABLE IF NOT EXISTS respostas (
+            chave TEXT PRIMARY KEY, status INTEGER, headers TEXT, corpo BLOB,
+            etag TEXT, last_modified TEXT, gravado_em REAL, acessado_em REAL, tamanho INTEGER)""")
+        conexao.execute("CREATE INDEX IF NOT EXISTS idx_acessado_em ON respostas (acessado_em)")
+        _local.conexao = conexao
+    return _local.conexao
+
+
+def chave_normalizada(url, params=None):
+    """URL final (com params) com host em minúsculas e query ordenada, sem os PARAMETROS_IGNORADOS."""
+    if params:
+        url = requests.Request("GET", url, params=params).prepare().url
+    partes = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True) if k not in PARAMETROS_IGNORADOS)
+    return urlunsplit((partes.scheme.lower(), partes.netloc.lower(), partes.path, urlencode(query), ""))
+
+
+def ttl_para(chave):
+    for padrao, ttl in TTL_POR_ENDPOINT:
+        if re.search(padrao, chave):
+            return ttl
+    return None
+
+
+def buscar(chave):
+    linha = _conexao().execute(
+        "SELECT status, headers, corpo, etag, last_modified, gravado_em FROM respostas WHERE chave = ?", (chave,)
+    ).fetchone()
+    if not linha:
+        return None
+    with _conexao() as conexao:
+        conexao.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (time.time(), chave))
+    status, headers, corpo, etag, last_modified, gravado_em = linha
+    return {"status": status, "headers": json.loads(headers), "corpo": corpo,
+            "etag": etag, "last_modified": last_modified, "gravado_em": gravado_em}
+
+
+def fresco(registro, chave):
+    ttl = ttl_para(chave)
+    return ttl is not None and time.time() - registro["gravado_em"] < ttl
+
+
+def guardavel(chave, corpo):
+    for padrao, valido in VALIDAR_POR_ENDPOINT:
+        if re.search(padrao, chave):
+            return valido(corpo)
+    return True
+
+
+def gravar(chave, status, headers, corpo): # corpos recusados por VALIDAR_POR_ENDPOINT não são guardados
+    global _gravacoes
+    if not guardavel(chave, corpo):
+        return
+    agora = time.time()
+    headers = dict(headers)
+    with _conexao() as conexao:
+        conexao.execute(
+            "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (chave, status, json.dumps(headers), corpo, headers.get("ETag") or headers.get("etag"),
+             headers.get("Last-Modified") or headers.get("last-modified"), agora, agora, len(corpo)),
+        )
+    with _gravacoes_lock:
+        _gravacoes += 1
+        verificar = _gravacoes % VERIFICAR_LIMITE_A_CADA == 0
+    if verificar:
+        limitar_tamanho()
+
+
+def renovar(chave): # resposta 304: o conteúdo guardado continua válido; devolve o novo gravado_em
+    agora = time.time()
+    with _conexao() as conexao:
+        conexao.execute("UPDATE respostas SET gravado_em = ?, acessado_em = ? WHERE chave = ?", (agora, agora, chave))
+    return agora
+
+
+def headers_condicionais(registro):
+    headers = {}
+    if registro.get("etag"):
+        headers["If-None-Match"] = registro["etag"]
+    if registro.get("last_modified"):
+        headers["If-Modified-Since"] = registro["last_modified"]
+    return headers
+
+
+def limitar_tamanho(limite=LIMITE_BYTES):
+    """Descarta as respostas acessadas há mais tempo até o cache ficar abaixo de 90% do limite."""
+    conexao = _conexao()
+    total = conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+    if total <= limite:
+        return 0
+    alvo, removidas = total - int(limite * 0.9), 0
+    with conexao:
+        for chave, tamanho in conexao.execute("SELECT chave, tamanho FROM respostas ORDER BY acessado_em").fetchall():
+            if alvo <= 0:
+                break
+            conexao.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+            alvo -= tamanho
+            removidas += 1
+    return removidas
+
+
+def resposta_de(registro, url):
+    """Monta um requests.Response a partir do registro guardado, para quem chama não notar diferença."""
+    response = requests.Response()
+    response.status_code = registro["status"]
+    response.headers = CaseInsensitiveDict(registro["headers"])
+    response._content = registro["corpo"]
+    response.url = url
+    response.encoding = "utf-8"
+    response.gravado_em = registro["gravado_em"]
+    return response
+
+
+def momento_da_resposta(response):
+    """Quando o conteúdo da resposta foi lido no servidor: o gravado_em se veio do cache, agora se veio da rede."""
+    return getattr(response, "gravado_em", None) or time.time()
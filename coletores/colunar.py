@@ -0,0 +1,278 @@
+import json, os, shutil, sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Formato colunar tipado entre as etapas (1-coleta -> 2-limpeza -> 3-EDA -> 4-IA).
+# Cada tabela é uma pasta "<nome>.colunas/" com um .npy por coluna e um schema.json com o tipo de
+# cada uma. Ler não reinterpreta texto: inteiros voltam inteiros (não 1118.0), datas voltam
+# datas, e cada coluna numérica pode ser aberta com memory-map, só a parte que for usada é lida
+# do disco. O CSV continua existindo para quem quiser abrir no Excel: exportar_csv() o gera a partir da pasta.
+# uso: python colunar.py converter arquivo.csv [...]   |   python colunar.py exportar pasta.colunas [saida.csv]
+
+VERSAO = 1
+SUFIXO = ".colunas"
+ARQUIVO_ESQUEMA = "schema.json"
+
+# tipos: "inteiro" (int64, com máscara de nulos quando há), "real" (float64), "data" (datetime64
+# sem fuso), "data_utc" (datetime64 em UTC; datas sem fuso são tomadas como UTC), "texto" (UTF-8
+# com offsets) e "categoria" (códigos int32 + lista de valores, para colunas com poucos valores)
+TIPOS = ("inteiro", "real", "data", "data_utc", "texto", "categoria")
+
+_SPEEDRUN = {"date": "data", "player": "categoria", "time_seconds": "real", "time_formatted": "texto",
+             "run_link": "texto", "video_link": "texto"}
+_IMPACTO = {"Views_Antes": "inteiro", "Likes_Antes": "inteiro", "NumVideos_Antes": "inteiro",
+            "Views_Depois": "inteiro", "Likes_Depois": "inteiro", "NumVideos_Depois": "inteiro"}
+
+# esquema de cada tabela trocada entre as etapas, pelo nome do arquivo (sem extensão)
+ESQUEMAS = {
+    "speedrun_stats": _SPEEDRUN,
+    "speedrun_progressoes": {"variavel": "categoria", "valor": "categoria", **_SPEEDRUN},
+    "youtube_stats": {
+        **_SPEEDRUN, "Views": "inteiro", "Likes": "inteiro", "Comments": "inteiro", "PublishedAt": "data_utc",
+        "ChannelID": "categoria", "CurrentSubscribers": "inteiro", **_IMPACTO, "PublishedAtDT": "data_utc",
+        "VideoAgeDays": "inteiro", "ViewsPerDay": "real", "EngagementRate": "real",
+    },
+    "twitch_stats": {
+        "vod_id": "texto", "contexto_video": "categoria", "streamer_login": "categoria", "title": "texto",
+        "data_criacao": "data_utc", "views": "inteiro", "duration": "texto", "url": "texto",
+        "vod_id_recorde": "texto",
+    },
+    "bilibili_stats": {
+        "bvid": "texto", "context_video": "categoria", "title": "texto", "name_streamer": "categoria",
+        "link_channel": "categoria", "data_publicacao": "data", "views": "inteiro", "likes": "inteiro",
+        "danmaku": "inteiro", "coins": "inteiro", "shares": "inteiro", "favorites": "inteiro", "comments": "inteiro",
+        "erro": "categoria", # só nos vídeos invisíveis (62002), que vêm sem as outras colunas
+    },
+    "dados_analise_final": {
+        "run_date": "data", "run_player": "categoria", "run_time_seconds": "real", "video_link": "texto",
+        "plataforma": "categoria", "video_data_publicacao": "data_utc", "VideoAgeDays": "inteiro",
+        "video_views": "inteiro", "video_likes": "inteiro", "video_comentarios": "inteiro", "ViewsPerDay": "real",
+        "EngagementRate": "real", "ChannelID": "categoria", "CurrentSubscribers": "inteiro", **_IMPACTO,
+        "danmaku": "inteiro", "coins": "inteiro", "shares": "inteiro", "favorites": "inteiro",
+    },
+}
+
+
+def caminho_colunar(caminho_csv):
+    """'.../youtube_stats.csv' -> '.../youtube_stats.colunas'."""
+    return Path(caminho_csv).with_suffix(SUFIXO)
+
+
+def esquema_para(caminho):
+    """Esquema registrado para o arquivo/pasta (pelo nome sem extensão) ou None."""
+    return ESQUEMAS.get(Path(caminho).stem)
+
+
+def inferir_esquema(df):
+    """Esquema a partir dos dtypes, para tabelas sem esquema registrado."""
+    esquema = {}
+    for nome, serie in df.items():
+        if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_integer_dtype(serie):
+            esquema[nome] = "inteiro"
+        elif pd.api.types.is_float_dtype(serie):
+            esquema[nome] = "real"
+        elif isinstance(serie.dtype, pd.DatetimeTZDtype):
+            esquema[nome] = "data_utc"
+        elif pd.api.types.is_datetime64_dtype(serie):
+            esquema[nome] = "data"
+        elif isinstance(serie.dtype, pd.CategoricalDtype):
+            esquema[nome] = "categoria"
+        else:
+            esquema[nome] = "texto"
+    return esquema
+
+
+# --- escrita ---
+def _como_datas(serie):
+    if not pd.api.types.is_datetime64_any_dtype(serie):
+        # texto ISO (com ou sem fuso, até misturados) ou objetos Timestamp; o resto (-1, "nan") vira NaT
+        serie = pd.to_datetime(serie.astype(str), errors="coerce", utc=True, format="ISO8601")
+    elif serie.dt.tz is None:
+        serie = serie.dt.tz_localize("UTC")
+    return serie.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+
+
+def _como_texto(serie):
+    nulos = serie.isna().to_numpy()
+    valores = ["" if nulo else str(v) for v, nulo in zip(serie.tolist(), nulos)]
+    return valores, nulos
+
+
+def _arrays_da_coluna(nome, serie, tipo):
+    """{sufixo do arquivo: array} e metadados extras do schema para uma coluna."""
+    if tipo == "inteiro":
+        numeros = pd.to_numeric(serie, errors="coerce").astype("float64").to_numpy()
+        nulos = np.isnan(numeros)
+        valores = np.where(nulos, 0, numeros)
+        if not np.array_equal(valores, np.round(valores)):
+            raise ValueError(f"coluna '{nome}' tem valores não inteiros; use o tipo 'real'.")
+        arrays = {"valores": valores.astype(np.int64)}
+        if nulos.any():
+            arrays["nulos"] = nulos
+        return arrays, {}
+    if tipo == "real":
+        return {"valores": pd.to_numeric(serie, errors="coerce").astype("float64").to_numpy()}, {}
+    if tipo in ("data", "data_utc"):
+        return {"valores": _como_datas(serie)}, {}
+    if tipo == "texto":
+        valores, nulos = _como_texto(serie)
+        codificados = [v.encode("utf-8") for v in valores]
+        offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+        np.cumsum([len(c) for c in codificados], out=offsets[1:])
+        arrays = {"dados": np.frombuffer(b"".join(codificados), dtype=np.uint8), "offsets": offsets}
+        if nulos.any():
+            arrays["nulos"] = nulos
+        return arrays, {}
+    if tipo == "categoria":
+        valores, nulos = _como_texto(serie)
+        categorias = pd.Categorical(np.array(valores, dtype=object)[~nulos]).categories.tolist()
+        codigos = pd.Categorical(valores, categories=categorias).codes.astype(np.int32)
+        codigos[nulos] = -1
+        return {"codigos": codigos}, {"categorias": categorias}
+    raise ValueError(f"tipo desconhecido '{tipo}' na coluna '{nome}' (tipos: {', '.join(TIPOS)})")
+
+
+def salvar(df, pasta, esquema=None):
+    """
+    Grava 'df' em 'pasta' (substituindo a anterior só no fim, para quem estiver lendo não ver uma
+    tabela pela metade). 'esquema' é {coluna: tipo}; por padrão o registrado para o nome da pasta
+    em ESQUEMAS ou, se não houver, o inferido dos dtypes. Colunas do esquema que não estão em 'df'
+    são ignoradas; colunas de 'df' fora do esquema são um erro.
+    """
+    pasta = Path(pasta)
+    esquema = esquema or esquema_para(pasta) or inferir_esquema(df)
+    fora = [c for c in df.columns if c not in esquema]
+    if fora:
+        raise ValueError(f"colunas sem tipo no esquema de '{pasta.name}': {fora}")
+
+    temporaria = pasta.with_name(pasta.name + ".tmp")
+    shutil.rmtree(temporaria, ignore_errors=True)
+    temporaria.mkdir(parents=True)
+    colunas = []
+    for i, nome in enumerate(df.columns):
+        arrays, extras = _arrays_da_coluna(nome, df[nome], esquema[nome])
+        for sufixo, array in arrays.items():
+            np.save(temporaria / f"c{i}.{sufixo}.npy", array, allow_pickle=False)
+        colunas.append({"nome": str(nome), "tipo": esquema[nome], "arquivos": sorted(arrays), **extras})
+    with open(temporaria / ARQUIVO_ESQUEMA, "w", encoding="utf-8") as f:
+        json.dump({"versao": VERSAO, "linhas": len(df), "colunas": colunas}, f, ensure_ascii=False, indent=1)
+
+    antiga = pasta.with_name(pasta.name + ".old")
+    if pasta.exists():
+        os.replace(pasta, antiga)
+    os.replace(temporaria, pasta)
+    shutil.rmtree(antiga, ignore_errors=True)
+    return pasta
+
+
+# --- leitura ---
+def ler_esquema(pasta):
+    with open(Path(pasta) / ARQUIVO_ESQUEMA, "r", encoding="utf-8") as f:
+        esquema = json.load(f)
+    if esquema.get("versao") != VERSAO:
+        raise ValueError(f"'{pasta}' está na versão {esquema.get('versao')} do formato; esperada {VERSAO}.")
+    return esquema
+
+
+def _abrir(pasta, i, sufixo, mmap):
+    return np.load(Path(pasta) / f"c{i}.{sufixo}.npy", mmap_mode="r" if mmap else None, allow_pickle=False)
+
+
+def _coluna(pasta, i, info, mmap, categorias):
+    tipo, arquivos = info["tipo"], info["arquivos"]
+    nulos = _abrir(pasta, i, "nulos", False) if "nulos" in arquivos else None
+    if tipo == "inteiro":
+        valores = _abrir(pasta, i, "valores", mmap)
+        return valores if nulos is None else pd.arrays.IntegerArray(np.asarray(valores), nulos)
+    if tipo in ("real", "data"):
+        return _abrir(pasta, i, "valores", mmap)
+    if tipo == "data_utc":
+        return pd.DatetimeIndex(_abrir(pasta, i, "valores", mmap)).tz_localize("UTC")
+    if tipo == "texto":
+        bloco = _abrir(pasta, i, "dados", False).tobytes()
+        offsets = _abrir(pasta, i, "offsets", False).tolist()
+        valores = [bloco[a:b].decode("utf-8") for a, b in zip(offsets[:-1], offsets[1:])]
+        if nulos is not None:
+            valores = [None if nulo else v for v, nulo in zip(valores, nulos)]
+        return valores
+    if tipo == "categoria":
+        coluna = pd.Categorical.from_codes(_abrir(pasta, i, "codigos", mmap), categories=info["categorias"])
+        return coluna if categorias else np.asarray(coluna, dtype=object)
+    raise ValueError(f"tipo desconhecido '{tipo}' na coluna '{info['nome']}'")
+
+
+def ler(pasta, colunas=None, mmap=True, categorias=True):
+    """
+    DataFrame com as colunas pedidas (todas por padrão, na ordem gravada); só os arquivos dessas
+    colunas são abertos. Com mmap=True as colunas numéricas e de data ficam mapeadas do disco.
+    categorias=False devolve as colunas "categoria" como texto comum (para quem vai preencher
+    valores novos nelas, como o fillna(-1) da limpeza).
+    """
+    esquema = ler_esquema(pasta)
+    por_nome = {info["nome"]: (i, info) for i, info in enumerate(esquema["colunas"])}
+    colunas = list(por_nome) if colunas is None else list(colunas)
+    faltando = [c for c in colunas if c not in por_nome]
+    if faltando:
+        raise KeyError(f"colunas inexistentes em '{pasta}': {faltando}")
+    dados = {nome: _coluna(pasta, *por_nome[nome], mmap, categorias) for nome in colunas}
+    return pd.DataFrame(dados, index=pd.RangeIndex(esquema["linhas"]), columns=colunas, copy=False)
+
+
+def ler_coluna(pasta, nome):
+    """Array NumPy mapeado do disco de uma coluna inteiro/real/data (sem passar pelo pandas)."""
+    for i, info in enumerate(ler_esquema(pasta)["colunas"]):
+        if info["nome"] == nome:
+            if info["tipo"] not in ("inteiro", "real", "data", "data_utc"):
+                raise ValueError(f"coluna '{nome}' é do tipo '{info['tipo']}'; use ler(pasta, [{nome!r}]).")
+            return _abrir(pasta, i, "valores", True)
+    raise KeyError(f"coluna '{nome}' não existe em '{pasta}'")
+
+
+def atualizado(caminho_csv):
+    """True se a pasta colunar do CSV existe e não é mais velha que ele (ou o CSV não existe)."""
+    pasta = caminho_colunar(caminho_csv)
+    if not (pasta / ARQUIVO_ESQUEMA).exists():
+        return False
+    return not os.path.exists(caminho_csv) or os.path.getmtime(pasta / ARQUIVO_ESQUEMA) >= os.path.getmtime(caminho_csv)
+
+
+# --- CSV ---
+def salvar_com_csv(df, caminho_csv, esquema=None, **opcoes_csv):
+    """
+    Grava o CSV (para leitura humana) e a pasta colunar ao lado dele. Se a pasta não puder ser
+    gravada (coluna fora do esquema, valor que não bate com o tipo), avisa e fica só o CSV.
+    """
+    Path(caminho_csv).parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(caminho_csv, index=False, **opcoes_csv)
+    try:
+        return salvar(df, caminho_colunar(caminho_csv), esquema or esquema_para(caminho_csv))
+    except ValueError as e:
+        print(f"aviso: '{caminho_csv}' salvo só em CSV, sem a versão colunar: {e}")
+        return None
+
+
+def converter_csv(caminho_csv, pasta=None, esquema=None):
+    """Converte um CSV já existente (com o esquema registrado para o nome dele, se houver)."""
+    pasta = pasta or caminho_colunar(caminho_csv)
+    df = pd.read_csv(caminho_csv, encoding="utf-8-sig")
+    return salvar(df, pasta, esquema or esquema_para(caminho_csv))
+
+
+def exportar_csv(pasta, caminho_csv=None, colunas=None):
+    """CSV legível a partir da pasta colunar (por padrão ao lado dela, com o mesmo nome)."""
+    caminho_csv = caminho_csv or Path(pasta).with_suffix(".csv")
+    ler(pasta, colunas, mmap=False).to_csv(caminho_csv, index=False, encoding="utf-8")
+    return caminho_csv
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "converter":
+        for caminho in sys.argv[2:]:
+            pasta = converter_csv(caminho)
+            print(f"{caminho} -> {pasta} ({ler_esquema(pasta)['linhas']} linhas)")
+    elif len(sys.argv) in (3, 4) and sys.argv[1] == "exportar":
+        print(f"{sys.argv[2]} -> {exportar_csv(*sys.argv[2:4])}")
+    else:
+        print("uso: python colunar.py converter arquivo.csv [...]  |  python colunar.py exportar pasta.colunas [saida.csv]")
@@ -0,0 +1,160 @@
+import bisect, sys
+from datetime import date
+
+import speedrun
+
+# --- Configuração ---
+TOP_N = 10 # tamanho do leaderboard guardado nos checkpoints (consultas podem pedir até isso)
+CHECKPOINT_A_CADA = 256 # melhorias de PB entre dois checkpoints; uma consulta reaplica no máximo isso
+
+
+class IndiceLeaderboard:
+    """
+    Índice "como estava em" sobre o histórico de runs de uma categoria/sub-categoria.
+    Recebe as RunCompacta em ordem de data (como saem de fetch_all_runs_for_category) e guarda:
+      - a tabela de recordes mundiais como intervalos [data, próxima data) ordenados;
+      - a linha do tempo de PB de cada jogador (só as runs que melhoraram o PB dele);
+      - a cada CHECKPOINT_A_CADA melhorias de PB, o top-N vigente.
+    Quem era o recordista em X é um bisect; o top-N em X é um bisect até o checkpoint anterior e a
+    reaplicação de no máximo CHECKPOINT_A_CADA melhorias, sem voltar às runs.
+    Datas são strings ISO (AAAA-MM-DD); uma consulta em X inclui as runs do próprio dia X.
+    """
+
+    def __init__(self, runs, top_n=TOP_N, checkpoint_a_cada=CHECKPOINT_A_CADA):
+        self.top_n = top_n
+        self.checkpoint_a_cada = checkpoint_a_cada
+        self.datas_wr, self.runs_wr = [], []
+        self.pbs = {} # jogador -> ([datas], [tempos], [runs])
+        self.datas_eventos, self.eventos = [], [] # melhorias de PB, em ordem: (tempo, data, jogador, run)
+        self.checkpoints = [] # (índice do próximo evento, top-N até ali)
+        self.total_runs = 0
+
+        melhor_tempo, top = float("inf"), []
+        for run in runs:
+            self.total_runs += 1
+            jogador = run.player_id or run.player_name
+            datas, tempos, runs_pb = self.pbs.setdefault(jogador, ([], [], []))
+            if tempos and run.primary_t >= tempos[-1]:
+                continue # não melhorou o PB: não muda nem o leaderboard nem o recorde
+            datas.append(run.date)
+            tempos.append(run.primary_t)
+            runs_pb.append(run)
+            if run.primary_t < melhor_tempo:
+                melhor_tempo = run.primary_t
+                self.datas_wr.append(run.date)
+                self.runs_wr.append(run)
+
+            if len(self.eventos) % checkpoint_a_cada == 0:
+                self.checkpoints.append((len(self.eventos), list(top)))
+            evento = (run.primary_t, run.date, jogador, run)
+            self.eventos.append(evento)
+            self.datas_eventos.append(run.date)
+            top = _aplicar_evento(top, evento, top_n)
+
+    # --- recordistas ---
+    def recordista_em(self, data):
+        """RunCompacta do recorde mundial vigente em 'data' (None antes do primeiro recorde)."""
+        i = bisect.bisect_right(self.datas_wr, data) - 1
+        return self.runs_wr[i] if i >= 0 else None
+
+    def recordistas_em_lote(self, datas):
+        return [self.recordista_em(data) for data in datas]
+
+    def intervalos_wr(self):
+        """[(run, início, fim)] de cada recorde; 'fim' é a data do recorde seguinte (None para o atual)."""
+        fins = self.datas_wr[1:] + [None]
+        return list(zip(self.runs_wr, self.datas_wr, fins))
+
+    # --- PBs ---
+    def pb_em(self, jogador, data):
+        """RunCompacta do PB do jogador (player_id, ou o nome para convidados) em 'data', ou None."""
+        if jogador not in self.pbs:
+            return None
+        datas, _, runs_pb = self.pbs[jogador]
+        i = bisect.bisect_right(datas, data) - 1
+        return runs_pb[i] if i >= 0 else None
+
+    # --- leaderboard ---
+    def leaderboard_em(self, data, n=None):
+        """Top-n (n <= top_n) em 'data': lista de RunCompacta, do mais rápido para o mais lento."""
+        fim = bisect.bisect_right(self.datas_eventos, data)
+        return self._top_ate(fim, n)
+
+    def leaderboard_em_lote(self, datas, n=None):
+        """
+        Como leaderboard_em para várias datas, com uma única varredura: as datas são ordenadas e o
+        top-N é levado de uma para a seguinte, reaplicando só os eventos entre elas (ou recomeçando
+        do checkpoint quando ele estiver mais perto). Devolve na ordem das datas recebidas.
+        """
+        n = self._validar_n(n)
+        resultado = [None] * len(datas)
+        posicao, top = 0, []
+        for i in sorted(range(len(datas)), key=lambda i: datas[i]):
+            fim = bisect.bisect_right(self.datas_eventos, datas[i])
+            inicio_checkpoint, top_checkpoint = self._checkpoint_antes(fim)
+            if inicio_checkpoint > posicao:
+                posicao, top = inicio_checkpoint, list(top_checkpoint)
+            for evento in self.eventos[posicao:fim]:
+                top = _aplicar_evento(top, evento, self.top_n)
+            posicao = fim
+            resultado[i] = [evento[3] for evento in top[:n]]
+        return resultado
+
+    def _validar_n(self, n):
+        if n is None:
+            return self.top_n
+        if n > self.top_n:
+            raise ValueError(f"O índice guarda só o top-{self.top_n}; reconstrua com top_n={n}.")
+        return n
+
+    def _checkpoint_antes(self, fim):
+        i = bisect.bisect_right(self.checkpoints, fim, key=lambda checkpoint: checkpoint[0]) - 1
+        return self.checkpoints[i] if i >= 0 else (0, [])
+
+    def _top_ate(self, fim, n):
+        n = self._validar_n(n)
+        inicio, top = self._checkpoint_antes(fim)
+        for evento in self.eventos[inicio:fim]:
+            top = _aplicar_evento(top, evento, self.top_n)
+        return [evento[3] for evento in top[:n]]
+
+
+def _aplicar_evento(top, evento, top_n):
+    """
+    Top-N depois de um jogador melhorar o PB. Como PBs só diminuem, quem sai do top-N só volta
+    com uma nova melhoria (que é outro evento), então o top-N anterior mais o evento bastam.
+    Empates ficam com quem fez o tempo primeiro.
+    """
+    tempo, data, jogador, _ = evento
+    top = [e for e in top if e[2] != jogador]
+    chaves = [(e[0], e[1]) for e in top]
+    posicao = bisect.bisect_right(chaves, (tempo, data))
+    if posicao >= top_n:
+        return top[:top_n]
+    top.insert(posicao, evento)
+    return top[:top_n]
+
+
+def construir_indice(game_name=speedrun.GAME_NAME, category_name=speedrun.CATEGORY_NAME,
+                     variable_name=speedrun.VARIABLE_NAME, value_label=speedrun.VALUE_LABEL, top_n=TOP_N):
+    game_id = speedrun.get_game_id(game_name)
+    category_id = speedrun.get_category_id(game_id, category_name)
+    variable_id, value_id, _ = speedrun.get_variable_info(category_id, variable_name, value_label)
+    indice = IndiceLeaderboard(speedrun.fetch_all_runs_for_category(game_id, category_id, variable_id, value_id), top_n)
+    print(f"Índice: {indice.total_runs} runs, {len(indice.pbs)} jogadores, {len(indice.eventos)} melhorias de PB, "
+          f"{len(indice.runs_wr)} recordes, {len(indice.checkpoints)} checkpoints.")
+    return indice
+
+
+def main(datas, n=5):
+    indice = construir_indice()
+    for data, top in zip(datas, indice.leaderboard_em_lote(datas, n)):
+        recorde = indice.recordista_em(data)
+        print(f"\n--- {data} --- recordista: {recorde.player_name if recorde else 'ninguém'}")
+        for posicao, run in enumerate(top, 1):
+            print(f"  {posicao}. {run.player_name:<25} {speedrun.format_time(run.primary_t)}  ({run.date})")
+
+
+# uso: python indice_leaderboard.py 2022-06-01 2023-01-01 ...
+if __name__ == "__main__":
+    main(sys.argv[1:] or [date.today().isoformat()])
@@ -0,0 +1,182 @@
+import atexit, bisect, json, os, re, sys, threading, time
+from urllib.parse import urlsplit
+
+# --- Configuração ---
+# Medições das chamadas às APIs, alimentadas pelo transporte.py (toda requisição feita com
+# requests) e pelo executar() do youtube_coleta_dados.py (cliente do Google). Cada evento vira
+# uma linha JSON em ARQUIVO_EVENTOS (se configurado) e, no fim do processo, sai um resumo por
+# endpoint: latência, tentativas, bytes, acertos de cache, tempo dormindo e cota do YouTube.
+# python instrumentacao.py metricas.jsonl compara as etapas (processos) gravadas no mesmo arquivo.
+ATIVO = True
+ARQUIVO_EVENTOS = os.environ.get("COLETORES_METRICAS") # caminho do .jsonl; sem ele só o resumo
+RESUMO_NO_FIM = True # imprime o resumo ao sair do processo, se houve alguma chamada
+LIMITES_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000] # faixas do histograma de latência
+# unidades de cota da YouTube Data API v3 por tipo de chamada (search custa 100, as listagens 1)
+COTA_YOUTUBE = {"search.list": 100, "videos.list": 1, "channels.list": 1, "playlistItems.list": 1}
+COTA_YOUTUBE_PADRAO = 1
+
+ID_NO_CAMINHO = re.compile(r"(?<=/)(?=(?:[^/]*\d){2})[^/]{6,}(?=/|$)") # segmentos com vários dígitos (ids) viram ':id'
+
+_lock = threading.Lock()
+_endpoints = {}
+_sono = {}
+_cota = {}
+_arquivo = None
+# nome do script que está rodando (ex.: youtube_coleta_dados); COLETORES_ETAPA troca o nome
+_etapa = os.environ.get("COLETORES_ETAPA") or os.path.splitext(os.path.basename(sys.argv[0]))[0].lstrip("-") or "python"
+
+
+def endpoint(url):
+    """host + caminho sem ids, para agrupar as chamadas (ex.: www.speedrun.com/api/v1/games/:id/categories)."""
+    partes = urlsplit(url)
+    return partes.netloc.lower() + ID_NO_CAMINHO.sub(":id", partes.path)
+
+
+def _novo_endpoint():
+    return {"chamadas": 0, "tentativas_extras": 0, "erros": 0, "bytes": 0, "cache": 0, "revalidados": 0,
+            "ms_total": 0.0, "ms_max": 0.0, "histograma": [0] * (len(LIMITES_MS) + 1), "status": {}}
+
+
+def _emitir(evento):
+    global _arquivo
+    if not ARQUIVO_EVENTOS:
+        return
+    evento = {"ts": round(time.time(), 3), "etapa": _etapa, **evento}
+    with _lock:
+        if _arquivo is None:
+            _arquivo = open(ARQUIVO_EVENTOS, "a", encoding="utf-8")
+        _arquivo.write(json.dumps(evento, ensure_ascii=False) + "\n")
+        _arquivo.flush()
+
+
+def requisicao(metodo, url, status, segundos, tamanho, tentativa=0, erro=None, cota=None):
+    """Uma tentativa de requisição que foi à rede. status None com 'erro' = falha de conexão/timeout."""
+    if not ATIVO:
+        return
+    nome = endpoint(url)
+    ms = segundos * 1000
+    with _lock:
+        e = _endpoints.setdefault(nome, _novo_endpoint())
+        e["chamadas"] += 1
+        e["tentativas_extras"] += tentativa > 0
+        e["erros"] += bool(erro) or (status is not None and status >= 400)
+        e["bytes"] += tamanho
+        e["ms_total"] += ms
+        e["ms_max"] = max(e["ms_max"], ms)
+        e["histograma"][bisect.bisect_left(LIMITES_MS, ms)] += 1
+        chave_status = str(status) if status is not None else "erro"
+        e["status"][chave_status] = e["status"].get(chave_status, 0) + 1
+        if cota:
+            tipo, unidades = cota
+            _cota[tipo] = _cota.get(tipo, 0) + unidades
+    _emitir({"tipo": "requisicao", "metodo": metodo, "endpoint": nome, "status": status, "ms": round(ms, 2),
+             "bytes": tamanho, "tentativa": tentativa, "erro": erro, "cota": cota[1] if cota else None})
+
+
+def cache(url, resultado, tamanho=0):
+    """Resposta servida pelo cache em disco: resultado 'hit' (sem rede) ou 'revalidado' (304)."""
+    if not ATIVO:
+        return
+    nome = endpoint(url)
+    with _lock:
+        e = _endpoints.setdefault(nome, _novo_endpoint())
+        e["cache" if resultado == "hit" else "revalidados"] += 1
+    _emitir({"tipo": "cache", "endpoint": nome, "resultado": resultado, "bytes": tamanho})
+
+
+def dormiu(host, segundos, motivo):
+    """Tempo parado esperando: 'limitador' (token bucket/Retry-After) ou 'backoff' (entre tentativas)."""
+    if not ATIVO or segundos <= 0:
+        return
+    with _lock:
+        _sono[(host, motivo)] = _sono.get((host, motivo), 0.0) + segundos
+    _emitir({"tipo": "espera", "host": host, "motivo": motivo, "ms": round(segundos * 1000, 2)})
+
+
+def cota_youtube(metodo):
+    """('videos.list', unidades) a partir do methodId do cliente do Google (ex.: 'youtube.videos.list')."""
+    tipo = metodo.removeprefix("youtube.") if metodo else "?"
+    return tipo, COTA_YOUTUBE.get(tipo, COTA_YOUTUBE_PADRAO)
+
+
+def _percentil(histograma, fracao): # limite superior da faixa onde cai o percentil
+    total = sum(histograma)
+    acumulado = 0
+    for i, n in enumerate(histograma):
+        acumulado += n
+        if total and acumulado >= fracao * total:
+            return LIMITES_MS[i] if i < len(LIMITES_MS) else float("inf")
+    return 0
+
+
+def resumo():
+    """Totais por endpoint, tempo dormindo por host/motivo e cota do YouTube por tipo de chamada."""
+    with _lock:
+        endpoints = {nome: dict(e, histograma=list(e["histograma"]), status=dict(e["status"])) for nome, e in _endpoints.items()}
+        sono = {f"{host} ({motivo})": round(s, 3) for (host, motivo), s in _sono.items()}
+        cota = dict(_cota)
+    for e in endpoints.values():
+        e["ms_medio"] = round(e["ms_total"] / e["chamadas"], 2) if e["chamadas"] else 0.0
+        e["p50_ms"], e["p95_ms"] = _percentil(e["histograma"], 0.5), _percentil(e["histograma"], 0.95)
+    return {"etapa": _etapa, "endpoints": endpoints, "sono_s": sono, "cota_youtube": cota,
+            "cota_youtube_total": sum(cota.values())}
+
+
+def imprimir_resumo(dados=None):
+    dados = dados or resumo()
+    print(f"\n--- Chamadas às APIs ({dados['etapa']}) ---")
+    print(f"{'endpoint':<52} {'rede':>5} {'cache':>6} {'extras':>6} {'erros':>5} {'KiB':>9} {'médio ms':>9} {'p95 ms':>7} {'máx ms':>8}")
+    for nome, e in sorted(dados["endpoints"].items(), key=lambda item: -item[1]["ms_total"]):
+        print(f"{nome[:52]:<52} {e['chamadas']:>5} {e['cache'] + e['revalidados']:>6} {e['tentativas_extras']:>6} {e['erros']:>5} "
+              f"{e['bytes'] / 1024:>9.1f} {e['ms_medio']:>9.1f} {e['p95_ms']:>7} {e['ms_max']:>8.1f}")
+    if dados["sono_s"]:
+        print("Tempo esperando: " + ", ".join(f"{chave}={s:.2f}s" for chave, s in sorted(dados["sono_s"].items())))
+    if dados["cota_youtube"]:
+        print(f"Cota do YouTube: {dados['cota_youtube_total']} unidades ("
+              + ", ".join(f"{tipo}={u}" for tipo, u in sorted(dados["cota_youtube"].items())) + ")")
+
+
+def zerar():
+    with _lock:
+        _endpoints.clear()
+        _sono.clear()
+        _cota.clear()
+
+
+def comparar_etapas(caminho):
+    """Soma os eventos do .jsonl por etapa, para ver qual delas domina tempo, bytes e cota."""
+    etapas = {}
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            evento = json.loads(linha)
+            t = etapas.setdefault(evento["etapa"], {"requisicoes": 0, "cache": 0, "ms": 0.0, "bytes": 0, "espera_ms": 0.0, "cota": 0})
+            if evento["tipo"] == "requisicao":
+                t["requisicoes"] += 1
+                t["ms"] += evento["ms"]
+                t["bytes"] += evento["bytes"]
+                t["cota"] += evento["cota"] or 0
+            elif evento["tipo"] == "cache":
+                t["cache"] += 1
+            elif evento["tipo"] == "espera":
+                t["espera_ms"] += evento["ms"]
+    print(f"{'etapa':<24} {'requisições':>12} {'cache':>6} {'rede (s)':>9} {'esperando (s)':>14} {'KiB':>10} {'cota YT':>8}")
+    for nome, t in sorted(etapas.items(), key=lambda item: -(item[1]["ms"] + item[1]["espera_ms"])):
+        print(f"{nome:<24} {t['requisicoes']:>12} {t['cache']:>6} {t['ms'] / 1000:>9.2f} {t['espera_ms'] / 1000:>14.2f} "
+              f"{t['bytes'] / 1024:>10.1f} {t['cota']:>8}")
+    return etapas
+
+
+@atexit.register
+def _no_fim():
+    if not ATIVO or not _endpoints:
+        return
+    dados = resumo()
+    _emitir({"tipo": "resumo", **dados})
+    if RESUMO_NO_FIM:
+        imprimir_resumo(dados)
+    if _arquivo is not None:
+        _arquivo.close()
+
+
+if __name__ == "__main__":
+    comparar_etapas(sys.argv[1] if len(sys.argv) > 1 else ARQUIVO_EVENTOS)
@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+
+# Janelas antes/depois de recordes, para todos os recordes de uma vez.
+# YouTube (vídeos do canal em torno do recorde), Twitch (VODs do streamer) e a limpeza do Bilibili
+# (vídeos entre um recorde e o seguinte) fazem a mesma coisa: para cada recorde, recortar os vídeos
+# do mesmo canal numa faixa de datas e somar/contar/rotular. Em vez de um loop por recorde, os
+# vídeos de todos os canais ficam numa única tabela ordenada por uma chave inteira (canal, data) e
+# os limites de todas as janelas saem de um np.searchsorted; somas e médias vêm de somas acumuladas.
+# Datas são comparadas com resolução de segundos.
+
+
+def em_segundos(datas):
+    """Datas (strings ISO, datetime com ou sem fuso, ou números já em segundos) -> float64 em segundos UTC; NaN para inválidas."""
+    if _numerico(datas):
+        return np.asarray(datas, dtype=np.float64)
+    convertidas = pd.to_datetime(pd.Series(datas), errors="coerce", utc=True)
+    nanos = convertidas.dt.tz_convert(None).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    segundos = np.floor_divide(nanos, 10**9).astype(np.float64)
+    segundos[convertidas.isna().to_numpy()] = np.nan
+    return segundos
+
+
+class IndiceJanelas:
+    """
+    Vídeos de vários canais numa tabela ordenada por (canal, data). 'videos' é um DataFrame com uma
+    coluna de canal e uma de data; as outras colunas vêm junto e podem ser agregadas. Vídeos sem
+    data válida ficam de fora; vídeos com a mesma data mantêm a ordem de 'videos'. As janelas são
+    pares de arrays (inicio, fim): posições [inicio, fim) em self.videos, uma por recorde.
+    """
+
+    def __init__(self, videos, canal="canal", data="data"):
+        segundos = em_segundos(videos[data])
+        validos = ~np.isnan(segundos)
+        codigos, canais = pd.factorize(videos[canal].to_numpy()[validos])
+        self.canais = pd.Index(canais)
+        segundos = segundos[validos].astype(np.int64)
+
+        self.origem = int(segundos.min()) if len(segundos) else 0
+        # cada canal ocupa uma faixa de 'extensao' valores da chave, então canal e data cabem num int64
+        self.extensao = int(segundos.max()) - self.origem + 1 if len(segundos) else 1
+        chaves = codigos.astype(np.int64) * self.extensao + (segundos - self.origem)
+        ordem = np.argsort(chaves, kind="stable")
+
+        self.chaves = chaves[ordem]
+        self.segundos = segundos[ordem]
+        self.videos = videos[validos].iloc[ordem].reset_index(drop=True)
+        self._acumulados = {}
+
+    def __len__(self):
+        return len(self.videos)
+
+    def limites(self, canais, inicios, fins, incluir_inicio=True, incluir_fim=True):
+        """
+        (inicio, fim) das janelas [inicios, fins] de cada canal (limites abertos com incluir_*=False).
+        Limites NaN/None não restringem aquele lado; canais desconhecidos dão janelas vazias.
+        """
+        codigos = self.canais.get_indexer(pd.Index(canais))
+        de = np.nan_to_num(em_segundos(inicios), nan=-np.inf)
+        ate = np.nan_to_num(em_segundos(fins), nan=np.inf)
+        if not incluir_inicio:
+            de = np.floor(de) + 1
+        if not incluir_fim:
+            ate = np.ceil(ate) - 1
+        # presos à faixa do canal: um limite fora dela não pode cair em outro canal
+        de = np.clip(np.ceil(de) - self.origem, 0, self.extensao).astype(np.int64)
+        ate = np.clip(np.floor(ate) - self.origem, -1, self.extensao - 1).astype(np.int64)
+        base = np.maximum(codigos, 0).astype(np.int64) * self.extensao
+        inicio = np.searchsorted(self.chaves, base + de, side="left")
+        fim = np.maximum(np.searchsorted(self.chaves, base + ate, side="right"), inicio)
+        vazias = codigos < 0
+        inicio[vazias] = fim[vazias] = 0
+        return inicio, fim
+
+    def posicoes(self, valores, coluna):
+        """Posição em self.videos do vídeo com cada valor de 'coluna' (primeira ocorrência), -1 se não há."""
+        posicao = pd.Series(np.arange(len(self.videos)), index=self.videos[coluna].to_numpy())
+        posicao = posicao[~posicao.index.duplicated()]
+        return posicao.reindex(valores).fillna(-1).to_numpy(dtype=np.int64)
+
+    def mais_proximos(self, inicio, fim, k, lado, excluir=None):
+        """
+        Corta cada janela nos k vídeos mais próximos de um lado ("fim": os k últimos; "inicio": os k
+        primeiros), sem contar a posição 'excluir' da janela (o próprio vídeo do recorde, -1 para
+        nenhum). Devolve (inicio, fim, excluido): 'excluido' marca as janelas que ainda contêm a
+        posição excluída, que expandir()/agregar() descartam.
+        """
+        excluir = np.full(len(inicio), -1, dtype=np.int64) if excluir is None else np.asarray(excluir, dtype=np.int64)
+        if lado == "fim":
+            corte = fim - k
+            corte = np.where((excluir >= np.maximum(inicio, corte)) & (excluir < fim), corte - 1, corte)
+            inicio = np.maximum(inicio, corte)
+        elif lado == "inicio":
+            corte = inicio + k
+            corte = np.where((excluir >= inicio) & (excluir < np.minimum(fim, corte)), corte + 1, corte)
+            fim = np.minimum(fim, corte)
+        else:
+            raise ValueError(f"lado deve ser 'inicio' ou 'fim', não {lado!r}")
+        return inicio, fim, (excluir >= inicio) & (excluir < fim)
+
+    def contar(self, inicio, fim, excluido=None):
+        quantidade = fim - inicio
+        return quantidade - excluido if excluido is not None else quantidade
+
+    def expandir(self, inicio, fim, excluir=None):
+        """(janela, posicao): uma linha por vídeo de cada janela, na ordem das janelas e das datas."""
+        quantidade = fim - inicio
+        janela = np.repeat(np.arange(len(inicio)), quantidade)
+        deslocamento = np.arange(quantidade.sum()) - np.repeat(np.cumsum(quantidade) - quantidade, quantidade)
+        posicao = np.repeat(inicio, quantidade) + deslocamento
+        if excluir is not None:
+            manter = posicao != np.asarray(excluir, dtype=np.int64)[janela]
+            janela, posicao = janela[manter], posicao[manter]
+        return janela, posicao
+
+    def rotular(self, janela, posicao, segundos_recorde, posicao_recorde=None):
+        """'recorde' para o próprio vídeo, 'antes_recorde' se é anterior ao recorde, senão 'depois_recorde'."""
+        segundos_recorde = np.asarray(segundos_recorde, dtype=np.float64)[janela]
+        rotulos = np.where(self.segundos[posicao] < segundos_recorde, "antes_recorde", "depois_recorde").astype(object)
+        if posicao_recorde is not None:
+            rotulos[posicao == np.asarray(posicao_recorde, dtype=np.int64)[janela]] = "recorde"
+        return rotulos
+
+    def definir_coluna(self, coluna, valores):
+        """Troca/cria uma coluna de self.videos (na ordem de self.videos) e descarta a soma acumulada dela."""
+        self.videos[coluna] = valores
+        self._acumulados.pop(coluna, None)
+
+    def agregar(self, coluna, inicio, fim, excluido=None, excluir=None):
+        """(soma, não nulos) de 'coluna' em cada janela, descontando a posição excluída quando 'excluido'."""
+        if coluna not in self._acumulados:
+            valores = pd.to_numeric(self.videos[coluna], errors="coerce").to_numpy(dtype=np.float64)
+            nulos = np.isnan(valores)
+            inteiros = not nulos.any() and np.all(valores == np.round(valores))
+            valores = valores.astype(np.int64) if inteiros else np.where(nulos, 0, valores)
+            self._acumulados[coluna] = (
+                valores,
+                np.concatenate(([0], np.cumsum(valores))),
+                np.concatenate(([0], np.cumsum(~nulos))),
+                ~nulos,
+            )
+        valores, soma, presentes, nao_nulo = self._acumulados[coluna]
+        total, quantos = soma[fim] - soma[inicio], presentes[fim] - presentes[inicio]
+        if excluido is not None and len(valores):
+            posicao = np.where(excluido, excluir, 0)
+            total = total - np.where(excluido, valores[posicao], 0)
+            quantos = quantos - (excluido & nao_nulo[posicao])
+        return total, quantos
+
+
+def _numerico(valores):
+    return np.issubdtype(np.asarray(valores).dtype, np.number)
+
+
+def resumo_janelas(indice, janela, colunas, sufixo, media=False, vazio=0):
+    """
+    DataFrame com uma linha por janela: <prefixo>_<sufixo> para cada (coluna do índice -> prefixo)
+    em 'colunas' (soma, ou média truncada com media=True; 'vazio' quando não há valores) e
+    NumVideos_<sufixo>. 'janela' é (inicio, fim) ou (inicio, fim, excluido, excluir).
+    """
+    inicio, fim, excluido, excluir = (tuple(janela) + (None, None))[:4]
+    quantidade = indice.contar(inicio, fim, excluido)
+    resumo = {}
+    for coluna, prefixo in colunas.items():
+        total, quantos = indice.agregar(coluna, inicio, fim, excluido, excluir)
+        if media:
+            valor = np.where(quantos > 0, np.trunc(total / np.maximum(quantos, 1)), vazio).astype(np.int64)
+        else:
+            valor = np.where(quantidade > 0, total, vazio)
+        resumo[f"{prefixo}_{sufixo}"] = valor
+    resumo[f"NumVideos_{sufixo}"] = quantidade
+    return pd.DataFrame(resumo)
+
+
+def resumo_antes_depois(indice, antes, depois, colunas, media=False, vazio=0):
+    """resumo_janelas das janelas 'antes' e 'depois' lado a lado (Views_Antes, ..., NumVideos_Depois)."""
+    return pd.concat([resumo_janelas(indice, antes, colunas, "Antes", media, vazio),
+                      resumo_janelas(indice, depois, colunas, "Depois", media, vazio)], axis=1)
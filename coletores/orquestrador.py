@@ -0,0 +1,121 @@
+import json, re, sys, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from pathlib import Path
+
+import speedrun
+
+# --- Configuração ---
+# cada alvo é um jogo/categoria/sub-categoria; "bilibili_recordes" (opcional) são BVIDs que não
+# aparecem nos links do speedrun.com. Também dá para passar um JSON com a lista: python orquestrador.py alvos.json
+ALVOS = [
+    {
+        "jogo": speedrun.GAME_NAME,
+        "categoria": speedrun.CATEGORY_NAME,
+        "variavel": speedrun.VARIABLE_NAME,
+        "valor": speedrun.VALUE_LABEL,
+        "bilibili_recordes": ["BV1ooXWYiEr2", "BV1ZNBBYBEEn"],
+    },
+]
+SPEEDRUN_WORKERS = 4 # alvos buscados ao mesmo tempo; o ritmo no speedrun.com continua sendo o do transporte
+PLATAFORMAS = ["youtube", "twitch", "bilibili"]
+SAIDA_DIR = speedrun.SCRIPT_DIR.parent / "1-coleta" / "alvos" # um subdiretório por alvo
+INCREMENTAL_MODE = False
+
+
+def slug(alvo):
+    partes = [alvo["jogo"], alvo["categoria"], alvo.get("valor") or ""]
+    return "_".join(p for p in (re.sub(r"[^0-9a-z]+", "-", p.lower()).strip("-") for p in partes) if p)
+
+def carregar_alvos(caminho=None):
+    if not caminho:
+        return ALVOS
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# --- Etapas ---
+# Os coletores das plataformas são importados só quando a etapa roda, para o orquestrador não
+# carregar pandas/googleapiclient de plataformas que não foram pedidas.
+
+def etapa_speedrun(alvo, pasta, incremental):
+    saida = pasta / "speedrun_stats.csv"
+    speedrun.coletar_alvo(alvo["jogo"], alvo["categoria"], alvo.get("variavel"), alvo.get("valor"), saida, incremental)
+    return saida
+
+def etapa_youtube(alvo, pasta, entrada):
+    import youtube_coleta_dados
+    youtube_coleta_dados.main(str(entrada), str(pasta / "youtube_stats.csv"))
+
+def etapa_twitch(alvo, pasta, entrada):
+    import twitch_coleta_dados
+    twitch_coleta_dados.main(str(entrada), str(pasta / "twitch_stats.csv"))
+
+def etapa_bilibili(alvo, pasta, entrada):
+    import bilibili_coleta_dados
+    bilibili_coleta_dados.main(str(entrada), str(pasta / "bilibili_stats.csv"), alvo.get("bilibili_recordes", []))
+
+ETAPAS = {"youtube": etapa_youtube, "twitch": etapa_twitch, "bilibili": etapa_bilibili}
+
+
+def orquestrar(alvos, plataformas=PLATAFORMAS, incremental=INCREMENTAL_MODE, saida_dir=SAIDA_DIR):
+    """
+    Roda a etapa do speedrun.com de todos os alvos em paralelo e, assim que o CSV de um alvo fica
+    pronto, já dispara as etapas das plataformas para ele, sem esperar os outros alvos.
+    Cada plataforma tem um único worker: o cliente do YouTube (httplib2) não é thread-safe e os
+    índices em memória da twitch/bilibili são compartilhados entre chamadas; o paralelismo vem de
+    plataformas diferentes (e alvos diferentes no speedrun.com) andarem ao mesmo tempo.
+    Devolve {slug: {etapa: "ok" | "sem dados" | "erro: ..."}}.
+    """
+    resultado = {}
+    lock = threading.Lock()
+
+    def registrar(nome, etapa, status):
+        with lock:
+            resultado.setdefault(nome, {})[etapa] = status
+        print(f"[{nome}] {etapa}: {status}")
+
+    def rodar(nome, etapa, funcao, *args):
+        try:
+            funcao(*args)
+            registrar(nome, etapa, "ok")
+        except Exception as e:
+            registrar(nome, etapa, f"erro: {e}")
+
+    pools = {p: ThreadPoolExecutor(max_workers=1, thread_name_prefix=p) for p in plataformas}
+    pendentes = []
+    try:
+        with ThreadPoolExecutor(max_workers=SPEEDRUN_WORKERS, thread_name_prefix="speedrun") as pool_speedrun:
+            futuros = {}
+            for alvo in alvos:
+                nome = slug(alvo)
+                pasta = Path(saida_dir) / nome
+                futuros[pool_speedrun.submit(etapa_speedrun, alvo, pasta, incremental)] = (nome, alvo, pasta)
+
+            for futuro in as_completed(futuros):
+                nome, alvo, pasta = futuros[futuro]
+                try:
+                    entrada = futuro.result()
+                except Exception as e:
+                    registrar(nome, "speedrun", f"erro: {e}")
+                    continue
+                if not entrada.exists():
+                    registrar(nome, "speedrun", "sem dados")
+                    continue
+                registrar(nome, "speedrun", "ok")
+                for p in plataformas:
+                    pendentes.append(pools[p].submit(rodar, nome, p, ETAPAS[p], alvo, pasta, entrada))
+        wait(pendentes)
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+
+    print("\n--- Resumo ---")
+    for nome, etapas in resultado.items():
+        print(f"{nome}: " + ", ".join(f"{etapa}={status}" for etapa, status in etapas.items()))
+    return resultado
+
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    orquestrar(carregar_alvos(argumentos[0] if argumentos else None),
+               incremental=INCREMENTAL_MODE or "--incremental" in sys.argv)
@@ -0,0 +1,115 @@
+from itertools import islice, repeat
+from operator import attrgetter
+
+import numpy as np
+import pandas as pd
+
+from speedrun import OUTPUT_FIELDS, format_time
+
+# Progressão de recordes de todas as sub-categorias de uma vez.
+# analisar_progressao_recorde (speedrun.py) percorre as runs de UM valor em um loop Python; aqui
+# as runs da categoria inteira (baixadas uma vez, sem filtro de variável) viram colunas NumPy/pandas
+# e o mínimo acumulado é calculado para todos os grupos (variável, valor) de uma vez com groupby().cummin().
+# As runs chegam em streaming e são montadas em blocos de BLOCO_RUNS; o melhor tempo de cada grupo
+# passa de um bloco para o outro, então só o bloco atual e as runs de recorde ficam em memória.
+
+PROGRESSAO_FIELDS = ["variavel", "valor"] + OUTPUT_FIELDS
+BLOCO_RUNS = 20_000
+
+
+def tabela_de_runs(runs, variable_ids, codigos=None):
+    """
+    DataFrame com uma linha por run (na ordem de 'runs'): o tempo e uma coluna categórica por
+    variável com o id do valor da run. Os campos de texto ficam nos RunCompacta e só são lidos
+    para as linhas de recorde. 'codigos' ({var_id: {valor_id: código}}) mantém o mesmo código
+    de categoria entre chamadas (blocos de um stream) e recebe os valores novos.
+    """
+    codigos = {} if codigos is None else codigos
+    # map com attrgetter e dict.get percorre as runs em C; os códigos saem direto do dicionário
+    # (Categorical.from_codes), sem o factorize de uma lista de objetos por variável
+    df = pd.DataFrame({"primary_t": np.fromiter(map(attrgetter("primary_t"), runs), dtype=np.float64, count=len(runs))})
+    valores = list(map(attrgetter("values"), runs))
+    for var_id in variable_ids:
+        ids = list(map(dict.get, valores, repeat(var_id)))
+        codigo = codigos.setdefault(var_id, {None: -1}) # run sem valor para a variável: código -1
+        for valor_id in dict.fromkeys(ids):
+            if valor_id not in codigo:
+                codigo[valor_id] = len(codigo) - 1
+        categorias = [valor_id for valor_id in codigo if valor_id is not None]
+        df[var_id] = pd.Categorical.from_codes(np.fromiter(map(codigo.__getitem__, ids), dtype=np.int32, count=len(ids)), categorias)
+    return df
+
+
+def indices_recordes(df, variaveis, melhores=None):
+    """
+    'variaveis' é {var_id: (nome, {valor_id: label})}. Devolve (linhas, chaves): as linhas de 'df'
+    que bateram o recorde vigente do seu valor (tempo estritamente menor que todos os anteriores do
+    mesmo valor), agrupadas por (variável, valor) e em ordem de data dentro de cada grupo, e o
+    (var_id, valor_id) de cada uma. 'melhores' ({(var_id, valor_id): tempo}) traz o recorde de cada
+    valor antes da primeira linha de 'df' e é atualizado com o recorde depois da última.
+    """
+    melhores = {} if melhores is None else melhores
+    # cada (variável, valor) vira um inteiro: deslocamento da variável + código da categoria;
+    # runs sem valor para a variável (código -1) ficam de fora daquela variável
+    linhas, grupos, chaves, deslocamento = [], [], [], 0
+    for var_id in variaveis:
+        coluna = df[var_id].cat
+        codigos = coluna.codes.to_numpy()
+        presentes = np.flatnonzero(codigos >= 0)
+        linhas.append(presentes)
+        grupos.append(codigos[presentes].astype(np.int64) + deslocamento)
+        chaves += [(var_id, valor_id) for valor_id in coluna.categories]
+        deslocamento += len(coluna.categories)
+    if not linhas:
+        return np.array([], dtype=np.int64), []
+    linhas, grupos = np.concatenate(linhas), np.concatenate(grupos)
+    if not len(linhas):
+        return linhas, []
+
+    # ordenação estável por grupo: cada grupo fica contíguo e mantém a ordem de data dentro dele,
+    # então o recorde anterior de uma run é o mínimo acumulado da linha de cima (ou inf no começo do grupo)
+    ordem = np.argsort(grupos, kind="stable")
+    linhas, grupos = linhas[ordem], grupos[ordem]
+    tempos = df["primary_t"].to_numpy()[linhas]
+    melhor_ate_aqui = pd.Series(tempos).groupby(grupos, sort=False).cummin().to_numpy()
+    inicio_grupo = np.r_[True, grupos[1:] != grupos[:-1]]
+    vigente = np.array([melhores.get(chave, np.inf) for chave in chaves])[grupos] # recorde de antes de 'df'
+    melhor_anterior = np.minimum(np.where(inicio_grupo, np.inf, np.r_[np.inf, melhor_ate_aqui[:-1]]), vigente)
+    recorde = tempos < melhor_anterior
+    fim_grupo = np.flatnonzero(np.r_[inicio_grupo[1:], True])
+    for g, melhor in zip(grupos[fim_grupo], np.minimum(melhor_ate_aqui, vigente)[fim_grupo]):
+        melhores[chaves[g]] = melhor
+    return linhas[recorde], [chaves[g] for g in grupos[recorde]]
+
+
+def progressoes_subcategorias(runs, variaveis, tamanho_bloco=BLOCO_RUNS):
+    """
+    RunCompacta (em ordem de data, sem filtro de variável) -> DataFrame com PROGRESSAO_FIELDS com a
+    progressão de recordes de todos os valores de todas as variáveis em 'variaveis'. 'runs' pode ser
+    um gerador: ele é consumido em blocos de 'tamanho_bloco' e só as runs de recorde são guardadas.
+    """
+    var_ids = list(variaveis)
+    runs, melhores, codigos, recordes = iter(runs), {}, {}, []
+    while True:
+        bloco = list(islice(runs, tamanho_bloco))
+        if not bloco:
+            break
+        linhas, chaves = indices_recordes(tabela_de_runs(bloco, var_ids, codigos), variaveis, melhores)
+        recordes.extend((var_ids.index(var_id), valor_id, bloco[linha]) for linha, (var_id, valor_id) in zip(linhas, chaves))
+    # ordenação estável: mesma ordem de uma passada única (variável, id do valor, data)
+    recordes.sort(key=lambda r: r[:2])
+
+    registros = []
+    for posicao, valor_id, run in recordes:
+        nome, valores = variaveis[var_ids[posicao]]
+        registros.append({
+            "variavel": nome,
+            "valor": valores.get(valor_id, valor_id),
+            "date": run.date,
+            "player": run.player_name,
+            "time_seconds": run.primary_t,
+            "time_formatted": format_time(run.primary_t),
+            "run_link": run.weblink,
+            "video_link": run.video_uri
+        })
+    return pd.DataFrame(registros, columns=PROGRESSAO_FIELDS)
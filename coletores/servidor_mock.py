@@ -0,0 +1,379 @@
+import json, math, random, socket, sqlite3, sys, threading, time
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# Servidor HTTP local que faz o papel do speedrun.com, da Twitch (helix e OAuth), da YouTube Data
+# API v3 e do Bilibili para rodar e medir os coletores sem internet. As respostas são sintéticas
+# e determinísticas (mesma semente, mesmos dados) ou, com 'gravados', repetidas do cache em disco
+# de cache_http.py de uma coleta real. Latência, tamanho de página e 429 são configuráveis.
+# Os coletores são apontados para ele por transporte.BASES_URL (variável COLETORES_BASES_URL).
+# uso: python servidor_mock.py [porta] (mostra o valor de COLETORES_BASES_URL a exportar)
+
+SEMENTE = 42
+NUM_RUNS = 2000 # runs da categoria no speedrun.com sintético
+NUM_JOGADORES = 150 # cada jogador tem um canal no YouTube, na Twitch e no Bilibili
+INTERVALO_VIDEOS_HORAS = (24, 120) # intervalo entre os vídeos "comuns" de cada canal
+INICIO = datetime(2022, 2, 25, tzinfo=timezone.utc)
+DIAS = 3 * 365
+PLATAFORMAS_VIDEO = [("youtube", 0.6), ("twitch", 0.25), ("bilibili", 0.1), (None, 0.05)]
+
+# partes do caminho que identificam cada API e a base original que ela substitui
+APIS = [
+    ("/api/v1/", "speedrun", "https://www.speedrun.com"),
+    ("/helix/", "twitch", "https://api.twitch.tv"),
+    ("/oauth2/", "twitch_auth", "https://id.twitch.tv"),
+    ("/x/", "bilibili", "https://api.bilibili.com"),
+    ("/youtube/v3/", "youtube", "https://youtube.googleapis.com"),
+]
+FORMATO_DATA = "%Y-%m-%dT%H:%M:%SZ"
+
+
+class Cenario:
+    """Jogo, categoria e runs do speedrun.com e os canais de vídeo dos jogadores, gerados a partir da semente."""
+
+    def __init__(self, num_runs=NUM_RUNS, num_jogadores=NUM_JOGADORES, semente=SEMENTE):
+        rng = random.Random(semente)
+        self.plataformas = ["pc", "ps5", "xbox"]
+        self.canais = [] # por jogador: datas de publicação dos vídeos do canal, em ordem (a posição é o id)
+        for jogador in range(num_jogadores):
+            t, lista = INICIO - timedelta(days=30), []
+            while t < INICIO + timedelta(days=DIAS + 30):
+                t += timedelta(hours=rng.randint(*INTERVALO_VIDEOS_HORAS))
+                lista.append(t)
+            self.canais.append(lista)
+
+        self.runs = []
+        por_canal = [[] for _ in range(num_jogadores)]
+        for i in range(num_runs):
+            jogador = min(int(rng.paretovariate(1.2)) - 1, num_jogadores - 1) # poucos jogadores com muitas runs
+            data = INICIO + timedelta(days=DIAS * i / num_runs)
+            # o tempo cai ao longo dos anos, com bastante ruído: a progressão de recorde tem dezenas de degraus
+            tempo = 4000 * math.exp(-1.2 * i / num_runs) * (1 + rng.random() * 0.6) + 900
+            plataforma_video = rng.choices([p for p, _ in PLATAFORMAS_VIDEO], [w for _, w in PLATAFORMAS_VIDEO])[0]
+            run = {
+                "id": f"run{i:06d}", "weblink": f"https://www.speedrun.com/eldenring/run/run{i:06d}",
+                "game": "g1", "category": "c1", "date": data.strftime("%Y-%m-%d"),
+                "status": {"status": "verified"}, "times": {"primary_t": round(tempo, 3)},
+                "system": {"platform": rng.choice(self.plataformas), "emulated": False},
+                "values": {"v1": "glitchless" if rng.random() < 0.7 else "glitched"},
+                "players": {"data": [{"rel": "user", "id": f"u{jogador:04d}", "names": {"international": f"runner{jogador}"},
+                                      "name": f"runner{jogador}"}]},
+                "videos": {"links": [{"uri": "N/A"}]} if plataforma_video is None else None,
+            }
+            publicacao = data + timedelta(hours=rng.randint(1, 20))
+            por_canal[jogador].append(publicacao)
+            run["_video"] = (plataforma_video, jogador, publicacao)
+            self.runs.append(run)
+
+        # vídeos das runs entram na lista do canal; os ids saem da posição final na lista
+        for jogador, extras in enumerate(por_canal):
+            self.canais[jogador] = sorted(self.canais[jogador] + extras)
+        posicao = [{t: j for j, t in enumerate(lista)} for lista in self.canais]
+        for run in self.runs:
+            plataforma_video, jogador, publicacao = run.pop("_video")
+            if plataforma_video:
+                j = posicao[jogador][publicacao]
+                run["videos"] = {"links": [{"uri": self.link(plataforma_video, jogador, j)}]}
+
+        self.estatisticas = {} # (jogador, j) -> (views, likes, comentarios), geradas sob demanda
+        self.semente = semente
+
+    # ids no formato de cada plataforma, derivados de (jogador, posição do vídeo no canal)
+    def id_youtube(self, jogador, j): return f"{jogador:04d}y{j:06d}"
+    def id_twitch(self, jogador, j): return str(1_000_000_000 + jogador * 100_000 + j)
+    def id_bilibili(self, jogador, j): return f"BV1{jogador:04d}{j:05d}"
+    def canal_youtube(self, jogador): return f"UC{jogador:022d}"
+
+    def link(self, plataforma, jogador, j):
+        if plataforma == "youtube":
+            return f"https://www.youtube.com/watch?v={self.id_youtube(jogador, j)}"
+        if plataforma == "twitch":
+            return f"https://www.twitch.tv/videos/{self.id_twitch(jogador, j)}"
+        return f"https://www.bilibili.com/video/{self.id_bilibili(jogador, j)}"
+
+    def decodificar(self, plataforma, video_id): # (jogador, j) ou None se o id não existe
+        try:
+            if plataforma == "youtube":
+                jogador, j = int(video_id[:4]), int(video_id[5:])
+            elif plataforma == "twitch":
+                resto = int(video_id) - 1_000_000_000
+                jogador, j = divmod(resto, 100_000)
+            else:
+                jogador, j = int(video_id[3:7]), int(video_id[7:])
+        except (ValueError, IndexError):
+            return None
+        if 0 <= jogador < len(self.canais) and 0 <= j < len(self.canais[jogador]):
+            return jogador, j
+        return None
+
+    def stats(self, jogador, j):
+        chave = (jogador, j)
+        if chave not in self.estatisticas:
+            rng = random.Random(self.semente * 1_000_003 + jogador * 100_000 + j)
+            views = int(rng.lognormvariate(7, 1.3))
+            self.estatisticas[chave] = (views, int(views * rng.uniform(0.01, 0.08)), int(views * rng.uniform(0, 0.01)))
+        return self.estatisticas[chave]
+
+
+class ServidorMock:
+    """
+    Sobe o servidor em uma thread. 'latencia' (segundos) é somada a cada resposta; com
+    'erro_429_a_cada' = N, toda N-ésima requisição volta 429 com Retry-After de 'retry_after'
+    segundos; 'max_pagina' limita o tamanho das páginas (além do limite de cada API).
+    'contadores' guarda, por API, requisições, bytes enviados e 429.
+    """
+
+    def __init__(self, cenario=None, porta=0, latencia=0.0, erro_429_a_cada=0, retry_after=0, max_pagina=None, gravados=None):
+        self.cenario = cenario or Cenario()
+        self.latencia = latencia
+        self.erro_429_a_cada = erro_429_a_cada
+        self.retry_after = retry_after
+        self.max_pagina = max_pagina
+        self.gravados = sqlite3.connect(f"file:{gravados}?mode=ro", uri=True, check_same_thread=False) if gravados else None
+        self.lock = threading.Lock()
+        self.total = 0
+        self.contadores = {}
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # keep-alive, como as APIs reais
+            def setup(self):
+                super().setup()
+                # cabeçalho e corpo saem em escritas separadas; sem isso o ACK atrasado soma ~40 ms por resposta
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            def do_GET(self): servidor.atender(self)
+            def do_POST(self): servidor.atender(self)
+            def log_message(self, *args): pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", porta), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def bases(self):
+        """Valor de transporte.BASES_URL para mandar todas as APIs para este servidor."""
+        return {original: self.url for _, _, original in APIS}
+
+    def iniciar(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def parar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def zerar_contadores(self):
+        with self.lock:
+            self.total = 0
+            self.contadores = {}
+
+    def contar(self, api, campo, valor=1):
+        with self.lock:
+            por_api = self.contadores.setdefault(api, {"requisicoes": 0, "bytes": 0, "erros_429": 0})
+            por_api[campo] += valor
+
+    # --- atendimento ---
+
+    def atender(self, handler):
+        tamanho = int(handler.headers.get("Content-Length") or 0)
+        if tamanho:
+            handler.rfile.read(tamanho)
+        partes = urlsplit(handler.path)
+        query = parse_qsl(partes.query, keep_blank_values=True)
+        api, original = next(((nome, base) for prefixo, nome, base in APIS if partes.path.startswith(prefixo)), ("?", None))
+        self.contar(api, "requisicoes")
+        with self.lock:
+            self.total += 1
+            limitar = self.erro_429_a_cada and self.total % self.erro_429_a_cada == 0
+        if self.latencia:
+            time.sleep(self.latencia)
+
+        if limitar:
+            self.contar(api, "erros_429")
+            status, corpo, extras = 429, {"error": "Too Many Requests", "status": 429}, {"Retry-After": str(self.retry_after)}
+        else:
+            extras = {}
+            registro = self.gravado(original + handler.path) if self.gravados and original else None
+            if registro:
+                status, corpo = registro
+            else:
+                status, corpo = self.responder(api, partes.path, query)
+        dados = corpo if isinstance(corpo, bytes) else json.dumps(corpo).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(dados)))
+        for chave, valor in extras.items():
+            handler.send_header(chave, valor)
+        handler.end_headers()
+        handler.wfile.write(dados)
+        self.contar(api, "bytes", len(dados))
+
+    def gravado(self, url):
+        import cache_http
+        linha = self.gravados.execute("SELECT status, corpo FROM respostas WHERE chave = ?",
+                                      (cache_http.chave_normalizada(url),)).fetchone()
+        return (linha[0], bytes(linha[1])) if linha else None
+
+    def responder(self, api, caminho, query):
+        funcao = {"speedrun": self.speedrun, "twitch": self.twitch, "twitch_auth": self.twitch_auth,
+                  "bilibili": self.bilibili, "youtube": self.youtube}.get(api)
+        if funcao is None:
+            return 404, {"error": "Not Found"}
+        return funcao(caminho, query)
+
+    def pagina(self, limite):
+        return min(limite, self.max_pagina) if self.max_pagina else limite
+
+    # --- speedrun.com ---
+
+    def speedrun(self, caminho, query):
+        q = dict(query)
+        partes = caminho.removeprefix("/api/v1/").strip("/").split("/")
+        if partes == ["games"]:
+            return 200, {"data": [{"id": "g1", "names": {"international": q.get("name", "Elden Ring")}}]}
+        if partes == ["games", "g1"]:
+            return 200, {"data": {"id": "g1", "platforms": self.cenario.plataformas}}
+        if partes == ["games", "g1", "categories"]:
+            return 200, {"data": [{"id": "c1", "name": "Any%"}, {"id": "c2", "name": "All Remembrances"}]}
+        if partes[0] == "categories" and partes[-1] == "variables":
+            valores = {"glitchless": {"label": "Glitchless"}, "glitched": {"label": "Glitched"}}
+            return 200, {"data": [{"id": "v1", "name": "Any% - Subcategories", "is-subcategory": True, "values": {"values": valores}}]}
+        if partes == ["runs"]:
+            return 200, self.runs(q)
+        return 404, {"status": 404, "message": "The requested resource could not be found."}
+
+    def runs(self, q):
+        runs = [r for r in self.cenario.runs
+                if all(q.get(campo) in (None, valor) for campo, valor in (("game", r["game"]), ("category", r["category"])))
+                and q.get("platform") in (None, r["system"]["platform"])]
+        if q.get("direction") == "desc":
+            runs = runs[::-1]
+        maximo = self.pagina(min(int(q.get("max", 20)), 200))
+        offset = int(q.get("offset", 0))
+        if offset > 10000:
+            return {"status": 400, "message": "Invalid offset"}
+        pagina = runs[offset:offset + maximo]
+        links = []
+        if offset + maximo < len(runs):
+            proxima = urlencode({**q, "offset": offset + maximo})
+            links.append({"rel": "next", "uri": f"https://www.speedrun.com/api/v1/runs?{proxima}"})
+        return {"data": pagina, "pagination": {"offset": offset, "max": maximo, "size": len(pagina), "links": links}}
+
+    # --- Twitch ---
+
+    def twitch_auth(self, caminho, query):
+        return 200, {"access_token": "token-mock", "expires_in": 5_000_000, "token_type": "bearer"}
+
+    def vod(self, jogador, j):
+        views, _, _ = self.cenario.stats(jogador, j)
+        vod_id = self.cenario.id_twitch(jogador, j)
+        return {"id": vod_id, "user_id": str(10_000 + jogador), "user_login": f"runner{jogador}", "user_name": f"runner{jogador}",
+                "title": f"Elden Ring speedrun #{j}", "created_at": self.cenario.canais[jogador][j].strftime(FORMATO_DATA),
+                "url": f"https://www.twitch.tv/videos/{vod_id}", "view_count": views, "duration": "2h13m5s", "type": "archive"}
+
+    def twitch(self, caminho, query):
+        if caminho.rstrip("/") != "/helix/videos":
+            return 404, {"error": "Not Found", "status": 404}
+        ids = [v for k, v in query if k == "id"]
+        if ids:
+            vods = [self.vod(*c) for c in (self.cenario.decodificar("twitch", i) for i in ids) if c]
+            return (200, {"data": vods, "pagination": {}}) if vods else (404, {"error": "Not Found", "status": 404, "message": "vods not found"})
+        q = dict(query)
+        jogador = int(q.get("user_id", 0)) - 10_000
+        if not 0 <= jogador < len(self.cenario.canais):
+            return 200, {"data": [], "pagination": {}}
+        primeiro = self.pagina(min(int(q.get("first", 20)), 100))
+        inicio = int(q.get("after") or 0)
+        total = len(self.cenario.canais[jogador])
+        posicoes = range(total - 1 - inicio, max(total - 1 - inicio - primeiro, -1), -1) # do mais novo para o mais antigo
+        dados = [self.vod(jogador, j) for j in posicoes]
+        return 200, {"data": dados, "pagination": {"cursor": str(inicio + primeiro)} if inicio + primeiro < total else {}}
+
+    # --- Bilibili ---
+
+    def bilibili(self, caminho, query):
+        q = dict(query)
+        if caminho == "/x/web-interface/nav":
+            return 200, {"code": 0, "data": {"wbi_img": {"img_url": "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png",
+                                                         "sub_url": "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png"}}}
+        if caminho == "/x/web-interface/view":
+            codigo = self.cenario.decodificar("bilibili", q.get("bvid", ""))
+            if not codigo:
+                return 200, {"code": -404, "message": "啥都木有", "ttl": 1}
+            jogador, j = codigo
+            views, likes, comentarios = self.cenario.stats(jogador, j)
+            return 200, {"code": 0, "message": "0", "data": {
+                "bvid": q["bvid"], "title": f"艾尔登法环 速通 #{j}",
+                "pubdate": int(self.cenario.canais[jogador][j].timestamp()),
+                "owner": {"mid": 20_000 + jogador, "name": f"runner{jogador}"},
+                "stat": {"view": views, "like": likes, "reply": comentarios, "danmaku": views // 50,
+                         "coin": likes // 3, "share": likes // 10, "favorite": likes // 2}}}
+        if caminho == "/x/space/wbi/arc/search":
+            jogador = int(q.get("mid", 0)) - 20_000
+            if not 0 <= jogador < len(self.cenario.canais):
+                return 200, {"code": -400, "message": "请求错误"}
+            ps, pn = self.pagina(min(int(q.get("ps", 30)), 50)), int(q.get("pn", 1))
+            total = len(self.cenario.canais[jogador])
+            posicoes = range(total - 1 - (pn - 1) * ps, max(total - 1 - pn * ps, -1), -1)
+            vlist = [{"bvid": self.cenario.id_bilibili(jogador, j), "created": int(self.cenario.canais[jogador][j].timestamp())} for j in posicoes]
+            return 200, {"code": 0, "data": {"list": {"vlist": vlist}, "page": {"pn": pn, "ps": ps, "count": total}}}
+        return 200, {"code": -404, "message": "啥都木有"}
+
+    # --- YouTube Data API v3 ---
+
+    def youtube(self, caminho, query):
+        q = dict(query)
+        recurso = caminho.removeprefix("/youtube/v3/").strip("/")
+        if recurso == "videos":
+            itens = []
+            for video_id in q.get("id", "").split(","):
+                codigo = self.cenario.decodificar("youtube", video_id)
+                if codigo:
+                    jogador, j = codigo
+                    views, likes, comentarios = self.cenario.stats(jogador, j)
+                    itens.append({"kind": "youtube#video", "id": video_id,
+                                  "snippet": {"publishedAt": self.cenario.canais[jogador][j].strftime(FORMATO_DATA),
+                                              "channelId": self.cenario.canal_youtube(jogador), "title": f"Elden Ring Any% #{j}"},
+                                  "statistics": {"viewCount": str(views), "likeCount": str(likes), "commentCount": str(comentarios)}})
+            return 200, {"kind": "youtube#videoListResponse", "items": itens}
+        if recurso == "channels":
+            itens = []
+            for canal in q.get("id", "").split(","):
+                if canal.startswith("UC") and canal[2:].isdigit() and int(canal[2:]) < len(self.cenario.canais):
+                    jogador = int(canal[2:])
+                    itens.append({"kind": "youtube#channel", "id": canal,
+                                  "statistics": {"subscriberCount": str(1000 + 37 * jogador)},
+                                  "contentDetails": {"relatedPlaylists": {"uploads": "UU" + canal[2:]}}})
+            return 200, {"kind": "youtube#channelListResponse", "items": itens}
+        if recurso == "playlistItems":
+            playlist = q.get("playlistId", "")
+            jogador = int(playlist[2:]) if playlist[2:].isdigit() else -1
+            if not 0 <= jogador < len(self.cenario.canais):
+                return 404, {"error": {"code": 404, "message": "playlistNotFound"}}
+            maximo = self.pagina(min(int(q.get("maxResults", 5)), 50))
+            inicio = int(q.get("pageToken") or 0)
+            total = len(self.cenario.canais[jogador])
+            posicoes = range(total - 1 - inicio, max(total - 1 - inicio - maximo, -1), -1)
+            itens = [{"kind": "youtube#playlistItem",
+                      "contentDetails": {"videoId": self.cenario.id_youtube(jogador, j),
+                                         "videoPublishedAt": self.cenario.canais[jogador][j].strftime(FORMATO_DATA)}} for j in posicoes]
+            resposta = {"kind": "youtube#playlistItemListResponse", "items": itens}
+            if inicio + maximo < total:
+                resposta["nextPageToken"] = str(inicio + maximo)
+            return 200, resposta
+        return 404, {"error": {"code": 404, "message": "Not Found"}}
+
+
+if __name__ == "__main__":
+    servidor = ServidorMock(porta=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"Servidor mock em {servidor.url}. Para apontar os coletores para ele:")
+    print(f"export COLETORES_BASES_URL='{json.dumps(servidor.bases())}'")
+    try:
+        servidor.httpd.serve_forever()
+    except KeyboardInterrupt:
+        servidor.parar()
@@ -0,0 +1,395 @@
+import os, shutil, sys, threading, time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl # trava entre processos (orquestrador e coletores rodando ao mesmo tempo); no Windows fica só a trava entre threads
+except ImportError:
+    fcntl = None
+
+# --- Configuração ---
+# Histórico de views/likes por (plataforma, id do vídeo). Os CSVs dos coletores guardam só a
+# última leitura; aqui cada leitura vira um registro (momento, views, likes) acrescentado ao fim
+# de pendentes.bin, e compactar() junta tudo numa pasta com os registros ordenados por vídeo e
+# momento e guardados como diferenças para o registro anterior do mesmo vídeo (delta), no menor
+# tipo inteiro que servir para quase todos. Views diárias de um vídeo mudam pouco de um dia para
+# o outro, então cada registro ocupa poucos bytes, contra uma linha de CSV por vídeo a cada coleta.
+# uso: python snapshots.py compactar [plataforma ...] | taxas plataforma [desde] [ate] | serie plataforma video_id
+ATIVO = True
+PASTA = Path(__file__).resolve().parent.parent / "1-coleta" / "snapshots" # uma subpasta por plataforma
+COMPACTAR_ACIMA_DE = 200_000 # registros pendentes a partir dos quais registrar() já compacta
+SEM_VALOR = -1 # contador que a plataforma não informa (likes da Twitch), como o -1 do Bilibili na limpeza
+VERSAO = 1
+
+# registro cru de pendentes.bin; 'video' é a linha do id em ids.txt
+REGISTRO = np.dtype([("video", "<i4"), ("momento", "<i8"), ("views", "<i8"), ("likes", "<i8")])
+CAMPOS_COMPACTOS = ("coleta", "views", "likes") # 'coleta' é o momento como posição em momentos.npy
+ARQUIVO_IDS = "ids.txt"
+ARQUIVO_PENDENTES = "pendentes.bin"
+PASTA_COMPACTA = "compacto"
+
+_lock = threading.Lock()
+_ids = {} # pasta da plataforma -> (lista de ids, {id: índice}, bytes já lidos de ids.txt)
+
+
+def _pasta(plataforma, pasta=None):
+    return Path(pasta or PASTA) / plataforma
+
+
+@contextmanager
+def _travado(pasta_plataforma):
+    pasta_plataforma.mkdir(parents=True, exist_ok=True)
+    with _lock, open(pasta_plataforma / ".trava", "a") as trava:
+        if fcntl:
+            fcntl.flock(trava, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(trava, fcntl.LOCK_UN)
+
+
+def _em_segundos(momento):
+    if momento is None:
+        return int(time.time())
+    if isinstance(momento, (int, float, np.number)):
+        return int(momento)
+    momento = pd.Timestamp(momento)
+    if momento.tzinfo is None:
+        momento = momento.tz_localize("UTC")
+    return int(momento.timestamp())
+
+
+# --- ids ---
+def _carregar_ids(pasta_plataforma):
+    """Lista e mapa de ids, lendo só o que outro processo acrescentou a ids.txt desde a última leitura."""
+    chave = str(pasta_plataforma)
+    lista, mapa, lidos = _ids.get(chave, ([], {}, 0))
+    caminho = pasta_plataforma / ARQUIVO_IDS
+    if caminho.exists() and caminho.stat().st_size > lidos:
+        with open(caminho, "rb") as f:
+            f.seek(lidos)
+            novos = f.read()
+        completos = novos[:novos.rfind(b"\n") + 1] # uma linha sem \n no fim é uma escrita interrompida
+        for video_id in completos.decode("utf-8").splitlines():
+            mapa[video_id] = len(lista)
+            lista.append(video_id)
+        lidos += len(completos)
+    _ids[chave] = (lista, mapa, lidos)
+    return lista, mapa
+
+
+def _indices(pasta_plataforma, video_ids, criar):
+    """Índice de cada id; com criar=True os ids novos são acrescentados a ids.txt (chamar com a trava)."""
+    lista, mapa = _carregar_ids(pasta_plataforma)
+    novos = list(dict.fromkeys(v for v in video_ids if v not in mapa)) if criar else []
+    if novos:
+        caminho = pasta_plataforma / ARQUIVO_IDS
+        lidos = _ids[str(pasta_plataforma)][2]
+        with open(caminho, "ab") as f:
+            f.truncate(lidos) # descarta a linha interrompida, se houver
+            f.write("".join(v + "\n" for v in novos).encode("utf-8"))
+        for video_id in novos:
+            mapa[video_id] = len(lista)
+            lista.append(video_id)
+        _ids[str(pasta_plataforma)] = (lista, mapa, caminho.stat().st_size)
+    return np.array([mapa.get(v, -1) for v in video_ids], dtype=np.int64)
+
+
+# --- escrita ---
+def registrar(plataforma, video_ids, views, likes=None, momento=None, pasta=None):
+    """
+    Acrescenta uma leitura de cada vídeo ao histórico da plataforma. 'likes' None (ou None/NaN em
+    um vídeo) vira SEM_VALOR; vídeos sem views são ignorados. 'momento' é o da coleta (agora, por
+    padrão), em segundos UNIX, datetime ou texto ISO, ou uma lista com um por vídeo. Respostas
+    servidas pelo cache HTTP devem vir com o momento em que foram gravadas (ver
+    cache_http.momento_da_resposta): a mesma leitura repetida cai no mesmo momento e é descartada.
+    Devolve quantos registros foram gravados.
+    """
+    if not ATIVO:
+        return 0
+    video_ids = [str(v) for v in video_ids]
+    views = pd.to_numeric(pd.Series(list(views), dtype=object), errors="coerce").to_numpy(dtype="float64")
+    if likes is None:
+        likes = np.full(len(video_ids), SEM_VALOR, dtype="float64")
+    else:
+        likes = pd.to_numeric(pd.Series(list(likes), dtype=object), errors="coerce").fillna(SEM_VALOR).to_numpy(dtype="float64")
+    if isinstance(momento, (list, tuple, np.ndarray, pd.Series)):
+        momento = np.array([_em_segundos(m) for m in momento], dtype=np.int64)
+    else:
+        momento = np.full(len(video_ids), _em_segundos(momento), dtype=np.int64)
+    validos = ~np.isnan(views)
+    if not validos.any():
+        return 0
+    video_ids = [v for v, ok in zip(video_ids, validos) if ok]
+
+    pasta_plataforma = _pasta(plataforma, pasta)
+    with _travado(pasta_plataforma):
+        registros = np.empty(len(video_ids), dtype=REGISTRO)
+        registros["video"] = _indices(pasta_plataforma, video_ids, criar=True)
+        registros["momento"] = momento[validos]
+        registros["views"] = views[validos]
+        registros["likes"] = likes[validos]
+        caminho = pasta_plataforma / ARQUIVO_PENDENTES
+        with open(caminho, "ab") as f:
+            tamanho = f.seek(0, os.SEEK_END)
+            f.truncate(tamanho - tamanho % REGISTRO.itemsize) # registro cortado por uma escrita interrompida
+            f.write(registros.tobytes())
+            pendentes = f.tell() // REGISTRO.itemsize
+        if pendentes >= COMPACTAR_ACIMA_DE:
+            _compactar(pasta_plataforma)
+    return len(registros)
+
+
+def _tipo_com_excecoes(delta):
+    """
+    Tipo inteiro dos deltas que ocupa menos bytes contando as exceções: um vídeo que viraliza num
+    dia não obriga todos os outros a usar int64; os deltas que não cabem vão para a lista de
+    exceções (posição e valor, 16 bytes cada) e ficam zerados no array.
+    """
+    melhor, menor_custo = np.int64, 8 * len(delta)
+    for tipo in (np.int8, np.int16, np.int32):
+        info = np.iinfo(tipo)
+        fora = np.count_nonzero((delta < info.min) | (delta > info.max))
+        custo = np.dtype(tipo).itemsize * len(delta) + 16 * fora
+        if custo < menor_custo:
+            melhor, menor_custo = tipo, custo
+    return melhor
+
+
+def _codificar(registros, num_videos):
+    """
+    Registros ordenados por (video, momento) -> offsets por vídeo e, para cada campo, o primeiro
+    valor de cada vídeo e os deltas. O momento entra como o número da coleta (posição na lista de
+    momentos distintos): quem é lido em toda coleta tem delta 1, que cabe num int8.
+    """
+    contagens = np.bincount(registros["video"], minlength=num_videos)
+    inicio = np.concatenate([[0], np.cumsum(contagens)])
+    com_dados = np.flatnonzero(contagens)
+    momentos = np.unique(registros["momento"])
+    arrays = {"inicio": inicio, "momentos": momentos}
+    for campo in CAMPOS_COMPACTOS:
+        valores = np.searchsorted(momentos, registros["momento"]) if campo == "coleta" else registros[campo]
+        delta = np.diff(valores, prepend=valores[:1])
+        primeiro = np.zeros(num_videos, dtype=np.int64)
+        primeiro[com_dados] = valores[inicio[com_dados]]
+        delta[inicio[com_dados]] = 0 # o primeiro registro de cada vídeo fica em 'primeiro'
+        tipo = _tipo_com_excecoes(delta)
+        info = np.iinfo(tipo)
+        fora = np.flatnonzero((delta < info.min) | (delta > info.max))
+        arrays[f"{campo}.primeiro"] = primeiro
+        arrays[f"{campo}.excecoes_pos"] = fora
+        arrays[f"{campo}.excecoes_valor"] = delta[fora]
+        delta[fora] = 0
+        arrays[f"{campo}.delta"] = delta.astype(tipo)
+    return arrays
+
+
+def _compactar(pasta_plataforma):
+    registros = _todos(pasta_plataforma)
+    num_videos = len(_carregar_ids(pasta_plataforma)[0])
+    temporaria = pasta_plataforma / (PASTA_COMPACTA + ".tmp")
+    shutil.rmtree(temporaria, ignore_errors=True)
+    temporaria.mkdir()
+    for nome, array in _codificar(registros, num_videos).items():
+        np.save(temporaria / f"{nome}.npy", array, allow_pickle=False)
+    (temporaria / "versao").write_text(str(VERSAO))
+
+    compacta = pasta_plataforma / PASTA_COMPACTA
+    antiga = pasta_plataforma / (PASTA_COMPACTA + ".old")
+    if compacta.exists():
+        os.replace(compacta, antiga)
+    os.replace(temporaria, compacta)
+    shutil.rmtree(antiga, ignore_errors=True)
+    # se o processo cair antes daqui, os pendentes ficam repetidos na pasta compacta e _todos() os descarta
+    open(pasta_plataforma / ARQUIVO_PENDENTES, "wb").close()
+    return len(registros)
+
+
+def compactar(plataforma, pasta=None):
+    """Junta os pendentes da plataforma à pasta compacta. Devolve o total de registros."""
+    pasta_plataforma = _pasta(plataforma, pasta)
+    with _travado(pasta_plataforma):
+        return _compactar(pasta_plataforma)
+
+
+# --- leitura ---
+def _ler_pendentes(pasta_plataforma):
+    caminho = pasta_plataforma / ARQUIVO_PENDENTES
+    if not caminho.exists():
+        return np.empty(0, dtype=REGISTRO)
+    return np.fromfile(caminho, dtype=REGISTRO, count=caminho.stat().st_size // REGISTRO.itemsize)
+
+
+def _abrir_compacta(pasta_plataforma):
+    compacta = pasta_plataforma / PASTA_COMPACTA
+    if not compacta.exists():
+        return None
+    return {p.stem: np.load(p, mmap_mode="r") for p in compacta.glob("*.npy")}
+
+
+def _deltas(compacta, campo, posicoes):
+    """Deltas de 'campo' nas posições pedidas (ordenadas), com as exceções de volta no lugar."""
+    delta = np.asarray(compacta[f"{campo}.delta"][posicoes], dtype=np.int64)
+    excecoes = np.asarray(compacta[f"{campo}.excecoes_pos"])
+    valores = np.asarray(compacta[f"{campo}.excecoes_valor"])
+    if isinstance(posicoes, slice):
+        delta[excecoes] = valores
+    elif len(excecoes) and len(posicoes):
+        i = np.searchsorted(posicoes, excecoes)
+        achou = i < len(posicoes)
+        achou[achou] = posicoes[i[achou]] == excecoes[achou]
+        delta[i[achou]] = valores[achou]
+    return delta
+
+
+def _decodificar(compacta, videos=None):
+    """Registros de todos os vídeos (ou só dos índices em 'videos'), ordenados por (video, momento)."""
+    inicio = np.asarray(compacta["inicio"])
+    num_videos = len(inicio) - 1
+    videos = np.arange(num_videos) if videos is None else np.asarray([v for v in videos if 0 <= v < num_videos], dtype=np.int64)
+    if len(videos) == 0: # nenhum id pedido é conhecido (ex.: serie() de um vídeo nunca lido)
+        return np.empty(0, dtype=REGISTRO)
+    contagens = inicio[videos + 1] - inicio[videos]
+    inicios_locais = np.concatenate([[0], np.cumsum(contagens)[:-1]]).astype(np.int64)
+    if len(videos) == num_videos:
+        posicoes = slice(None)
+    else:
+        # posições dos registros dos vídeos pedidos, sem laço em Python
+        posicoes = np.arange(contagens.sum()) + np.repeat(inicio[videos] - inicios_locais, contagens)
+    registros = np.empty(int(contagens.sum()), dtype=REGISTRO)
+    registros["video"] = np.repeat(videos, contagens)
+    com_dados = contagens > 0
+    for campo in CAMPOS_COMPACTOS:
+        acumulado = np.cumsum(_deltas(compacta, campo, posicoes))
+        # cumsum corrido: a base de cada vídeo desconta o que veio dos vídeos anteriores
+        base = np.zeros(len(videos), dtype=np.int64)
+        base[com_dados] = np.asarray(compacta[f"{campo}.primeiro"])[videos[com_dados]] - acumulado[inicios_locais[com_dados]]
+        valores = acumulado + np.repeat(base, contagens)
+        if campo == "coleta":
+            registros["momento"] = np.asarray(compacta["momentos"])[valores]
+        else:
+            registros[campo] = valores
+    return registros
+
+
+def _ordenar_sem_repetidos(registros):
+    """Ordena por (video, momento) e, para o mesmo vídeo e momento, fica o último registrado."""
+    registros = registros[np.lexsort((registros["momento"], registros["video"]))]
+    if len(registros) > 1:
+        ultimo = np.ones(len(registros), dtype=bool)
+        ultimo[:-1] = (registros["video"][1:] != registros["video"][:-1]) | (registros["momento"][1:] != registros["momento"][:-1])
+        registros = registros[ultimo]
+    return registros
+
+
+def _todos(pasta_plataforma, videos=None):
+    compacta = _abrir_compacta(pasta_plataforma)
+    pendentes = _ler_pendentes(pasta_plataforma)
+    if videos is not None:
+        pendentes = pendentes[np.isin(pendentes["video"], videos)]
+    if compacta is None:
+        return _ordenar_sem_repetidos(pendentes)
+    if len(pendentes) == 0:
+        return _decodificar(compacta, videos)
+    return _ordenar_sem_repetidos(np.concatenate([_decodificar(compacta, videos), pendentes]))
+
+
+def _no_intervalo(registros, desde, ate):
+    manter = np.ones(len(registros), dtype=bool)
+    if desde is not None:
+        manter &= registros["momento"] >= _em_segundos(desde)
+    if ate is not None:
+        manter &= registros["momento"] <= _em_segundos(ate)
+    return registros[manter]
+
+
+def _selecionar(plataforma, video_ids, desde, ate, pasta):
+    pasta_plataforma = _pasta(plataforma, pasta)
+    if not pasta_plataforma.exists():
+        return [], np.empty(0, dtype=REGISTRO)
+    with _travado(pasta_plataforma):
+        lista = _carregar_ids(pasta_plataforma)[0]
+        videos = None
+        if video_ids is not None:
+            videos = _indices(pasta_plataforma, [str(v) for v in video_ids], criar=False)
+            videos = np.unique(videos[videos >= 0])
+        registros = _todos(pasta_plataforma, videos)
+    return lista, _no_intervalo(registros, desde, ate)
+
+
+def _como_tabela(lista, registros):
+    return pd.DataFrame({
+        "video_id": np.asarray(lista, dtype=object)[registros["video"]] if len(registros) else np.empty(0, dtype=object),
+        "momento": pd.to_datetime(registros["momento"], unit="s", utc=True),
+        "views": registros["views"],
+        "likes": registros["likes"],
+    })
+
+
+def tabela(plataforma, desde=None, ate=None, video_ids=None, pasta=None):
+    """Registros (video_id, momento, views, likes) entre 'desde' e 'ate' (inclusive), ordenados por vídeo e momento."""
+    return _como_tabela(*_selecionar(plataforma, video_ids, desde, ate, pasta))
+
+
+def serie(plataforma, video_id, desde=None, ate=None, pasta=None):
+    """Curva de um vídeo: momento, views e likes em ordem de momento."""
+    return tabela(plataforma, desde, ate, [video_id], pasta).drop(columns="video_id")
+
+
+def taxas(plataforma, desde=None, ate=None, video_ids=None, pasta=None):
+    """
+    Crescimento de cada vídeo entre o primeiro e o último registro dentro de [desde, ate]: número
+    de leituras, dias entre elas, ganho de views/likes e views/likes por dia (NaN com uma leitura
+    só; likes NaN quando a plataforma não informa).
+    """
+    lista, registros = _selecionar(plataforma, video_ids, desde, ate, pasta)
+    video = registros["video"]
+    primeiro = np.flatnonzero(np.r_[True, video[1:] != video[:-1]]) if len(video) else np.empty(0, dtype=np.int64)
+    ultimo = np.r_[primeiro[1:] - 1, len(video) - 1] if len(video) else primeiro
+    dias = (registros["momento"][ultimo] - registros["momento"][primeiro]) / 86400
+    ganho_views = (registros["views"][ultimo] - registros["views"][primeiro]).astype("float64")
+    sem_likes = (registros["likes"][primeiro] == SEM_VALOR) | (registros["likes"][ultimo] == SEM_VALOR)
+    ganho_likes = np.where(sem_likes, np.nan, registros["likes"][ultimo] - registros["likes"][primeiro])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        por_dia = np.where(dias > 0, 1 / dias, np.nan)
+    return pd.DataFrame({
+        "video_id": np.asarray(lista, dtype=object)[video[primeiro]] if len(video) else np.empty(0, dtype=object),
+        "leituras": ultimo - primeiro + 1,
+        "primeira": pd.to_datetime(registros["momento"][primeiro], unit="s", utc=True),
+        "ultima": pd.to_datetime(registros["momento"][ultimo], unit="s", utc=True),
+        "dias": dias,
+        "views": registros["views"][ultimo],
+        "ganho_views": ganho_views,
+        "ganho_likes": ganho_likes,
+        "views_por_dia": ganho_views * por_dia,
+        "likes_por_dia": ganho_likes * por_dia,
+    })
+
+
+def tamanho_em_disco(plataforma, pasta=None):
+    """Bytes ocupados pela plataforma (ids, pendentes e pasta compacta)."""
+    pasta_plataforma = _pasta(plataforma, pasta)
+    return sum(p.stat().st_size for p in pasta_plataforma.rglob("*") if p.is_file()) if pasta_plataforma.exists() else 0
+
+
+def plataformas(pasta=None):
+    pasta = Path(pasta or PASTA)
+    return sorted(p.name for p in pasta.iterdir() if p.is_dir()) if pasta.exists() else []
+
+
+if __name__ == "__main__":
+    comando, argumentos = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ("compactar", [])
+    if comando == "compactar":
+        for nome in argumentos or plataformas():
+            total = compactar(nome)
+            print(f"{nome}: {total} registros, {tamanho_em_disco(nome) / 1024:.1f} KiB")
+    elif comando == "taxas":
+        print(taxas(argumentos[0], *argumentos[1:3]).sort_values("views_por_dia", ascending=False).to_string(index=False))
+    elif comando == "serie":
+        print(serie(argumentos[0], argumentos[1]).to_string(index=False))
+    else:
+        print("uso: python snapshots.py compactar [plataforma ...] | taxas plataforma [desde] [ate] | serie plataforma video_id")
@@ -1,40 +1,81 @@
-import requests
 import csv
+import heapq
+import json
+import math
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
+from urllib.parse import urlencode
+
+import transporte
 
 # --- Configuração ---
 GAME_NAME = "Elden Ring"
 CATEGORY_NAME = "Any%" 
 VARIABLE_NAME = "Any% - Subcategories" # nome da variável que define a sub-categoria
 VALUE_LABEL = "Glitchless" # valor específico da variável para filtrar
+SHARDED_FETCH = False # baixa o histórico em shards paralelos (útil em categorias muito grandes)
+SHARD_WORKERS = 4 # máximo de requisições simultâneas no modo em shards
+USAR_CACHE_HTTP = True # reaproveita respostas guardadas em disco (ver cache_http.py)
+INCREMENTAL_MODE = False # só busca runs mais novas que o CSV existente (também ativado com --incremental)
+TODAS_SUBCATEGORIAS = False # progressão de todos os valores de todas as sub-categorias em uma busca só (também com --todas-subcategorias)
+GRAVAR_COLUNAR = True # grava também a versão colunar tipada (colunar.py) ao lado de cada CSV
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 OUTPUT_FILE = SCRIPT_DIR.parent / "1-coleta" / "speedrun_stats.csv"
+PROGRESSOES_FILE = SCRIPT_DIR.parent / "1-coleta" / "speedrun_progressoes.csv"
+OUTPUT_FIELDS = ["date", "player", "time_seconds", "time_formatted", "run_link", "video_link"]
+
+API_BASE = "https://www.speedrun.com/api/v1"
+RUNS_MAX_PAGE_SIZE = 200 # maior página aceita pelo endpoint /runs
+RUNS_DEFAULT_PAGE_SIZE = 20 # página usada pela API quando 'max' não é informado
+RUNS_MAX_OFFSET = 10000 # maior 'offset' aceito pelo /runs; páginas além disso não existem
+# filtros que o endpoint /runs entende; qualquer outro (variáveis, datas) precisa ser aplicado localmente
+RUNS_SERVER_FILTERS = {"user", "guest", "examiner", "game", "level", "category", "platform", "region", "emulated", "status"}
+
+# contadores de tráfego do processo inteiro; os relatórios de cada busca usam um contador próprio
+# (novo_contador), porque o orquestrador roda vários alvos ao mesmo tempo no mesmo processo
+api_stats = {"requests": 0, "bytes": 0, "envelope_bytes": 0}
+api_stats_lock = threading.Lock()
 
-def get_api_data(url): # função que se comunica com o site
+def novo_contador():
+    return dict.fromkeys(api_stats, 0)
+
+def get_api_data(url, contador=None): # função que se comunica com o site; 'contador' também recebe o tráfego da chamada
     try:
-        response = requests.get(url)
+        response = transporte.get(url, cache=USAR_CACHE_HTTP)
         response.raise_for_status()
-        return response.json()
+        dados = response.json()
+        # bytes que não são runs (paginação + headers), pagos uma vez por página
+        envelope = {chave: valor for chave, valor in dados.items() if chave != "data"}
+        headers_bytes = sum(len(k) + len(v) + 4 for k, v in response.headers.items())
+        envelope_bytes = len(json.dumps(envelope).encode("utf-8")) + headers_bytes
+        with api_stats_lock:
+            for stats in filter(None, (api_stats, contador)):
+                stats["requests"] += 1
+                stats["bytes"] += len(response.content)
+                stats["envelope_bytes"] += envelope_bytes
+        return dados
     except Exception as e:
         print(f"Erro crítico ao acessar a API na URL: {url}")
         raise e
 
 def get_game_id(game_name): # pega a id do game baseado em seu nome
-    data = get_api_data(f"https://www.speedrun.com/api/v1/games?name={game_name}")['data']
+    data = get_api_data(f"{API_BASE}/games?name={game_name}")['data']
     if not data: raise ValueError(f"Jogo '{game_name}' não encontrado.")
     return data[0]["id"]
 
 def get_category_id(game_id, category_name): # usando o game_id, pega o id da categoria
-    data = get_api_data(f"https://www.speedrun.com/api/v1/games/{game_id}/categories")['data']
+    data = get_api_data(f"{API_BASE}/games/{game_id}/categories")['data']
     for cat in data:
         if cat["name"].lower() == category_name.lower():
             return cat["id"]
     raise ValueError(f"Categoria '{category_name}' não encontrada.")
 
 def get_variable_info(category_id, variable_name, value_label): # pega o id da variável subcategories e do valor específico para glitchless
-    all_vars_data = get_api_data(f"https://www.speedrun.com/api/v1/categories/{category_id}/variables")['data']
+    all_vars_data = get_api_data(f"{API_BASE}/categories/{category_id}/variables")['data']
     for var in all_vars_data:
         if var["name"].lower() == variable_name.lower():
             variable_id = var["id"]
@@ -43,21 +84,267 @@ def get_variable_info(category_id, variable_name, value_label): # pega o id da v
                     return variable_id, val_id, val_data["label"]
     raise ValueError(f"Variável/Valor não encontrados.")
 
-def fetch_all_runs_for_category(game_id, category_id):
-    all_runs = []
-    base_url = (f"https://www.speedrun.com/api/v1/runs?game={game_id}&category={category_id}"
-                f"&status=verified&obsoleted=true" #runs verificadas e obsoletas para pegar o histórico completo
-                f"&orderby=date&direction=asc&embed=players")
-    url = base_url
+def get_subcategory_variables(category_id): # {var_id: (nome, {valor_id: label})} das variáveis que são sub-categorias
+    all_vars_data = get_api_data(f"{API_BASE}/categories/{category_id}/variables")['data']
+    return {
+        var["id"]: (var["name"], {val_id: val_data["label"] for val_id, val_data in var["values"]["values"].items()})
+        for var in all_vars_data if var.get("is-subcategory")
+    }
+
+def split_run_filters(filtros): # separa o que o servidor consegue filtrar do que precisa ser filtrado localmente
+    server_params, local_filters = {}, {}
+    for chave, valor in filtros.items():
+        if valor is None:
+            continue
+        if chave in RUNS_SERVER_FILTERS:
+            server_params[chave] = valor
+        else:
+            local_filters[chave] = valor
+    return server_params, local_filters
+
+def run_passa_filtros(run, local_filters, date_from=None, date_to=None): # aplica localmente o que a API não expressa
+    for chave, valor in local_filters.items():
+        if chave.startswith("var-"):
+            if run.get("values", {}).get(chave[len("var-"):]) != valor:
+                return False
+        elif run.get(chave) != valor:
+            return False
+    data = run.get("date")
+    if (date_from or date_to) and not data:
+        return False
+    if date_from and data < date_from:
+        return False
+    if date_to and data > date_to:
+        return False
+    return True
+
+class RunCompacta: # registro mínimo de uma run; __slots__ evita um dict por instância
+    __slots__ = ("id", "date", "primary_t", "player_id", "player_name", "weblink", "video_uri", "values")
+
+    def __init__(self, id, date, primary_t, player_id, player_name, weblink, video_uri, values=None):
+        self.id = id
+        self.date = date
+        self.primary_t = primary_t
+        self.player_id = player_id
+        self.player_name = player_name
+        self.weblink = weblink
+        self.video_uri = video_uri
+        self.values = values or {} # {var_id: valor_id} das variáveis da run
+
+def compactar_run(run): # reduz o JSON completo da run (com 'players' embutido) aos campos que usamos
+    jogador = run["players"]["data"][0]
+    links = (run.get("videos") or {}).get("links") or [{}]
+    return RunCompacta(
+        run["id"], run["date"], float(run["times"]["primary_t"]),
+        jogador.get("id"), jogador.get("name") or jogador.get("id"),
+        run["weblink"], links[0].get("uri", "N/A"), run.get("values")
+    )
+
+def iterar_paginas(url, contador=None): # segue os links 'next' e entrega uma página crua por vez
     while url:
-        response_data = get_api_data(url)
-        runs_page = response_data['data']
-        all_runs.extend(runs_page)
-        # Removido o print de progresso para uma saída mais limpa
+        response_data = get_api_data(url, contador)
+        yield response_data['data']
         next_link = [link['uri'] for link in response_data['pagination']['links'] if link['rel'] == 'next']
         url = next_link[0] if next_link else None
-    print(f"Total de {len(all_runs)} runs da categoria principal foram baixadas.")
-    return all_runs
+
+def montar_consulta_runs(game_id, category_id, variable_id=None, value_id=None, date_from=None, date_to=None):
+    filtros = {"game": game_id, "category": category_id, "status": "verified"}
+    if variable_id and value_id:
+        filtros[f"var-{variable_id}"] = value_id
+    server_params, local_filters = split_run_filters(filtros)
+    server_params.update({
+        "obsoleted": "true", #runs verificadas e obsoletas para pegar o histórico completo
+        "orderby": "date", "direction": "asc", "embed": "players",
+        "max": RUNS_MAX_PAGE_SIZE
+    })
+    if local_filters or date_from or date_to:
+        print(f"Filtros aplicados localmente (não suportados pelo /runs): {sorted(local_filters) + (['date'] if date_from or date_to else [])}")
+    return server_params, local_filters
+
+def fetch_all_runs_for_category(game_id, category_id, variable_id=None, value_id=None, date_from=None, date_to=None):
+    """
+    Gera as runs verificadas da categoria em ordem de data, já como RunCompacta.
+    Filtros que o endpoint /runs entende vão na URL; o filtro de sub-categoria (var-<id>) e o
+    intervalo de datas não existem no /runs, então são aplicados página a página, e como a
+    ordem é por data a paginação para assim que passa de 'date_to'.
+    Cada página é filtrada e compactada assim que chega, então só uma página de JSON
+    fica em memória por vez.
+    """
+    server_params, local_filters = montar_consulta_runs(game_id, category_id, variable_id, value_id, date_from, date_to)
+
+    contador = novo_contador()
+    mantidas, runs_vistas, parou_cedo = 0, 0, False
+    for runs_page in iterar_paginas(f"{API_BASE}/runs?{urlencode(server_params)}", contador):
+        runs_vistas += len(runs_page)
+        for run in runs_page:
+            if run.get("date") and run_passa_filtros(run, local_filters, date_from, date_to):
+                mantidas += 1
+                yield compactar_run(run)
+        if date_to and any(run.get("date") and run["date"] > date_to for run in runs_page):
+            parou_cedo = True # ordem por data: nada depois desta página entra no intervalo
+            break
+
+    feitas, baixados = contador["requests"], contador["bytes"]
+    envelope_medio = contador["envelope_bytes"] / feitas if feitas else 0
+    # o caminho antigo paginava de 20 em 20 e ia até o fim da categoria
+    caminho_antigo = max(math.ceil(runs_vistas / RUNS_DEFAULT_PAGE_SIZE), 1)
+    economizadas = max(caminho_antigo - feitas, 0)
+    print(f"Total de {mantidas} runs mantidas de {runs_vistas} baixadas em {feitas} requisições ({baixados / 1024:.1f} KiB).")
+    print(f"Economia estimada vs. páginas de {RUNS_DEFAULT_PAGE_SIZE}: {economizadas} requisições e ~{economizadas * envelope_medio / 1024:.1f} KiB"
+          + (" (mais as páginas após 'date_to', que não foram baixadas)." if parou_cedo else "."))
+
+def get_game_platforms(game_id): # plataformas do jogo, usadas como chave dos shards
+    return get_api_data(f"{API_BASE}/games/{game_id}")['data'].get('platforms', [])
+
+def baixar_paginas_em_ondas(pool, consultas, parar, contador=None):
+    """
+    Baixa várias consultas paginadas por offset ao mesmo tempo: a cada onda, cada consulta
+    ativa pede SHARD_WORKERS páginas em paralelo. Uma consulta termina quando uma página vem
+    incompleta, quando 'parar(chave, pagina)' é verdadeiro ou quando chega no RUNS_MAX_OFFSET.
+    Devolve {chave: (paginas em ordem de offset, bateu_no_limite)}.
+    """
+    paginas = {chave: [] for chave in consultas}
+    proximo = {chave: 0 for chave in consultas}
+    limite = set()
+    while proximo:
+        tarefas = []
+        for chave, inicio in proximo.items():
+            offsets = [o for o in range(inicio, inicio + SHARD_WORKERS * RUNS_MAX_PAGE_SIZE, RUNS_MAX_PAGE_SIZE) if o <= RUNS_MAX_OFFSET]
+            url_base = f"{API_BASE}/runs?{urlencode(consultas[chave])}"
+            tarefas.extend((chave, pool.submit(get_api_data, f"{url_base}&offset={o}", contador)) for o in offsets)
+        for chave, futuro in tarefas: # em ordem de offset dentro de cada consulta
+            if chave in proximo:
+                pagina = futuro.result()['data']
+                paginas[chave].append(pagina)
+                if len(pagina) < RUNS_MAX_PAGE_SIZE or parar(chave, pagina):
+                    del proximo[chave]
+        for chave in list(proximo):
+            proximo[chave] += SHARD_WORKERS * RUNS_MAX_PAGE_SIZE
+            if proximo[chave] > RUNS_MAX_OFFSET:
+                limite.add(chave)
+                del proximo[chave]
+    return {chave: (paginas[chave], chave in limite) for chave in consultas}
+
+def compactar_paginas(paginas, local_filters, date_from=None, date_to=None):
+    return [compactar_run(run) for pagina in paginas for run in pagina
+            if run.get("date") and run_passa_filtros(run, local_filters, date_from, date_to)]
+
+def baixar_shards(pool, consultas, local_filters, date_from, date_to, contador, manter=None):
+    """
+    Baixa as consultas de fetch_runs_sharded em paralelo: em ordem crescente de data e, nas que
+    batem no RUNS_MAX_OFFSET, também em ordem decrescente até encontrar o trecho já baixado.
+    'manter(run)' escolhe quais runs cruas ficam (todas, por padrão). Devolve ({chave: RunCompacta
+    em ordem de data}, ids das runs cruas vistas até 'date_to', chaves que ficaram com buraco no meio).
+    """
+    manter = manter or (lambda run: True)
+    selecionar = lambda paginas: [[r for r in p if manter(r)] for p in paginas]
+    vistas = set()
+    def contar(paginas):
+        vistas.update(r["id"] for p in paginas for r in p if not date_to or (r.get("date") and r["date"] <= date_to))
+
+    passou_do_fim = lambda chave, pagina: bool(date_to) and any(r.get("date") and r["date"] > date_to for r in pagina)
+    crescente = baixar_paginas_em_ondas(pool, consultas, passou_do_fim, contador)
+    shards, ultima_data, incompletos = {}, {}, []
+    for chave, (paginas, bateu_limite) in crescente.items():
+        contar(paginas)
+        shards[chave] = compactar_paginas(selecionar(paginas), local_filters, date_from, date_to)
+        if bateu_limite:
+            ultima_data[chave] = max((r["date"] for p in paginas for r in p if r.get("date")), default="")
+
+    if ultima_data:
+        print(f"{len(ultima_data)} consulta(s) chegaram no offset máximo; completando pelo fim do histórico...")
+        decrescente_params = {chave: dict(consultas[chave], direction="desc") for chave in ultima_data}
+        alcancou = lambda chave, pagina: any(r.get("date") and r["date"] < ultima_data[chave] for r in pagina)
+        decrescente = baixar_paginas_em_ondas(pool, decrescente_params, alcancou, contador)
+        for chave, (paginas, bateu_limite) in decrescente.items():
+            contar(paginas)
+            if bateu_limite:
+                incompletos.append(chave)
+            resto = [r for r in compactar_paginas(selecionar(paginas), local_filters, date_from, date_to) if r.date >= ultima_data[chave]]
+            shards[chave].extend(reversed(resto))
+    return shards, vistas, incompletos
+
+def cobre_a_categoria(server_params, vistas, date_to, contador):
+    """
+    Confere se as 'vistas' runs cruas dos shards são todas as da categoria (até 'date_to') com uma
+    página de 1 run da consulta sem filtro de plataforma, no offset len(vistas): se ela vem vazia
+    (ou depois de 'date_to'), não há run fora dos shards. Devolve None quando o offset passa do
+    RUNS_MAX_OFFSET e não dá para conferir.
+    """
+    if len(vistas) > RUNS_MAX_OFFSET:
+        return None
+    pagina = get_api_data(f"{API_BASE}/runs?{urlencode(dict(server_params, max=1))}&offset={len(vistas)}", contador)['data']
+    return not pagina or bool(date_to and pagina[0].get("date") and pagina[0]["date"] > date_to)
+
+def fetch_runs_sharded(game_id, category_id, variable_id=None, value_id=None, date_from=None, date_to=None):
+    """
+    Versão paralela de fetch_all_runs_for_category. O /runs não aceita filtro de data, então
+    o histórico é dividido por plataforma (um filtro que o servidor entende) e as páginas de
+    cada shard são pedidas por offset em paralelo, sem esperar o link 'next'.
+    Shards que batem no RUNS_MAX_OFFSET são completados lendo em ordem decrescente de data
+    até encontrar o trecho já baixado, o que dobra o alcance de cada shard.
+    Runs de plataformas fora da lista do jogo (ou sem plataforma) não caem em nenhum shard: se
+    cobre_a_categoria() mostra que faltam runs, uma consulta sem filtro de plataforma (chave
+    None) guarda só essas runs.
+    Os shards são intercalados por data e as runs repetidas (mesmo id) são descartadas.
+    As RunCompacta de cada shard ficam em memória até a intercalação.
+    """
+    server_params, local_filters = montar_consulta_runs(game_id, category_id, variable_id, value_id, date_from, date_to)
+    plataformas = get_game_platforms(game_id)
+    consultas = {p: dict(server_params, platform=p) for p in plataformas} or {None: dict(server_params)}
+    contador = novo_contador()
+
+    with ThreadPoolExecutor(max_workers=SHARD_WORKERS) as pool:
+        shards, vistas, incompletos = baixar_shards(pool, consultas, local_filters, date_from, date_to, contador)
+        for chave in incompletos:
+            print(f"AVISO: o shard '{chave or 'sem filtro de plataforma'}' tem mais runs do que o alcance de duas direções; parte do meio do histórico ficou de fora.")
+
+        cobre = cobre_a_categoria(server_params, vistas, date_to, contador) if plataformas else True
+        if cobre is None:
+            print(f"AVISO: {len(vistas)} runs passam do offset máximo; não dá para conferir se há runs fora das plataformas {plataformas}.")
+        elif not cobre:
+            print(f"Há runs fora das plataformas {plataformas}; buscando-as na consulta sem filtro de plataforma...")
+            fora = lambda run: (run.get("system") or {}).get("platform") not in plataformas
+            complemento, _, _ = baixar_shards(pool, {None: dict(server_params)}, local_filters, date_from, date_to, contador, fora)
+            shards.update(complemento)
+            print(f"{len(complemento[None])} runs fora das plataformas {plataformas} recuperadas.")
+
+    total, data_atual, ids_na_data = 0, None, set()
+    for run in heapq.merge(*shards.values(), key=lambda r: r.date):
+        if run.date != data_atual: # repetidas sempre têm a mesma data, então basta lembrar os ids do dia atual
+            data_atual, ids_na_data = run.date, set()
+        if run.id in ids_na_data:
+            continue
+        ids_na_data.add(run.id)
+        total += 1
+        yield run
+    print(f"Total de {total} runs mantidas em {contador['requests']} requisições ({len(shards)} consulta(s)).")
+
+def ler_estado_existente(caminho): # última data, melhor tempo e links já gravados no CSV de saída
+    with open(caminho, newline="", encoding="utf-8") as f:
+        linhas = list(csv.DictReader(f))
+    if not linhas:
+        return None
+    ultima = max(linhas, key=lambda l: l["date"])
+    melhor_tempo = min(float(l["time_seconds"]) for l in linhas)
+    return ultima["date"], melhor_tempo, {l["run_link"] for l in linhas}
+
+def fetch_runs_newer_than(game_id, category_id, ultima_data, variable_id=None, value_id=None):
+    """
+    Lê o histórico do mais novo para o mais antigo e para na primeira página que alcança
+    'ultima_data', ou seja, o território que o CSV já cobre. Devolve as runs com data
+    >= ultima_data em ordem crescente (a lista é pequena: só o que apareceu desde a última coleta).
+    """
+    server_params, local_filters = montar_consulta_runs(game_id, category_id, variable_id, value_id)
+    server_params["direction"] = "desc"
+    contador, novas = novo_contador(), []
+    for runs_page in iterar_paginas(f"{API_BASE}/runs?{urlencode(server_params)}", contador):
+        novas.extend(compactar_run(run) for run in runs_page
+                     if run.get("date") and run_passa_filtros(run, local_filters, date_from=ultima_data))
+        if any(run.get("date") and run["date"] < ultima_data for run in runs_page):
+            break
+    print(f"{len(novas)} runs a partir de {ultima_data} baixadas em {contador['requests']} requisições.")
+    return novas[::-1]
 
 def format_time(seconds):
     if seconds is None: return "N/A"
@@ -65,74 +352,141 @@ def format_time(seconds):
     time_str = str(delta)
     return time_str[:-3] if '.' in time_str else time_str
 
-def analisar_progressao_recorde(runs_ordenadas, target_var_id, target_val_id, target_val_label): #filtra as runs pela sub-categoria desejada e analisa a progressão de recordes na categoria
-    historico, melhor_tempo = [], float('inf')
-    
-    runs_filtradas_localmente = [
-        run for run in runs_ordenadas
-        if target_var_id in run.get('values', {}) and run['values'][target_var_id] == target_val_id
-    ]
-    
-    print(f"Filtrando: {len(runs_filtradas_localmente)} runs encontradas para '{target_val_label}'.")
-
-    if not runs_filtradas_localmente:
-        print("Nenhuma run encontrada após o filtro local para a sub-categoria desejada.")
-        return []
+def analisar_progressao_recorde(runs_ordenadas, target_val_label, melhor_tempo=float('inf')): # percorre as runs (já filtradas pela sub-categoria e em ordem de data) uma única vez
+    historico, total = [], 0
 
-    for run in runs_filtradas_localmente:
-        tempo_atual = float(run["times"]["primary_t"])
-        if tempo_atual < melhor_tempo:
-            melhor_tempo = tempo_atual
-            player_name = run["players"]['data'][0].get("name", run["players"]['data'][0]['id'])
-            video_link = run.get("videos", {}).get("links", [{}])[0].get("uri", "N/A")
+    for run in runs_ordenadas:
+        total += 1
+        if run.primary_t < melhor_tempo:
+            melhor_tempo = run.primary_t
             historico.append({
-                "date": run.get("date", "N/A"),
-                "player": player_name,
-                "time_seconds": tempo_atual,
-                "time_formatted": format_time(tempo_atual),
-                "run_link": run["weblink"],
-                "video_link": video_link
+                "date": run.date,
+                "player": run.player_name,
+                "time_seconds": run.primary_t,
+                "time_formatted": format_time(run.primary_t),
+                "run_link": run.weblink,
+                "video_link": run.video_uri
             })
+
+    print(f"Filtrando: {total} runs encontradas para '{target_val_label}'.")
+    if not total:
+        print("Nenhuma run encontrada após o filtro local para a sub-categoria desejada.")
+        return []
     print(f"Análise concluída. Encontrados {len(historico)} recordes mundiais.")
     return historico
 
-def main():
+def gravar_colunar(output_file):
+    """Regrava a versão colunar (ver colunar.py) a partir do CSV; pandas só é carregado aqui."""
+    if not GRAVAR_COLUNAR:
+        return
+    import colunar
     try:
-        print(f"Procurando jogo '{GAME_NAME}'...")
-        game_id = get_game_id(GAME_NAME)
-        print(f"Procurando categoria '{CATEGORY_NAME}'...")
-       
-        category_id = get_category_id(game_id, CATEGORY_NAME)
-        print(f"Buscando variável '{VARIABLE_NAME}' com valor '{VALUE_LABEL}'...")
-        
-        variable_id, value_id, value_label_found = get_variable_info(category_id, VARIABLE_NAME, VALUE_LABEL)
-        print(f"-> IDs encontrados. Iniciando busca de runs...")
-
-        todas_as_runs_da_categoria = fetch_all_runs_for_category(game_id, category_id)
-        
-        if not todas_as_runs_da_categoria:
-            print("Nenhuma run encontrada no histórico geral da categoria.")
-            return
-
-        runs_ordenadas = sorted([r for r in todas_as_runs_da_categoria if r.get('date')], key=lambda r: r['date'])
-        
-        historico = analisar_progressao_recorde(runs_ordenadas, variable_id, value_id, value_label_found)
-        
-        if not historico:
-            print("Não foi possível gerar um histórico de recordes.")
-            return
-
-        print(f"Salvando o histórico de {len(historico)} recordes em '{OUTPUT_FILE}'...")
-        with open(OUTPUT_FILE, "w", newline="", encoding="utf-8") as f:
-            fieldnames = ["date", "player", "time_seconds", "time_formatted", "run_link", "video_link"]
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(historico)
-        
-        print(f"\nSUCESSO: O histórico de recordes foi salvo em '{OUTPUT_FILE}'.")
+        colunar.converter_csv(output_file)
+    except ValueError as e:
+        print(f"aviso: '{output_file}' ficou só em CSV, sem a versão colunar: {e}")
+
+def atualizar_incremental(game_id, category_id, variable_id, value_id, value_label_found, output_file=OUTPUT_FILE):
+    """
+    Continua a progressão a partir do CSV existente: busca só as runs desde a última data
+    gravada, parte do 'melhor_tempo' já salvo e acrescenta apenas os recordes novos.
+    Devolve o número de recordes novos, ou None se não houver CSV para continuar.
+    """
+    estado = ler_estado_existente(output_file) if Path(output_file).exists() else None
+    if not estado:
+        print(f"Nenhum histórico em '{output_file}' para continuar; fazendo a coleta completa.")
+        return None
+    ultima_data, melhor_tempo, links_conhecidos = estado
+    print(f"Modo incremental: último recorde em {ultima_data} ({format_time(melhor_tempo)}).")
+
+    novas = [run for run in fetch_runs_newer_than(game_id, category_id, ultima_data, variable_id, value_id)
+             if run.weblink not in links_conhecidos]
+    historico = analisar_progressao_recorde(novas, value_label_found, melhor_tempo)
+    if historico:
+        with open(output_file, "a", newline="", encoding="utf-8") as f:
+            csv.DictWriter(f, fieldnames=OUTPUT_FIELDS).writerows(historico)
+        gravar_colunar(output_file)
+    print(f"\nSUCESSO: {len(historico)} recordes novos acrescentados em '{output_file}'.")
+    return len(historico)
+
+def coletar_alvo(game_name, category_name, variable_name, value_label, output_file=OUTPUT_FILE, incremental=False):
+    """
+    Coleta a progressão de recordes de um jogo/categoria/sub-categoria e grava em 'output_file'.
+    Levanta exceção se o jogo, a categoria ou a variável não forem encontrados.
+    Devolve o número de recordes gravados (no modo incremental, só os novos).
+    """
+    print(f"Procurando jogo '{game_name}'...")
+    game_id = get_game_id(game_name)
+    print(f"Procurando categoria '{category_name}'...")
+
+    category_id = get_category_id(game_id, category_name)
+    print(f"Buscando variável '{variable_name}' com valor '{value_label}'...")
 
+    variable_id, value_id, value_label_found = get_variable_info(category_id, variable_name, value_label)
+    print(f"-> IDs encontrados. Iniciando busca de runs...")
+
+    if incremental:
+        novos = atualizar_incremental(game_id, category_id, variable_id, value_id, value_label_found, output_file)
+        if novos is not None:
+            return novos
+
+    # a API já entrega em ordem de data, então a progressão é calculada em streaming, página a página
+    buscar_runs = fetch_runs_sharded if SHARDED_FETCH else fetch_all_runs_for_category
+    runs_ordenadas = buscar_runs(game_id, category_id, variable_id, value_id)
+
+    historico = analisar_progressao_recorde(runs_ordenadas, value_label_found)
+
+    if not historico:
+        print("Não foi possível gerar um histórico de recordes.")
+        return 0
+
+    print(f"Salvando o histórico de {len(historico)} recordes em '{output_file}'...")
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+        writer.writerows(historico)
+    gravar_colunar(output_file)
+
+    print(f"\nSUCESSO: O histórico de recordes foi salvo em '{output_file}'.")
+    return len(historico)
+
+def coletar_todas_subcategorias(game_name, category_name, output_file=PROGRESSOES_FILE):
+    """
+    Baixa as runs da categoria uma única vez (sem filtro de variável) e grava em 'output_file' a
+    progressão de recordes de cada valor de cada variável de sub-categoria, com as colunas
+    'variavel' e 'valor' na frente. Devolve o número de recordes gravados.
+    """
+    import progressao # pandas só é necessário neste modo
+
+    print(f"Procurando jogo '{game_name}'...")
+    game_id = get_game_id(game_name)
+    print(f"Procurando categoria '{category_name}'...")
+    category_id = get_category_id(game_id, category_name)
+    variaveis = get_subcategory_variables(category_id)
+    if not variaveis:
+        raise ValueError(f"A categoria '{category_name}' não tem variáveis de sub-categoria.")
+    print(f"-> Sub-categorias: {', '.join(f'{nome} ({len(valores)} valores)' for nome, valores in variaveis.values())}")
+
+    buscar_runs = fetch_runs_sharded if SHARDED_FETCH else fetch_all_runs_for_category
+    progressoes = progressao.progressoes_subcategorias(buscar_runs(game_id, category_id), variaveis)
+    for (nome, valor), grupo in progressoes.groupby(["variavel", "valor"], sort=False):
+        print(f"  {nome} = {valor}: {len(grupo)} recordes")
+
+    Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    progressoes.to_csv(output_file, index=False, encoding="utf-8")
+    gravar_colunar(output_file)
+    print(f"\nSUCESSO: {len(progressoes)} recordes de todas as sub-categorias salvos em '{output_file}'.")
+    return len(progressoes)
+
+def main(incremental=INCREMENTAL_MODE, todas_subcategorias=TODAS_SUBCATEGORIAS):
+    try:
+        if todas_subcategorias:
+            coletar_todas_subcategorias(GAME_NAME, CATEGORY_NAME)
+        else:
+            coletar_alvo(GAME_NAME, CATEGORY_NAME, VARIABLE_NAME, VALUE_LABEL, OUTPUT_FILE, incremental)
     except Exception as e:
         print(f"\nERRO: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(incremental=INCREMENTAL_MODE or "--incremental" in sys.argv,
+         todas_subcategorias=TODAS_SUBCATEGORIAS or "--todas-subcategorias" in sys.argv)
\ No newline at end of file
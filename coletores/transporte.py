@@ -0,0 +1,224 @@
+import json, os, random, threading, time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import cache_http
+import instrumentacao
+
+# --- Configuração ---
+# taxa sustentada (requisições/segundo) e rajada de cada host; hosts fora da tabela usam LIMITE_PADRAO
+LIMITES_POR_HOST = {
+    "www.speedrun.com": (1.6, 5),      # ~100 requisições por minuto
+    "api.twitch.tv": (13.0, 20),       # 800 pontos por minuto no app token
+    "id.twitch.tv": (1.0, 2),
+    "api.bilibili.com": (2.0, 2),
+    "youtube.googleapis.com": (5.0, 10),
+}
+LIMITE_PADRAO = (2.0, 2)
+TAXA_MINIMA = 0.05 # nunca desacelera abaixo de 1 requisição a cada 20s
+MAX_TENTATIVAS = 5
+ESPERA_BASE = 0.5 # segundos; dobra a cada tentativa, com jitter
+ESPERA_MAXIMA = 60
+STATUS_REPETIVEIS = {429, 500, 502, 503, 504}
+TIMEOUT_PADRAO = 30
+# troca a base das URLs na hora de conectar, ex.: para os servidores locais de servidor_mock.py.
+# {"https://api.twitch.tv": "http://127.0.0.1:8765", ...}, lido da variável de ambiente COLETORES_BASES_URL.
+# Limitador e cache continuam usando a URL original.
+BASES_URL = json.loads(os.environ.get("COLETORES_BASES_URL") or "{}")
+
+
+class LimitadorHost:
+    """
+    Token bucket de um host. Começa na taxa configurada, cai pela metade a cada 429,
+    respeita Retry-After e Ratelimit-Remaining/Ratelimit-Reset e volta a subir aos poucos
+    enquanto as respostas vêm sem aviso de limite.
+    """
+
+    def __init__(self, taxa, rajada):
+        self.taxa_maxima = taxa
+        self.taxa = taxa
+        self.rajada = rajada
+        self.tokens = rajada
+        self.ultimo = time.monotonic()
+        self.bloqueado_ate = 0.0
+        self.lock = threading.Lock()
+
+    def adquirir(self): # bloqueia até poder fazer a próxima requisição; devolve o tempo esperado
+        esperado = 0.0
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.tokens = min(self.rajada, self.tokens + (agora - self.ultimo) * self.taxa)
+                self.ultimo = agora
+                espera = self.bloqueado_ate - agora
+                if espera <= 0 and self.tokens >= 1:
+                    self.tokens -= 1
+                    return esperado
+                if espera <= 0:
+                    espera = (1 - self.tokens) / self.taxa
+            time.sleep(espera)
+            esperado += espera
+
+    def pausar(self, segundos):
+        with self.lock:
+            self.bloqueado_ate = max(self.bloqueado_ate, time.monotonic() + segundos)
+
+    def observar(self, response): # ajusta a taxa com base na resposta recebida
+        restante = _numero(response.headers.get("Ratelimit-Remaining"))
+        reset = _numero(response.headers.get("Ratelimit-Reset"))
+        with self.lock:
+            if response.status_code == 429:
+                self.taxa = max(self.taxa / 2, TAXA_MINIMA)
+                self.tokens = 0
+            elif restante is not None and reset is not None:
+                # espalha o que sobrou da janela até o reset (reset é um epoch em segundos)
+                segundos = max(reset - time.time(), 1.0)
+                self.taxa = min(self.taxa_maxima, max(restante / segundos, TAXA_MINIMA))
+            else:
+                self.taxa = min(self.taxa_maxima, self.taxa + self.taxa_maxima * 0.1)
+        if restante is not None and restante < 1 and reset is not None:
+            self.pausar(max(reset - time.time(), 0))
+        espera = tempo_retry_after(response)
+        if espera is not None:
+            self.pausar(espera)
+
+
+_limitadores = {}
+_limitadores_lock = threading.Lock()
+_local = threading.local()
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def tempo_retry_after(response): # Retry-After pode vir em segundos ou como data HTTP
+    valor = response.headers.get("Retry-After")
+    if valor is None:
+        return None
+    segundos = _numero(valor)
+    if segundos is not None:
+        return max(segundos, 0)
+    try:
+        return max(parsedate_to_datetime(valor).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def limitador(host):
+    with _limitadores_lock:
+        if host not in _limitadores:
+            _limitadores[host] = LimitadorHost(*LIMITES_POR_HOST.get(host, LIMITE_PADRAO))
+        return _limitadores[host]
+
+
+def sessao():
+    """Sessão keep-alive da thread atual (requests.Session não deve ser compartilhada entre threads)."""
+    if not hasattr(_local, "sessao"):
+        s = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        s.mount("https://", adaptador)
+        s.mount("http://", adaptador)
+        _local.sessao = s
+    return _local.sessao
+
+
+def redirecionar(url):
+    for original, local in BASES_URL.items():
+        if url.startswith(original):
+            return local + url[len(original):]
+    return url
+
+
+def url_original(url, original):
+    """Inverso de redirecionar para a base 'original' (várias bases podem ir para o mesmo servidor local)."""
+    local = BASES_URL.get(original)
+    return original + url[len(local):] if local and url.startswith(local) else url
+
+
+def base_url(original):
+    """Base configurada em BASES_URL para 'original' ou None (para clientes que montam as URLs sozinhos)."""
+    return BASES_URL.get(original)
+
+
+def aguardar_vez(host):
+    """Para clientes que não passam por este módulo (ex.: googleapiclient) respeitarem o limitador do host."""
+    return limitador(host).adquirir()
+
+
+def espera_com_jitter(tentativa):
+    return min(ESPERA_BASE * 2 ** tentativa, ESPERA_MAXIMA) * random.uniform(0.5, 1.5)
+
+
+def requisitar(metodo, url, tentativas=MAX_TENTATIVAS, cache=False, **kwargs):
+    """
+    Faz a requisição pela sessão da thread, passando pelo limitador do host. Erros de conexão,
+    429 e 5xx são repetidos com espera exponencial com jitter (ou o Retry-After do servidor).
+    Devolve a última resposta; quem chama decide se usa raise_for_status().
+    Com cache=True, GETs de endpoints com validade em cache_http.TTL_POR_ENDPOINT são servidos
+    do disco enquanto válidos e, depois disso, revalidados com ETag/Last-Modified quando possível.
+    """
+    chave = registro = None
+    if cache and metodo == "GET":
+        chave = cache_http.chave_normalizada(url, kwargs.get("params"))
+        if cache_http.ttl_para(chave) is None:
+            chave = None
+        else:
+            registro = cache_http.buscar(chave)
+            if registro and cache_http.fresco(registro, chave):
+                instrumentacao.cache(url, "hit", len(registro["corpo"]))
+                return cache_http.resposta_de(registro, chave)
+            if registro:
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), **cache_http.headers_condicionais(registro)}
+
+    response = _requisitar_com_tentativas(metodo, url, tentativas, **kwargs)
+    if chave and registro and response.status_code == 304:
+        instrumentacao.cache(url, "revalidado", len(registro["corpo"]))
+        registro["gravado_em"] = cache_http.renovar(chave)
+        return cache_http.resposta_de(registro, chave)
+    if chave and response.status_code == 200:
+        cache_http.gravar(chave, response.status_code, response.headers, response.content)
+    return response
+
+
+def _requisitar_com_tentativas(metodo, url, tentativas, **kwargs):
+    kwargs.setdefault("timeout", TIMEOUT_PADRAO)
+    host = urlparse(url).netloc
+    limite = limitador(host)
+    for tentativa in range(tentativas):
+        instrumentacao.dormiu(host, limite.adquirir(), "limitador")
+        inicio = time.perf_counter()
+        try:
+            response = sessao().request(metodo, redirecionar(url), **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            instrumentacao.requisicao(metodo, url, None, time.perf_counter() - inicio, 0, tentativa, erro=type(e).__name__)
+            if tentativa == tentativas - 1:
+                raise
+            dormir(host, espera_com_jitter(tentativa))
+            continue
+        instrumentacao.requisicao(metodo, url, response.status_code, time.perf_counter() - inicio, len(response.content), tentativa)
+        limite.observar(response)
+        if response.status_code not in STATUS_REPETIVEIS or tentativa == tentativas - 1:
+            return response
+        if tempo_retry_after(response) is None: # com Retry-After o limitador já segura a próxima tentativa
+            dormir(host, espera_com_jitter(tentativa))
+    return response
+
+
+def dormir(host, segundos):
+    time.sleep(segundos)
+    instrumentacao.dormiu(host, segundos, "backoff")
+
+
+def get(url, **kwargs):
+    return requisitar("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return requisitar("POST", url, **kwargs)
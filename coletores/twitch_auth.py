@@ -1,46 +1,95 @@
-import requests, json, os, time
+import json, os, threading, time
+import transporte
+
+MARGEM_RENOVACAO = 300 # segundos antes de expires_at em que o token já é renovado
+URL_TOKEN = "https://id.twitch.tv/oauth2/token"
+
+
+class ProvedorToken:
+    """
+    Token de app da Twitch em memória, compartilhado entre threads. token.json é lido uma vez,
+    no primeiro uso, e regravado a cada renovação (para a próxima execução reaproveitar o token).
+    O token é renovado MARGEM_RENOVACAO segundos antes de expirar, sem esperar um 401; invalidar()
+    descarta um token que a API recusou. Nada é lido nem pedido até o primeiro token().
+    """
+
+    def __init__(self, auth_path="auth.json", token_path="token.json", margem=MARGEM_RENOVACAO):
+        self.auth_path = auth_path
+        self.token_path = token_path
+        self.margem = margem
+        self.lock = threading.Lock()
+        self.dados = None
+        self._client_id = None
+        self._leu_disco = False
+
+    def client_id(self):
+        with self.lock:
+            return self._credenciais()[0]
+
+    def _credenciais(self):
+        if self._client_id is None:
+            with open(self.auth_path, "r") as f:
+                auth = json.load(f)
+            self._client_id, self._client_secret = auth["client_id"], auth["client_secret"]
+        return self._client_id, self._client_secret
+
+    def _valido(self):
+        return bool(self.dados and "access_token" in self.dados and time.time() < self.dados.get("expires_at", 0) - self.margem)
+
+    def token(self):
+        with self.lock:
+            if not self._valido() and not self._leu_disco:
+                self._leu_disco = True
+                if os.path.exists(self.token_path):
+                    with open(self.token_path, "r") as f:
+                        self.dados = json.load(f)
+            if not self._valido():
+                self._renovar()
+            return self.dados["access_token"]
+
+    def invalidar(self, token_recusado):
+        """Chamado após um 401: descarta o token se ninguém o renovou enquanto isso."""
+        with self.lock:
+            if self.dados and self.dados.get("access_token") == token_recusado:
+                self.dados = None
+
+    def _renovar(self):
+        client_id, client_secret = self._credenciais()
+        params = {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "grant_type": "client_credentials"
+        }
+        response = transporte.post(URL_TOKEN, params=params)
+        dados = response.json()
+
+        if "access_token" not in dados:
+            raise Exception(f"Erro ao gerar token: {dados}")
+
+        # calcula o tempo de expiração absoluta (em segundos UNIX)
+        dados["expires_at"] = time.time() + dados.get("expires_in", 0)
+        self.dados = dados
+
+        # salva token no cache
+        with open(self.token_path, "w") as f:
+            json.dump(dados, f, indent=4)
+        print(f"Novo token gerado e salvo em {self.token_path}")
+
+
+_provedores = {}
+_provedores_lock = threading.Lock()
+
+def provedor(auth_path="auth.json", token_path="token.json"):
+    """Um ProvedorToken por par de arquivos, criado no primeiro uso."""
+    with _provedores_lock:
+        chave = (os.path.abspath(auth_path), os.path.abspath(token_path))
+        if chave not in _provedores:
+            _provedores[chave] = ProvedorToken(auth_path, token_path)
+        return _provedores[chave]
 
 def get_token(auth_path="auth.json", token_path="token.json"):
-    """Obtém e salva o token de acesso da Twitch."""
-    
-    # se já tem token salvo, tenta usar
-    if os.path.exists(token_path):
-        with open(token_path, "r") as f:
-            dados = json.load(f)
-        # verifica se ainda é válido
-        if "access_token" in dados and "expires_at" in dados:
-            if time.time() < dados["expires_at"]:
-                return dados["access_token"]
-
-    # se não tem token válido, gera um novo
-    with open(auth_path, "r") as f:
-        auth = json.load(f)
-
-    CLIENT_ID = auth["client_id"]
-    CLIENT_SECRET = auth["client_secret"]
-
-    url = "https://id.twitch.tv/oauth2/token"
-    params = {
-        "client_id": CLIENT_ID,
-        "client_secret": CLIENT_SECRET,
-        "grant_type": "client_credentials"
-    }
-
-    response = requests.post(url, params=params)
-    dados = response.json()
-
-    if "access_token" not in dados:
-        raise Exception(f"Erro ao gerar token: {dados}")
-
-    # calcula o tempo de expiração absoluta (em segundos UNIX)
-    dados["expires_at"] = time.time() + dados.get("expires_in", 0)
-
-    # salva token no cache
-    with open(token_path, "w") as f:
-        json.dump(dados, f, indent=4)
-
-    print(f"Novo token gerado e salvo em {token_path}")
-    return dados["access_token"]
+    """Obtém o token de acesso da Twitch (em memória; token.json só na primeira vez e nas renovações)."""
+    return provedor(auth_path, token_path).token()
 
 
 if __name__ == "__main__":
@@ -1,34 +1,42 @@
-import requests, json, os, time
+import json, os, re
 import pandas as pd
-from datetime import datetime, timedelta
-from twitch_auth import get_token
+from datetime import datetime, timedelta, timezone
+import twitch_auth
+import transporte
+import cache_http
+import colunar
+import janelas
+import snapshots
 
 # Configuração de saída
 output_dir = "../1-coleta"
-os.makedirs(output_dir, exist_ok=True)
 output_file = os.path.join(output_dir, "twitch_stats.csv")
+speedrun_file = os.path.join(output_dir, "speedrun_stats.csv")
+vods_cache_dir = os.path.join(".cache", "twitch_vods") # índice de VODs por streamer
+USAR_CACHE_HTTP = True # reaproveita respostas guardadas em disco (ver cache_http.py)
+GRAVAR_SNAPSHOTS = True # acrescenta as views lidas ao histórico de snapshots.py (a helix não tem likes)
 
-# Carrega credenciais
-with open("auth.json", "r") as f:
-    auth = json.load(f)
-
-CLIENT_ID = auth["client_id"]
-token = get_token()
-
-headers = {
-    "Client-ID": CLIENT_ID,
-    "Authorization": f"Bearer {token}"
-}
+# Credenciais: auth.json e o token só são lidos/pedidos na primeira chamada à helix, não no import
+provedor_token = twitch_auth.provedor("auth.json", "token.json")
 
 usuario_login = "OrbitalHeelKick"
 vod_id_recorde = "1537427035"
 
-def get_vod_info(vod_id, contexto="recorde"):
-    """Busca informações básicas de um VOD."""
-    url = f"https://api.twitch.tv/helix/videos?id={vod_id}"
-    resp = requests.get(url, headers=headers)
-    resp.raise_for_status()
-    data = resp.json()["data"][0]
+HELIX_MAX_IDS = 100 # máximo de ids por chamada de /helix/videos
+FORMATO_DATA = "%Y-%m-%dT%H:%M:%SZ"
+VOD_ID_RE = re.compile(r'twitch\.tv/videos/(\d+)')
+
+def get_helix_videos(**kwargs):
+    """GET em /helix/videos com o token atual; com 401 (token revogado/expirado) renova e tenta uma vez mais."""
+    for tentativa in range(2):
+        token = provedor_token.token()
+        headers = {"Client-ID": provedor_token.client_id(), "Authorization": f"Bearer {token}"}
+        resp = transporte.get("https://api.twitch.tv/helix/videos", headers=headers, cache=USAR_CACHE_HTTP, **kwargs)
+        if resp.status_code != 401 or tentativa == 1:
+            return resp
+        provedor_token.invalidar(token)
+
+def formatar_vod(data, contexto="recorde"):
     return {
         "vod_id": data["id"],
         "contexto_video": contexto,
@@ -40,59 +48,177 @@ def get_vod_info(vod_id, contexto="recorde"):
         "url": data["url"]
     }
 
-def get_adjacent_vods_by_date(user_login, vod_id_recorde, days_before=5, days_after=5):
-    """Busca VODs dentro da janela temporal antes e depois do recorde, com paginação."""
-    user_resp = requests.get(f"https://api.twitch.tv/helix/users?login={user_login}", headers=headers)
-    user_id = user_resp.json()["data"][0]["id"]
+def get_vods_by_ids(vod_ids):
+    """Busca vários VODs por id, até 100 por chamada. VODs expirados/removidos não voltam."""
+    vods, momentos = {}, {}
+    vod_ids = list(dict.fromkeys(vod_ids))
+    for i in range(0, len(vod_ids), HELIX_MAX_IDS):
+        lote = vod_ids[i:i + HELIX_MAX_IDS]
+        resp = get_helix_videos(params=[("id", v) for v in lote])
+        if resp.status_code == 404: # a helix devolve 404 se nenhum dos ids existe mais
+            continue
+        resp.raise_for_status()
+        momento = cache_http.momento_da_resposta(resp)
+        for v in resp.json()["data"]:
+            vods[v["id"]], momentos[v["id"]] = v, momento
+    if GRAVAR_SNAPSHOTS and vods: # views vindas do cache HTTP entram com o momento em que foram lidas
+        snapshots.registrar("twitch", vods, [v["view_count"] for v in vods.values()], momento=[momentos[v] for v in vods])
+    return vods
+
+def get_vod_info(vod_id, contexto="recorde"):
+    """Busca informações básicas de um VOD."""
+    resp = get_helix_videos(params={"id": vod_id})
+    resp.raise_for_status()
+    data = resp.json()["data"][0]
+    return formatar_vod(data, contexto)
 
-    vods = []
-    cursor = None
+# --- ÍNDICE DE VODS POR STREAMER ---
+# A helix lista os VODs do mais novo para o mais antigo. O índice guarda os VODs já vistos em
+# ordem crescente de data, junto com o intervalo [completo_desde, atualizado_em] em que ele
+# está garantidamente completo; só paginamos o que falta para cobrir a janela pedida.
+indices_vods = {}
+
+def _caminho_indice(user_id):
+    return os.path.join(vods_cache_dir, f"{user_id}.json")
+
+def _carregar_indice(user_id):
+    if user_id in indices_vods:
+        return indices_vods[user_id]
+    try:
+        with open(_caminho_indice(user_id), "r", encoding="utf-8") as f:
+            indice = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        indice = {"user_id": user_id, "vods": [], "atualizado_em": "", "completo_desde": None}
+    indices_vods[user_id] = indice
+    return indice
+
+def _salvar_indice(indice):
+    os.makedirs(vods_cache_dir, exist_ok=True)
+    temporario = _caminho_indice(indice["user_id"]) + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(indice, f)
+    os.replace(temporario, _caminho_indice(indice["user_id"]))
+
+def obter_indice_vods(user_id, desde, ate):
+    """
+    Garante que o índice do streamer cubra [desde, ate] e o devolve. 'completo_desde' vale ""
+    quando o histórico inteiro já foi lido. A paginação para assim que passa de 'desde', ou ao
+    encontrar VODs já indexados quando a parte antiga já está coberta.
+    """
+    indice = _carregar_indice(user_id)
+    cobre_antigo = indice["completo_desde"] is not None and indice["completo_desde"] <= desde
+    if cobre_antigo and indice["atualizado_em"] >= ate:
+        return indice
+
+    agora = datetime.now(timezone.utc).strftime(FORMATO_DATA)
+    conhecidos = {v["id"] for v in indice["vods"]}
+    novos, cursor, mais_antigo, chegou_no_fim, reencontrou = [], None, None, False, False
     while True:
-        url = f"https://api.twitch.tv/helix/videos?user_id={user_id}&first=100"
+        params = {"user_id": user_id, "first": 100}
         if cursor:
-            url += f"&after={cursor}"
-        resp = requests.get(url, headers=headers)
+            params["after"] = cursor
+        resp = get_helix_videos(params=params)
         resp.raise_for_status()
         data = resp.json()
-        vods.extend(data["data"])
+        pagina = data["data"]
+        for vod in pagina:
+            if vod["id"] in conhecidos:
+                reencontrou = True
+            else:
+                novos.append({k: vod[k] for k in ("id", "user_login", "title", "created_at", "view_count", "duration", "url")})
+        if pagina:
+            mais_antigo = min(mais_antigo or pagina[-1]["created_at"], pagina[-1]["created_at"])
         cursor = data.get("pagination", {}).get("cursor")
-        if not cursor:
+        if not cursor or not pagina:
+            chegou_no_fim = True
             break
-        time.sleep(0.5)  # evita rate limit
+        if (reencontrou and cobre_antigo) or mais_antigo < desde:
+            break # o resto já está indexado ou é mais antigo que a janela
+
+    if chegou_no_fim:
+        indice["completo_desde"] = ""
+    elif not (reencontrou and cobre_antigo):
+        indice["completo_desde"] = mais_antigo
+    indice["vods"] = sorted(indice["vods"] + novos, key=lambda v: v["created_at"])
+    indice["atualizado_em"] = agora
+    _salvar_indice(indice)
+    return indice
+
+def coletar_janelas_recordes(vod_ids_recorde, days_before=5, days_after=5):
+    """
+    Resolve as janelas de vários recordes de uma vez: busca os VODs de recorde em lote, agrupa por
+    streamer, atualiza o índice de cada streamer uma única vez para cobrir todas as janelas dele,
+    recorta e rotula as janelas de todos os recordes numa passada (janelas.py) e depois atualiza
+    as views dos VODs selecionados em lote.
+    """
+    recordes = get_vods_by_ids(vod_ids_recorde)
+    for vod_id in vod_ids_recorde:
+        if vod_id not in recordes:
+            print(f"VOD de recorde {vod_id} não encontrado (expirado ou removido).")
+    if not recordes:
+        return []
+
+    janelas_por_streamer = {}
+    for vod in recordes.values():
+        record_date = datetime.strptime(vod["created_at"], FORMATO_DATA)
+        inicio = (record_date - timedelta(days=days_before)).strftime(FORMATO_DATA)
+        fim = (record_date + timedelta(days=days_after)).strftime(FORMATO_DATA)
+        janelas_por_streamer.setdefault(vod["user_id"], []).append((inicio, fim))
+
+    tabela = []
+    for user_id, limites in janelas_por_streamer.items():
+        indice = obter_indice_vods(user_id, min(j[0] for j in limites), max(j[1] for j in limites))
+        tabela += [(user_id, vod["id"], vod["created_at"], vod) for vod in indice["vods"]]
+    indice = janelas.IndiceJanelas(pd.DataFrame(tabela, columns=["user_id", "id", "created_at", "vod"]), canal="user_id", data="created_at")
+
+    record_vods = list(recordes.values())
+    momentos = janelas.em_segundos([vod["created_at"] for vod in record_vods])
+    inicio, fim = indice.limites([vod["user_id"] for vod in record_vods],
+                                 momentos - days_before * 86400, momentos + days_after * 86400)
+    janela, posicao = indice.expandir(inicio, fim)
+    contextos = indice.rotular(janela, posicao, momentos, indice.posicoes([vod["id"] for vod in record_vods], "id"))
+    vods = indice.videos["vod"].to_numpy()[posicao]
+    selecionados = [(record_vods[j]["id"], contexto, vod) for j, contexto, vod in zip(janela, contextos, vods)]
 
-    # Pega a data do recorde
-    record_vod = next((v for v in vods if v["id"] == vod_id_recorde), None)
-    if not record_vod:
+    # o índice guarda metadados; as views precisam ser as atuais
+    atuais = get_vods_by_ids([vod["id"] for _, _, vod in selecionados])
+    linhas = []
+    for vod_id_recorde, contexto, vod in selecionados:
+        if vod["id"] not in atuais:
+            continue
+        linha = formatar_vod(atuais[vod["id"]], contexto)
+        linha["vod_id_recorde"] = vod_id_recorde
+        linhas.append(linha)
+    return sorted(linhas, key=lambda x: (x["vod_id_recorde"], x["data_criacao"]))
+
+def get_adjacent_vods_by_date(user_login, vod_id_recorde, days_before=5, days_after=5):
+    """Busca VODs dentro da janela temporal antes e depois do recorde, usando o índice do streamer."""
+    linhas = coletar_janelas_recordes([vod_id_recorde], days_before, days_after)
+    if not linhas:
         print("VOD de recorde não encontrado.")
+    for linha in linhas:
+        del linha["vod_id_recorde"]
+    return linhas
+
+def vods_recorde_do_speedrun(caminho=speedrun_file): # ids dos VODs da twitch citados em speedrun_stats.csv
+    if not os.path.exists(caminho):
         return []
+    links = pd.read_csv(caminho)["video_link"].dropna().astype(str)
+    return list(dict.fromkeys(m.group(1) for m in links.map(VOD_ID_RE.search) if m))
 
-    record_date = datetime.strptime(record_vod["created_at"], "%Y-%m-%dT%H:%M:%SZ")
-    start_date = record_date - timedelta(days=days_before)
-    end_date = record_date + timedelta(days=days_after)
-
-    selected = []
-    for vod in vods:
-        vod_date = datetime.strptime(vod["created_at"], "%Y-%m-%dT%H:%M:%SZ")
-        if start_date <= vod_date <= end_date:
-            contexto = "recorde" if vod["id"] == vod_id_recorde else \
-                       "antes_recorde" if vod_date < record_date else "depois_recorde"
-            selected.append({
-                "vod_id": vod["id"],
-                "contexto_video": contexto,
-                "streamer_login": vod["user_login"],
-                "title": vod["title"],
-                "data_criacao": vod["created_at"],
-                "views": vod["view_count"],
-                "duration": vod["duration"],
-                "url": vod["url"]
-            })
-    return sorted(selected, key=lambda x: x["data_criacao"])
-
-def main():
-    dados = get_adjacent_vods_by_date(usuario_login, vod_id_recorde, days_before=5, days_after=5)
+def main(entrada=speedrun_file, saida=output_file):
+    vod_ids = vods_recorde_do_speedrun(entrada)
+    if vod_ids:
+        print(f"{len(vod_ids)} recordes com VOD da twitch em {entrada}.")
+        dados = coletar_janelas_recordes(vod_ids, days_before=5, days_after=5)
+    elif entrada == speedrun_file: # sem recordes no CSV padrão, mantém o par streamer/VOD configurado acima
+        dados = get_adjacent_vods_by_date(usuario_login, vod_id_recorde, days_before=5, days_after=5)
+    else:
+        print(f"Nenhum VOD da twitch em {entrada}.")
+        return
     df = pd.DataFrame(dados)
-    df.to_csv(output_file, index=False, encoding='utf-8')
-    print(f"{len(df)} VODs coletados e salvos em {output_file}")
+    colunar.salvar_com_csv(df, saida, encoding='utf-8')
+    print(f"{len(df)} VODs coletados e salvos em {saida}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
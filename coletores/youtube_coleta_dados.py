@@ -1,190 +1,456 @@
-import requests, json, os, time, re
+import json, os, time, re, sys, hashlib, threading
 import pandas as pd
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import transporte
+import instrumentacao
+import colunar
+import cache_http
+import janelas
+import snapshots
 
 # --- CONFIGURAÇÕES ---
 output_dir = "../1-coleta"
-os.makedirs(output_dir, exist_ok=True)
 speedrun_file = os.path.join(output_dir, "speedrun_stats.csv")
 final_analysis_file = os.path.join(output_dir, "youtube_stats.csv")
+uploads_cache_dir = os.path.join(".cache", "youtube_uploads") # índice de uploads por canal
+diario_dir = os.path.join(".cache", "youtube_diario") # diário das runs já coletadas, um arquivo por saída
+JANELA_DIAS = 5 # janela antes/depois do recorde
+USAR_CACHE_HTTP = True # reaproveita respostas guardadas em disco (ver cache_http.py)
+USAR_DIARIO = True # retoma a coleta pulando as runs já gravadas no diário (--do-zero descarta o diário)
+LOTE_IMPACTO = 10 # recordes analisados (e gravados no diário) por vez na etapa de antes/depois
+GRAVAR_SNAPSHOTS = True # acrescenta views/likes lidos ao histórico de snapshots.py
 
 # --- CRIAÇÃO DO CLIENTE DA API ---
-try:
-    with open("auth.json", "r") as f:
-        auth = json.load(f)
-    YOUTUBE_API_KEY = auth["YOUTUBE_API_KEY"]
-    youtube_client = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
-    print("Cliente da API do YouTube criado com sucesso!")
-except Exception as e:
-    print(f"Erro ao criar cliente da API: {e}. Verifique sua chave de API.")
-    youtube_client = None
-
-# obter as estatísticas dos videos do youtube
+# Criado no primeiro uso, não no import: importar o módulo não lê auth.json nem carrega o
+# googleapiclient. O documento de discovery vem do pacote (static_discovery), sem ir à rede.
+youtube_client = None
+_cliente_lock = threading.Lock()
+
+def obter_cliente_youtube():
+    global youtube_client
+    with _cliente_lock:
+        if youtube_client is None:
+            try:
+                from googleapiclient.discovery import build
+                with open("auth.json", "r") as f:
+                    auth = json.load(f)
+                YOUTUBE_API_KEY = auth["YOUTUBE_API_KEY"]
+                # base local (servidor_mock.py) quando configurada em transporte.BASES_URL
+                endpoint = transporte.base_url(YOUTUBE_BASE)
+                youtube_client = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY, static_discovery=True, cache_discovery=False,
+                                       client_options={"api_endpoint": endpoint} if endpoint else None)
+                print("Cliente da API do YouTube criado com sucesso!")
+            except Exception as e:
+                print(f"Erro ao criar cliente da API: {e}. Verifique sua chave de API.")
+    return youtube_client
+
+YOUTUBE_BASE = "https://youtube.googleapis.com" # base das chamadas no discovery estático
+YOUTUBE_MAX_IDS = 50 # máximo de ids aceitos por chamada de videos().list / channels().list
+VIDEO_ID_RE = re.compile(r'(?<=v=)[\w-]+|(?<=be/)[\w-]+')
+
+def extrair_video_id(video_url): # devolve o id do vídeo do youtube ou None se o link não for do youtube
+    if not isinstance(video_url, str) or ('youtube.com' not in video_url and 'youtu.be' not in video_url):
+        return None
+    video_id_match = VIDEO_ID_RE.search(video_url)
+    return video_id_match.group(0) if video_id_match else None
+
+def executar(request, com_momento=False):
+    """
+    Passa as chamadas do cliente google pelo cache em disco e pelo limitador compartilhado do host.
+    Com com_momento=True devolve (resposta, momento em que ela foi lida na API), para os snapshots.
+    """
+    # URL montada pelo cliente sobre a sua base, de volta à base original se veio de BASES_URL:
+    # o host dela é o do limitador e das métricas, como no transporte
+    uri = transporte.url_original(request.uri, YOUTUBE_BASE) if getattr(request, "uri", None) else None
+    host = urlparse(uri or YOUTUBE_BASE).netloc
+    chave = cache_http.chave_normalizada(uri) if USAR_CACHE_HTTP and uri else None
+    if chave and cache_http.ttl_para(chave) is not None:
+        registro = cache_http.buscar(chave)
+        if registro and cache_http.fresco(registro, chave):
+            instrumentacao.cache(uri, "hit", len(registro["corpo"]))
+            resposta = json.loads(registro["corpo"])
+            return (resposta, registro["gravado_em"]) if com_momento else resposta
+    instrumentacao.dormiu(host, transporte.aguardar_vez(host), "limitador")
+    cota = instrumentacao.cota_youtube(getattr(request, "methodId", None))
+    inicio = time.perf_counter()
+    try:
+        resposta = request.execute(num_retries=transporte.MAX_TENTATIVAS)
+    except Exception as e: # a cota é cobrada mesmo quando a chamada falha
+        status = getattr(getattr(e, "resp", None), "status", None) # HttpError do googleapiclient traz a resposta
+        instrumentacao.requisicao("GET", uri or f"{YOUTUBE_BASE}/", status, time.perf_counter() - inicio, 0,
+                                  erro=type(e).__name__, cota=cota)
+        raise
+    instrumentacao.requisicao("GET", uri or f"{YOUTUBE_BASE}/", 200, time.perf_counter() - inicio,
+                              len(json.dumps(resposta)), cota=cota)
+    if chave and cache_http.ttl_para(chave) is not None:
+        cache_http.gravar(chave, 200, {}, json.dumps(resposta).encode("utf-8"))
+    return (resposta, time.time()) if com_momento else resposta
+
+def dividir_em_lotes(ids, tamanho=YOUTUBE_MAX_IDS):
+    for i in range(0, len(ids), tamanho):
+        yield ids[i:i + tamanho]
+
+# obter as estatísticas de vários vídeos do youtube de uma vez
+def obter_estatisticas_youtube_em_lote(video_urls, youtube, falhos=None):
+    """
+    Junta os ids de todos os links, remove repetidos e consulta vídeos e canais em lotes de
+    até 50 ids por chamada. Devolve {video_id: (views, likes, comments, published_at, channel_id, subscriber_count)}
+    para os vídeos encontrados. Se 'falhos' (um set) for passado, recebe os ids cujas chamadas
+    deram erro, para diferenciar "vídeo não existe" de "não deu para consultar".
+    """
+    video_ids = list(dict.fromkeys(v for v in map(extrair_video_id, video_urls) if v))
+    if not youtube or not video_ids:
+        return {}
+
+    chamadas, videos, momentos = 0, {}, {}
+    for lote in dividir_em_lotes(video_ids):
+        try:
+            video_response, momento = executar(youtube.videos().list(part="statistics,snippet", id=",".join(lote)), com_momento=True)
+            chamadas += 1
+            for video_item in video_response.get('items', []):
+                videos[video_item['id']], momentos[video_item['id']] = video_item, momento
+        except Exception as e:
+            print(f"  -> Erro em obter_estatisticas_youtube_em_lote para {len(lote)} vídeos: {e}")
+            if falhos is not None:
+                falhos.update(lote)
+
+    channel_ids = list(dict.fromkeys(v['snippet'].get('channelId') for v in videos.values() if v['snippet'].get('channelId')))
+    inscritos = {}
+    for lote in dividir_em_lotes(channel_ids):
+        try:
+            channel_resp = executar(youtube.channels().list(part="statistics", id=",".join(lote)))
+            chamadas += 1
+            for channel_item in channel_resp.get('items', []):
+                inscritos[channel_item['id']] = int(channel_item['statistics'].get('subscriberCount', 0))
+        except Exception as e:
+            print(f"  -> Erro ao buscar {len(lote)} canais: {e}")
+            if falhos is not None:
+                lote = set(lote)
+                falhos.update(v for v, item in videos.items() if item['snippet'].get('channelId') in lote)
+
+    resultados = {}
+    for video_id, video_item in videos.items():
+        stats, snippet = video_item['statistics'], video_item['snippet']
+        channel_id = snippet.get('channelId')
+        resultados[video_id] = (
+            int(stats.get('viewCount', 0)), int(stats.get('likeCount', 0)), int(stats.get('commentCount', 0)),
+            snippet.get('publishedAt'), channel_id, inscritos.get(channel_id, 0)
+        )
+    if GRAVAR_SNAPSHOTS and resultados: # leituras vindas do cache HTTP entram com o momento em que foram feitas
+        snapshots.registrar("youtube", resultados, [r[0] for r in resultados.values()], [r[1] for r in resultados.values()],
+                            momento=[momentos[v] for v in resultados])
+    print(f"Estatísticas de {len(resultados)} vídeos e {len(inscritos)} canais obtidas em {chamadas} chamadas à API "
+          f"(uma chamada por linha seriam {2 * len(video_ids)}).")
+    return resultados
+
+# obter as estatísticas de um único vídeo do youtube
 def obter_estatisticas_youtube(video_url, youtube):
     default_return = (None, None, None, None, None, None)
-    if not youtube or not isinstance(video_url, str) or ('youtube.com' not in video_url and 'youtu.be' not in video_url):
+    video_id = extrair_video_id(video_url)
+    if not youtube or not video_id:
         return default_return
-    video_id_match = re.search(r'(?<=v=)[\w-]+|(?<=be/)[\w-]+', video_url)
-    if not video_id_match: return default_return
-    video_id = video_id_match.group(0)
+    return obter_estatisticas_youtube_em_lote([video_url], youtube).get(video_id, default_return)
+
+# --- ÍNDICE DE UPLOADS POR CANAL ---
+# search().list custa 100 unidades de cota por chamada; playlistItems().list custa 1 por página.
+# Então, em vez de buscar cada janela, guardamos a lista de uploads de cada canal (ordenada por
+# data de publicação) em memória e em disco e respondemos as janelas com busca binária.
+indices_uploads = {}
+
+def _caminho_indice(channel_id):
+    return os.path.join(uploads_cache_dir, f"{channel_id}.json")
+
+def _carregar_indice(channel_id):
+    if channel_id in indices_uploads:
+        return indices_uploads[channel_id]
     try:
-        video_request = youtube.videos().list(part="statistics,snippet", id=video_id)
-        video_response = video_request.execute()
-        if 'items' in video_response and video_response['items']:
-            video_item = video_response['items'][0]
-            stats, snippet = video_item['statistics'], video_item['snippet']
-            views = int(stats.get('viewCount', 0))
-            likes = int(stats.get('likeCount', 0))
-            comments = int(stats.get('commentCount', 0))
-            published_at = snippet.get('publishedAt')
-            channel_id = snippet.get('channelId')
-            subscriber_count = 0
-            if channel_id:
-                channel_req = youtube.channels().list(part="statistics", id=channel_id)
-                channel_resp = channel_req.execute()
-                if 'items' in channel_resp and channel_resp['items']:
-                    subscriber_count = int(channel_resp['items'][0]['statistics'].get('subscriberCount', 0))
-            time.sleep(0.2)
-            return (views, likes, comments, published_at, channel_id, subscriber_count)
-    except Exception as e:
-        print(f"  -> Erro em obter_estatisticas_youtube para ID {video_id}: {e}")
-    return default_return
-
-# função para analisar o canal antes e depois do recorde
+        with open(_caminho_indice(channel_id), "r", encoding="utf-8") as f:
+            indice = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    indices_uploads[channel_id] = indice
+    return indice
+
+def _salvar_indice(channel_id, indice):
+    os.makedirs(uploads_cache_dir, exist_ok=True)
+    temporario = _caminho_indice(channel_id) + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(indice, f)
+    os.replace(temporario, _caminho_indice(channel_id))
+
+def obter_indice_uploads(youtube, channel_id, cobrir_ate=None):
+    """
+    Devolve o índice de uploads do canal: {'playlist', 'datas', 'ids', 'atualizado_em'}, com
+    'datas'/'ids' em ordem crescente de publicação. Só consulta a API se o índice não existe ou
+    foi atualizado antes de 'cobrir_ate' (fim da janela que queremos responder); nesse caso lê a
+    playlist de uploads (do mais novo para o mais antigo) até encontrar um vídeo já conhecido.
+    """
+    indice = _carregar_indice(channel_id)
+    if indice and (cobrir_ate is None or indice["atualizado_em"] >= cobrir_ate):
+        return indice
+
+    agora = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    if not indice:
+        channel_resp = executar(youtube.channels().list(part="contentDetails", id=channel_id))
+        if not channel_resp.get('items'):
+            return None
+        playlist = channel_resp['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+        indice = {"playlist": playlist, "datas": [], "ids": [], "atualizado_em": ""}
+
+    conhecidos, novos, page_token = set(indice["ids"]), [], None
+    while True:
+        resposta = executar(youtube.playlistItems().list(
+            part="contentDetails", playlistId=indice["playlist"], maxResults=YOUTUBE_MAX_IDS, pageToken=page_token
+        ))
+        itens = resposta.get('items', [])
+        chegou_no_conhecido = False
+        for item in itens:
+            detalhes = item['contentDetails']
+            if detalhes['videoId'] in conhecidos:
+                chegou_no_conhecido = True
+                break
+            if detalhes.get('videoPublishedAt'): # vídeos privados/removidos não têm data
+                novos.append((detalhes['videoPublishedAt'], detalhes['videoId']))
+        page_token = resposta.get('nextPageToken')
+        if chegou_no_conhecido or not page_token:
+            break
+
+    todos = sorted(set(zip(indice["datas"], indice["ids"])) | set(novos))
+    indice.update(datas=[d for d, _ in todos], ids=[v for _, v in todos], atualizado_em=agora)
+    indices_uploads[channel_id] = indice
+    _salvar_indice(channel_id, indice)
+    return indice
+
+def obter_views_likes_em_lote(video_ids, youtube):
+    """
+    {video_id: (views, likes)} dos vídeos encontrados, em lotes de até 50 ids por chamada, e o
+    conjunto de ids cujos lotes falharam.
+    """
+    encontrados, momentos, falhos = {}, {}, set()
+    for lote in dividir_em_lotes(list(dict.fromkeys(video_ids))):
+        try:
+            stats_response, momento = executar(youtube.videos().list(part="statistics", id=",".join(lote)), com_momento=True)
+        except Exception as e:
+            print(f"  -> Erro ao buscar estatísticas de {len(lote)} vídeos vizinhos: {e}")
+            falhos.update(lote)
+            continue
+        for item in stats_response.get('items', []):
+            stats = item['statistics']
+            encontrados[item['id']] = (int(stats.get('viewCount', 0)), int(stats.get('likeCount', 0)))
+            momentos[item['id']] = momento
+    if GRAVAR_SNAPSHOTS and encontrados:
+        snapshots.registrar("youtube", encontrados, [v for v, _ in encontrados.values()], [l for _, l in encontrados.values()],
+                            momento=[momentos[v] for v in encontrados])
+    return encontrados, falhos
+
+# função para analisar os canais antes e depois dos recordes
+def analisar_impacto_canais(youtube, recordes):
+    """
+    'recordes' é uma lista de (channel_id, record_date_str, record_video_id). Para cada um, soma
+    views e likes dos 2 vídeos do canal mais próximos antes do recorde (em [recorde - JANELA_DIAS,
+    recorde]) e dos 2 mais próximos depois (em [recorde, recorde + JANELA_DIAS]), sem contar o
+    próprio vídeo do recorde. As janelas de todos os recordes são recortadas de uma vez sobre os
+    índices de uploads (janelas.py) e as estatísticas dos vizinhos vêm em lotes de 50 ids.
+    Devolve uma lista na ordem de 'recordes', com None quando o canal não foi encontrado ou
+    houve erro.
+    """
+    resultados = [None] * len(recordes)
+    momentos = janelas.em_segundos([data for _, data, _ in recordes])
+    janela_segundos = JANELA_DIAS * 86400
+
+    # um índice de uploads por canal, atualizado uma vez até o fim da última janela dele
+    cobrir_ate = {}
+    for (channel_id, _, _), momento in zip(recordes, momentos):
+        if not np.isnan(momento):
+            fim = datetime.fromtimestamp(momento + janela_segundos, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+            cobrir_ate[channel_id] = max(cobrir_ate.get(channel_id, ""), fim)
+    tabela, encontrados = [], set()
+    for channel_id, fim in cobrir_ate.items():
+        try:
+            indice = obter_indice_uploads(youtube, channel_id, cobrir_ate=fim)
+        except Exception as e:
+            print(f"  -> Erro ao analisar impacto do canal {channel_id}: {e}")
+            continue
+        if not indice:
+            print(f"  -> Canal {channel_id} não encontrado.")
+            continue
+        encontrados.add(channel_id)
+        tabela += [(channel_id, data, video_id) for data, video_id in zip(indice["datas"], indice["ids"])]
+
+    validos = [i for i, ((channel_id, _, _), momento) in enumerate(zip(recordes, momentos))
+               if channel_id in encontrados and not np.isnan(momento)]
+    if not validos:
+        return resultados
+
+    indice = janelas.IndiceJanelas(pd.DataFrame(tabela, columns=["canal", "data", "id"]))
+    canais = [recordes[i][0] for i in validos]
+    momentos = momentos[validos]
+    proprio = indice.posicoes([recordes[i][2] for i in validos], "id")
+
+    # "Antes": os 2 mais novos (mais próximos da data do recorde)
+    # "Depois": os 2 mais antigos (mais próximos da data do recorde)
+    antes = indice.mais_proximos(*indice.limites(canais, momentos - janela_segundos, momentos), 2, "fim", proprio)
+    depois = indice.mais_proximos(*indice.limites(canais, momentos, momentos + janela_segundos), 2, "inicio", proprio)
+
+    # estatísticas de todos os vizinhos de todos os recordes de uma vez
+    vizinhos = [indice.expandir(inicio, fim, proprio) for inicio, fim, _ in (antes, depois)]
+    posicoes = np.unique(np.concatenate([posicao for _, posicao in vizinhos]))
+    ids = indice.videos["id"].to_numpy()
+    stats_por_id, falhos = obter_views_likes_em_lote(ids[posicoes].tolist(), youtube)
+    indice.definir_coluna("views", [stats_por_id.get(v, (0, 0))[0] for v in ids])
+    indice.definir_coluna("likes", [stats_por_id.get(v, (0, 0))[1] for v in ids])
+
+    com_falha = np.zeros(len(validos), dtype=bool)
+    for janela, posicao in vizinhos:
+        com_falha[janela[np.isin(ids[posicao], list(falhos))]] = True
+    resumo = janelas.resumo_antes_depois(indice, antes + (proprio,), depois + (proprio,), {"views": "Views", "likes": "Likes"})
+    for i, falhou, linha in zip(validos, com_falha, resumo.to_dict("records")):
+        if not falhou:
+            resultados[i] = {coluna: int(valor) for coluna, valor in linha.items()}
+    return resultados
+
 def analisar_impacto_canal(youtube, channel_id, record_date_str, record_video_id):
     """
     Busca os 2 vídeos mais próximos antes e os 2 mais próximos depois
     """
+    return analisar_impacto_canais(youtube, [(channel_id, record_date_str, record_video_id)])[0]
+
+
+# --- DIÁRIO DA COLETA ---
+# Cada run terminada vira uma linha JSON acrescentada (e sincronizada no disco) ao diário da saída.
+# Se a coleta cair no meio (cota esgotada, erro, Ctrl+C), a próxima execução lê o diário, pula as
+# runs que já estão nele e monta o CSV final a partir dele, sem repetir as chamadas já pagas.
+# A chave de cada run é o hash da linha do speedrun_stats.csv: uma run alterada é coletada de novo.
+
+def caminho_diario(saida):
+    nome = os.path.splitext(os.path.basename(saida))[0]
+    sufixo = hashlib.sha1(os.path.abspath(saida).encode("utf-8")).hexdigest()[:10]
+    return os.path.join(diario_dir, f"{nome}_{sufixo}.jsonl")
+
+def _para_json(valor): # escalares do numpy/pandas que o json não conhece
+    return valor.item() if hasattr(valor, "item") else str(valor)
+
+def chave_run(dados_run):
+    texto = json.dumps(dados_run, sort_keys=True, default=_para_json)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+def ler_diario(caminho):
+    """{chave: dados} das runs gravadas. Uma última linha cortada (queda durante a escrita) é ignorada."""
+    registros = {}
     try:
-        record_date = datetime.fromisoformat(record_date_str.replace('Z', '+00:00'))
-        
-        # definindo as janelas de tempo
-        data_inicio_antes = (record_date - timedelta(days=5)).strftime('%Y-%m-%dT%H:%M:%SZ')
-        data_fim_antes = record_date.strftime('%Y-%m-%dT%H:%M:%SZ')
-        
-        data_inicio_depois = record_date.strftime('%Y-%m-%dT%H:%M:%SZ')
-        data_fim_depois = (record_date + timedelta(days=5)).strftime('%Y-%m-%dT%H:%M:%SZ')
-
-        periodos = {
-            "antes": (data_inicio_antes, data_fim_antes),
-            "depois": (data_inicio_depois, data_fim_depois)
-        }
-
-        resultados = {
-            'Views_Antes': 0, 'Likes_Antes': 0, 'NumVideos_Antes': 0,
-            'Views_Depois': 0, 'Likes_Depois': 0, 'NumVideos_Depois': 0
-        }
-
-        for periodo, (start_date, end_date) in periodos.items():
-            # busca por vídeos no período
-            search_request = youtube.search().list(
-                part="snippet",
-                channelId=channel_id,
-                publishedAfter=start_date,
-                publishedBefore=end_date,
-                type="video",
-                order="date", 
-                maxResults=5 
-            )
-            search_response = search_request.execute()
-            
-            found_video_ids = []
-            for item in search_response.get('items', []):
-                video_id = item['id']['videoId']
-                # garante que não estamos incluindo o próprio vídeo do recorde na contagem
-                if video_id != record_video_id:
-                    found_video_ids.append(video_id)
-            
-            if not found_video_ids:
-                continue
-
-            if periodo == "antes":
-                # "Antes": Pega os 2 mais novos (mais próximos da data do recorde)
-                video_ids = found_video_ids[:2]
-            else: # "depois"
-                # "Depois": Pega os 2 mais antigos (mais próximos da data do recorde)
-                # A lista está ordenada do mais novo -> mais antigo, então pegamos os últimos
-                video_ids = found_video_ids[-2:]
-
-            # pega as estatísticas dos vídeos encontrados
-            stats_request = youtube.videos().list(
-                part="statistics",
-                id=",".join(video_ids) # O resto do código funciona com 'video_ids'
-            )
-            stats_response = stats_request.execute()
-            
-            total_views = 0
-            total_likes = 0
-            for item in stats_response.get('items', []):
-                total_views += int(item['statistics'].get('viewCount', 0))
-                total_likes += int(item['statistics'].get('likeCount', 0))
-            
-            # salvando os resultados
-            if periodo == "antes":
-                resultados['Views_Antes'] = total_views
-                resultados['Likes_Antes'] = total_likes
-                resultados['NumVideos_Antes'] = len(video_ids)
-            else: 
-                resultados['Views_Depois'] = total_views
-                resultados['Likes_Depois'] = total_likes
-                resultados['NumVideos_Depois'] = len(video_ids)
-        
-        time.sleep(0.5) # pausa para não sobrecarregar a API
-        return resultados
+        with open(caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+                registros[registro["chave"]] = registro["dados"]
+    except FileNotFoundError:
+        pass
+    return registros
 
-    except Exception as e:
-        print(f"  -> Erro ao analisar impacto do canal {channel_id}: {e}")
-        return None
+def abrir_diario(caminho):
+    """Abre o diário para acrescentar, fechando antes uma linha que ficou pela metade."""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    diario = open(caminho, "a+b")
+    if diario.tell() > 0:
+        diario.seek(-1, os.SEEK_END)
+        if diario.read(1) != b"\n":
+            diario.write(b"\n")
+    diario.close()
+    return open(caminho, "a", encoding="utf-8")
+
+def gravar_no_diario(diario, chave, dados):
+    if diario is None:
+        return
+    diario.write(json.dumps({"chave": chave, "dados": dados}, ensure_ascii=False, default=_para_json) + "\n")
+    diario.flush()
+    os.fsync(diario.fileno())
 
 
-def main():
-    if not youtube_client:
+def main(entrada=speedrun_file, saida=final_analysis_file, retomar=USAR_DIARIO):
+    youtube = obter_cliente_youtube()
+    if not youtube:
         print("Finalizando, cliente da API do YouTube não inicializado.")
         return
 
-    if not os.path.exists(speedrun_file):
-        print(f"Erro: Arquivo de entrada '{speedrun_file}' não encontrado.")
+    if not os.path.exists(entrada):
+        print(f"Erro: Arquivo de entrada '{entrada}' não encontrado.")
         return
 
-    df = pd.read_csv(speedrun_file)
-    
+    df = pd.read_csv(entrada)
+
+    # runs já coletadas em uma execução anterior (ver DIÁRIO DA COLETA)
+    arquivo_diario = caminho_diario(saida)
+    if not retomar and os.path.exists(arquivo_diario):
+        os.remove(arquivo_diario)
+    no_diario = ler_diario(arquivo_diario) if retomar else {}
+
     # lista para armazenar os resultados de cada linha
     all_results = []
-
-    print(f"Iniciando análise completa para {len(df)} runs. Isso pode demorar MUITO tempo...")
+    chaves = [] # chave de cada linha de all_results no diário
+    pendentes = [] # (posição em all_results, recorde) das runs com análise de impacto
+    a_coletar = [] # (posição em all_results, linha) das runs que não estão no diário
 
     for index, row in df.iterrows():
-        print(f"\nProcessando run {index + 1}/{len(df)} - Runner: {row['player']}")
-        
-        # dicionário para guardar todos os dados desta run
         current_run_data = row.to_dict()
+        chaves.append(chave_run(current_run_data))
+        if chaves[-1] in no_diario:
+            all_results.append(no_diario[chaves[-1]])
+        else:
+            a_coletar.append((len(all_results), row))
+            all_results.append(current_run_data)
+    if len(a_coletar) < len(df):
+        print(f"Diário '{arquivo_diario}': {len(df) - len(a_coletar)} runs já coletadas, {len(a_coletar)} faltando.")
 
-        # etapa 1: Obter estatísticas do vídeo do recorde
-        video_url = row['video_link']
-        (views, likes, comments, published_at, channel_id, subscribers) = obter_estatisticas_youtube(video_url, youtube_client)
-        
-        current_run_data.update({
-            'Views': views, 'Likes': likes, 'Comments': comments,
-            'PublishedAt': published_at, 'ChannelID': channel_id, 'CurrentSubscribers': subscribers
-        })
-
-        # etapa 2: Se a Etapa 1 funcionou, fazer a análise de antes/depois
-        if channel_id and published_at:
-            video_id_match = re.search(r'(?<=v=)[\w-]+|(?<=be/)[\w-]+', video_url)
-            record_video_id = video_id_match.group(0) if video_id_match else None
-            
-            if record_video_id: # Só prossiga se tivermos um ID de vídeo de recorde
-                print(f"  -> Analisando impacto no canal {channel_id}...")
-                impacto_canal = analisar_impacto_canal(youtube_client, channel_id, published_at, record_video_id)
-                if impacto_canal:
-                    current_run_data.update(impacto_canal)
-            else:
+    print(f"Iniciando análise completa para {len(a_coletar)} runs. Isso pode demorar MUITO tempo...")
+
+    diario = abrir_diario(arquivo_diario) if retomar else None
+    try:
+        # etapa 1 (para todas as runs de uma vez): estatísticas dos vídeos de recorde, em lotes
+        falhos = set()
+        estatisticas_videos = obter_estatisticas_youtube_em_lote([row['video_link'] for _, row in a_coletar], youtube, falhos)
+        default_return = (None, None, None, None, None, None)
+
+        for posicao, row in a_coletar:
+            print(f"\nProcessando run {posicao + 1}/{len(df)} - Runner: {row['player']}")
+
+            # dicionário para guardar todos os dados desta run
+            current_run_data = all_results[posicao]
+
+            # etapa 1: estatísticas do vídeo do recorde (já buscadas em lote)
+            video_url = row['video_link']
+            record_video_id = extrair_video_id(video_url)
+            (views, likes, comments, published_at, channel_id, subscribers) = estatisticas_videos.get(record_video_id, default_return)
+
+            current_run_data.update({
+                'Views': views, 'Likes': likes, 'Comments': comments,
+                'PublishedAt': published_at, 'ChannelID': channel_id, 'CurrentSubscribers': subscribers
+            })
+
+            # etapa 2: Se a Etapa 1 funcionou, fazer a análise de antes/depois (em lotes, abaixo)
+            if channel_id and published_at:
+                if record_video_id: # Só prossiga se tivermos um ID de vídeo de recorde
+                    pendentes.append((posicao, (channel_id, published_at, record_video_id)))
+                    continue
                 print(f"  -> Não foi possível extrair video_id de {video_url}. Pulando análise de impacto.")
-        
-        all_results.append(current_run_data)
+            if record_video_id not in falhos: # com erro na API a run fica fora do diário e é tentada de novo
+                gravar_no_diario(diario, chaves[posicao], current_run_data)
+
+        print(f"\nAnalisando impacto nos canais de {len(pendentes)} recordes...")
+        for inicio in range(0, len(pendentes), LOTE_IMPACTO):
+            lote = pendentes[inicio:inicio + LOTE_IMPACTO]
+            impactos = analisar_impacto_canais(youtube, [recorde for _, recorde in lote])
+            for (posicao, (_, _, record_video_id)), impacto_canal in zip(lote, impactos):
+                if impacto_canal: # sem impacto (canal não encontrado ou erro) a run é tentada de novo na próxima execução
+                    all_results[posicao].update(impacto_canal)
+                    if record_video_id not in falhos:
+                        gravar_no_diario(diario, chaves[posicao], all_results[posicao])
+    finally:
+        if diario is not None:
+            diario.close()
 
     # cria o DataFrame final com todos os dados coletados
     df_final = pd.DataFrame(all_results)
@@ -207,8 +473,8 @@ def main():
         print("Colunas 'Views' ou 'PublishedAt' não encontradas. Pulando cálculos de performance.")
 
     # salvando o resultado final completo
-    df_final.to_csv(final_analysis_file, index=False, encoding='utf-8')
-    print(f"\nANÁLISE COMPLETA FINALIZADA! Resultados salvos em '{final_analysis_file}'")
+    colunar.salvar_com_csv(df_final, saida, encoding='utf-8')
+    print(f"\nANÁLISE COMPLETA FINALIZADA! Resultados salvos em '{saida}'")
     
     # exibe as colunas mais relevantes
     display_cols = [
@@ -230,4 +496,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(retomar=USAR_DIARIO and "--do-zero" not in sys.argv)
\ No newline at end of file
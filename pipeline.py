@@ -0,0 +1,326 @@
+import ast, hashlib, json, os, shutil, subprocess, sys, time
+from pathlib import Path
+
+# Roda as etapas do projeto (coletores -> limpeza -> features e testes do EDA -> preparação da IA) e pula as
+# que não mudaram: cada etapa tem uma chave sha256 dos arquivos de entrada, dos parâmetros
+# (constantes do topo do script, como GAME_NAME ou QUANTIL_HYPE) e do próprio código. Com a chave
+# igual à da última execução e as saídas intactas, nada roda; com uma chave já vista antes, as
+# saídas guardadas em .pipeline/cache/ são restauradas no lugar de rodar a etapa de novo.
+# uso: python pipeline.py [etapa ...] [--forcar] [--listar]
+
+RAIZ = Path(__file__).resolve().parent
+COLETORES = RAIZ / "coletores"
+COLETA = RAIZ / "1-coleta"
+PASTA_ESTADO = RAIZ / ".pipeline"
+ARQUIVO_ESTADO = PASTA_ESTADO / "estado.json"
+PASTA_CACHE = PASTA_ESTADO / "cache" # uma subpasta por etapa e chave com as saídas daquela execução
+MAX_CHAVES_POR_ETAPA = 5 # execuções guardadas por etapa; as mais antigas saem do cache
+TAMANHO_BLOCO = 1 << 20
+
+# colunar.py decide onde fica a versão colunar de cada CSV de saída
+sys.path.insert(0, str(COLETORES))
+import colunar
+
+# cada etapa roda como script (python <script> <argumentos>) dentro da pasta do script, como no README.
+# "parametros" são constantes do script lidas sem importá-lo (os coletores pedem token no import);
+# o código que entra na chave são o script e os módulos locais que ele importa (ver modulos_locais).
+# Os coletores dependem de APIs externas: sem mudança na chave eles não buscam de novo; use --forcar
+# para atualizar os dados.
+ETAPAS = [
+    {
+        "nome": "speedrun",
+        "script": COLETORES / "speedrun.py",
+        "entradas": [],
+        "saidas": [COLETA / "speedrun_stats.csv"],
+        "parametros": ["GAME_NAME", "CATEGORY_NAME", "VARIABLE_NAME", "VALUE_LABEL"],
+    },
+    {
+        "nome": "youtube",
+        "script": COLETORES / "youtube_coleta_dados.py",
+        "entradas": [COLETA / "speedrun_stats.csv"],
+        "saidas": [COLETA / "youtube_stats.csv"],
+        "parametros": ["JANELA_DIAS"],
+    },
+    {
+        "nome": "twitch",
+        "script": COLETORES / "twitch_coleta_dados.py",
+        "entradas": [COLETA / "speedrun_stats.csv"],
+        "saidas": [COLETA / "twitch_stats.csv"],
+        "parametros": ["usuario_login", "vod_id_recorde"],
+    },
+    {
+        "nome": "bilibili",
+        "script": COLETORES / "bilibili_coleta_dados.py",
+        "entradas": [COLETA / "speedrun_stats.csv"],
+        "saidas": [COLETA / "bilibili_stats.csv"],
+        "parametros": ["VIZINHOS", "JANELA_DIAS"],
+    },
+    {
+        "nome": "limpeza",
+        "script": RAIZ / "2-limpeza" / "limpeza.py",
+        "entradas": [COLETA / f"{nome}_stats.csv" for nome in ("speedrun", "twitch", "youtube", "bilibili")],
+        "saidas": [RAIZ / "2-limpeza" / "dados_analise_final.csv"],
+        "parametros": ["COLUNAS_RELEVANTES"],
+    },
+    {
+        "nome": "eda_features",
+        "script": RAIZ / "3-EDA" / "features_eda.py",
+        "entradas": [RAIZ / "2-limpeza" / "dados_analise_final.csv"],
+        "saidas": [RAIZ / "3-EDA" / "dados_features_eda.csv"],
+        "parametros": ["FAIXAS_VIEWS"],
+    },
+    {
+        "nome": "eda_testes",
+        "script": RAIZ / "3-EDA" / "testes_impacto.py",
+        "entradas": [RAIZ / "2-limpeza" / "dados_analise_final.csv"],
+        "saidas": [RAIZ / "3-EDA" / "testes_impacto.csv"],
+        "parametros": ["METRICAS", "GRUPOS", "REAMOSTRAS", "CONFIANCA", "SEMENTE", "ESTATISTICA_IC", "ESTATISTICA_PERMUTACAO"],
+    },
+    {
+        "nome": "ia_preparacao",
+        "script": RAIZ / "4-IA" / "preparacao_ia.py",
+        "argumentos": [RAIZ / "2-limpeza" / "dados_analise_final.csv", RAIZ / "4-IA" / "dados_para_modelagem.csv"],
+        "entradas": [RAIZ / "2-limpeza" / "dados_analise_final.csv"],
+        "saidas": [RAIZ / "4-IA" / "dados_para_modelagem.csv"],
+        "parametros": ["QUANTIL_HYPE", "COLUNAS_IRRELEVANTES"],
+    },
+    {
+        "nome": "ia_treino",
+        "script": RAIZ / "4-IA" / "treino_ia.py",
+        "entradas": [RAIZ / "4-IA" / "dados_para_modelagem.csv"],
+        "saidas": [RAIZ / "4-IA" / "modelo_hype.joblib", RAIZ / "4-IA" / "modelo_views.joblib"],
+        "parametros": ["TAREFAS", "TEST_SIZE", "RANDOM_STATE", "CV", "FATOR_HALVING", "MIN_RECURSOS"],
+    },
+]
+
+
+# --- Chaves ---
+
+def ler_parametros(script, nomes):
+    """Valores literais das constantes 'nomes' no topo do script, via ast (sem executar o import)."""
+    arvore = ast.parse(Path(script).read_text(encoding="utf-8"))
+    valores = {}
+    for no in arvore.body:
+        if isinstance(no, ast.Assign) and len(no.targets) == 1 and isinstance(no.targets[0], ast.Name):
+            nome = no.targets[0].id
+            if nome in nomes:
+                try:
+                    valores[nome] = ast.literal_eval(no.value)
+                except ValueError: # expressão (ex.: compreensão): entra o texto do código
+                    valores[nome] = ast.unparse(no.value)
+    faltando = set(nomes) - set(valores)
+    if faltando:
+        raise ValueError(f"{Path(script).name}: parâmetros não encontrados: {sorted(faltando)}")
+    return valores
+
+def modulos_locais(script):
+    """Módulos do projeto importados pelo script, direta ou indiretamente (inclusive imports dentro de
+    funções), via ast. Procura na pasta de quem importa e em coletores/, que os scripts põem no sys.path."""
+    encontrados, pendentes = set(), [Path(script)]
+    while pendentes:
+        atual = pendentes.pop()
+        for no in ast.walk(ast.parse(atual.read_text(encoding="utf-8"))):
+            if isinstance(no, ast.Import):
+                nomes = [a.name for a in no.names]
+            elif isinstance(no, ast.ImportFrom) and no.module and not no.level:
+                nomes = [no.module]
+            else:
+                continue
+            for nome in nomes:
+                for pasta in (atual.parent, COLETORES):
+                    modulo = pasta / (nome.split(".")[0] + ".py")
+                    if modulo.is_file():
+                        if modulo != Path(script) and modulo not in encontrados:
+                            encontrados.add(modulo)
+                            pendentes.append(modulo)
+                        break
+    return sorted(encontrados)
+
+def hash_arquivo(caminho, memo):
+    """sha256 do conteúdo; 'memo' (guardado no estado) evita reler arquivos com o mesmo tamanho e mtime."""
+    info = os.stat(caminho)
+    chave = str(caminho)
+    visto = memo.get(chave)
+    if visto and visto["tamanho"] == info.st_size and visto["mtime_ns"] == info.st_mtime_ns:
+        return visto["sha256"]
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        while bloco := f.read(TAMANHO_BLOCO):
+            h.update(bloco)
+    memo[chave] = {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": h.hexdigest()}
+    return memo[chave]["sha256"]
+
+def relativo(caminho):
+    return Path(caminho).resolve().relative_to(RAIZ).as_posix()
+
+def chave_etapa(etapa, memo):
+    """sha256 de nome, parâmetros, argumentos, entradas e código da etapa. Entrada ausente vira None."""
+    partes = {
+        "etapa": etapa["nome"],
+        "parametros": ler_parametros(etapa["script"], etapa["parametros"]),
+        "argumentos": [relativo(a) for a in etapa.get("argumentos", [])],
+        "entradas": {relativo(c): hash_arquivo(c, memo) if Path(c).exists() else None for c in etapa["entradas"]},
+        "codigo": {relativo(c): hash_arquivo(c, memo) for c in [etapa["script"], *modulos_locais(etapa["script"])]},
+    }
+    texto = json.dumps(partes, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+# --- Saídas ---
+# além do CSV, cada saída pode ter a versão colunar ao lado (<nome>.colunas/, ver colunar.py)
+
+def arquivos_de_saida(etapa):
+    arquivos = []
+    for saida in etapa["saidas"]:
+        saida = Path(saida)
+        arquivos.append(saida)
+        colunas = colunar.caminho_colunar(saida)
+        if colunas.is_dir():
+            arquivos.extend(sorted(p for p in colunas.iterdir() if p.is_file()))
+    return arquivos
+
+def hashes_saidas(etapa, memo):
+    return {relativo(c): hash_arquivo(c, memo) for c in arquivos_de_saida(etapa) if c.exists()}
+
+def saidas_intactas(etapa, registradas, memo):
+    """As saídas no disco são as da última execução registrada (ninguém apagou nem editou)?"""
+    if not registradas or not all(Path(s).exists() for s in etapa["saidas"]):
+        return False
+    return hashes_saidas(etapa, memo) == registradas
+
+def guardar_no_cache(etapa, chave):
+    destino = PASTA_CACHE / etapa["nome"] / chave
+    temporario = destino.with_name(chave + ".tmp")
+    shutil.rmtree(temporario, ignore_errors=True)
+    for arquivo in arquivos_de_saida(etapa):
+        if arquivo.exists():
+            copia = temporario / relativo(arquivo)
+            copia.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(arquivo, copia) # copy2 mantém o mtime: o colunar continua "em dia" com o CSV
+    shutil.rmtree(destino, ignore_errors=True)
+    if temporario.exists():
+        temporario.rename(destino)
+
+def restaurar_do_cache(etapa, chave):
+    """Copia de volta as saídas guardadas para 'chave'. False se não houver cache para ela."""
+    origem = PASTA_CACHE / etapa["nome"] / chave
+    if not origem.is_dir():
+        return False
+    for saida in etapa["saidas"]: # o colunar antigo não pode sobrar ao lado de um CSV restaurado
+        shutil.rmtree(colunar.caminho_colunar(saida), ignore_errors=True)
+    for copia in sorted(p for p in origem.rglob("*") if p.is_file()):
+        destino = RAIZ / copia.relative_to(origem)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(copia, destino)
+    return True
+
+def podar_cache(etapa, chaves_recentes):
+    pasta = PASTA_CACHE / etapa["nome"]
+    if not pasta.is_dir():
+        return
+    manter = set(chaves_recentes[-MAX_CHAVES_POR_ETAPA:])
+    for sub in pasta.iterdir():
+        if sub.name not in manter:
+            shutil.rmtree(sub, ignore_errors=True)
+
+
+# --- Estado ---
+
+def carregar_estado():
+    if ARQUIVO_ESTADO.exists():
+        with open(ARQUIVO_ESTADO, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"etapas": {}, "hashes": {}}
+
+def salvar_estado(estado):
+    PASTA_ESTADO.mkdir(parents=True, exist_ok=True)
+    temporario = ARQUIVO_ESTADO.with_suffix(".tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, ARQUIVO_ESTADO)
+
+
+# --- Execução ---
+
+def executar(etapa):
+    comando = [sys.executable, str(etapa["script"]), *map(str, etapa.get("argumentos", []))]
+    return subprocess.run(comando, cwd=Path(etapa["script"]).parent).returncode
+
+def rodar_etapa(etapa, estado, forcar=False):
+    """Roda, restaura do cache ou pula a etapa. Devolve 'pulada', 'cache', 'ok' ou 'erro: ...'."""
+    memo = estado["hashes"]
+    registro = estado["etapas"].setdefault(etapa["nome"], {"chaves": []})
+    chave = chave_etapa(etapa, memo)
+
+    if not forcar:
+        if registro.get("chave") == chave and saidas_intactas(etapa, registro.get("saidas"), memo):
+            return "pulada"
+        if restaurar_do_cache(etapa, chave):
+            registro.update(chave=chave, saidas=hashes_saidas(etapa, memo))
+            return "cache"
+
+    inicio = time.perf_counter()
+    codigo = executar(etapa)
+    if codigo != 0:
+        return f"erro: saiu com código {codigo}"
+    if not all(Path(s).exists() for s in etapa["saidas"]):
+        return "erro: saídas não foram geradas"
+
+    guardar_no_cache(etapa, chave)
+    chaves = [c for c in registro["chaves"] if c != chave] + [chave]
+    registro.update(chave=chave, chaves=chaves[-MAX_CHAVES_POR_ETAPA:], saidas=hashes_saidas(etapa, memo),
+                    segundos=round(time.perf_counter() - inicio, 3))
+    podar_cache(etapa, registro["chaves"])
+    return "ok"
+
+def rodar_pipeline(nomes=None, forcar=False):
+    """
+    Percorre as etapas na ordem de ETAPAS (só as de 'nomes', se informado). As chaves são
+    calculadas na hora de cada etapa, então uma saída nova invalida as etapas seguintes.
+    Para na primeira etapa com erro. Devolve {etapa: status}.
+    """
+    selecionadas = [e for e in ETAPAS if not nomes or e["nome"] in nomes]
+    desconhecidas = set(nomes or []) - {e["nome"] for e in ETAPAS}
+    if desconhecidas:
+        raise ValueError(f"Etapas desconhecidas: {sorted(desconhecidas)}")
+
+    estado = carregar_estado()
+    resultado = {}
+    for etapa in selecionadas:
+        print(f"\n=== {etapa['nome']} ===")
+        try:
+            status = rodar_etapa(etapa, estado, forcar)
+        except Exception as e:
+            status = f"erro: {e}"
+        finally:
+            salvar_estado(estado)
+        resultado[etapa["nome"]] = status
+        print(f"[{etapa['nome']}] {status}")
+        if status.startswith("erro"):
+            break
+
+    print("\n--- Resumo ---")
+    print(", ".join(f"{nome}={status}" for nome, status in resultado.items()))
+    return resultado
+
+def listar():
+    estado = carregar_estado()
+    for etapa in ETAPAS:
+        registro = estado["etapas"].get(etapa["nome"], {})
+        chave = chave_etapa(etapa, estado["hashes"])
+        if registro.get("chave") == chave and saidas_intactas(etapa, registro.get("saidas"), estado["hashes"]):
+            situacao = "em dia"
+        elif (PASTA_CACHE / etapa["nome"] / chave).is_dir():
+            situacao = "no cache"
+        else:
+            situacao = "precisa rodar"
+        print(f"{etapa['nome']:<14} {chave[:12]}  {situacao}")
+
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if "--listar" in sys.argv:
+        listar()
+    else:
+        resultado = rodar_pipeline(argumentos or None, forcar="--forcar" in sys.argv)
+        sys.exit(1 if any(s.startswith("erro") for s in resultado.values()) else 0)